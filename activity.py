@@ -0,0 +1,97 @@
+import html
+from bisect import insort
+from datetime import datetime
+
+KINDS = ("climbs", "journals", "comments", "purchases", "tournaments", "profile")
+
+def snippet(text, size=60):
+    text = str(text).rsplit(" (photo: ", 1)[0]
+    return text if len(text) <= size else text[:size] + "..."
+
+def describe(name, args):
+    # A decoded contract event -> [(wallet, kind, identity, line)], one per wallet it belongs to. The identity names
+    # the action rather than the log, so the basic and Enhanced events of one action count once.
+    # Lines are HTML; anything users typed is escaped.
+    if name.startswith("ClimbingLocationCreated"):
+        difficulty = f" ({html.escape(args['difficulty'])})" if "difficulty" in args else ""
+        return [(args["creator"], "climbs", ("climb", args["locationId"]),
+                 f"🪨 Created climb #{args['locationId']} {html.escape(args['name'])}{difficulty} - /viewclimb {args['locationId']}")]
+    if name.startswith("JournalEntryAdded"):
+        location = f" at {html.escape(args['location'])}" if args.get("location") else ""
+        return [(args["author"], "journals", ("journal", args["entryId"]),
+                 f"📝 Journal entry #{args['entryId']}{location}: {html.escape(snippet(args['contentHash']))} - /viewjournal {args['entryId']}")]
+    if name.startswith("CommentAdded"):
+        return [(args["commenter"], "comments", ("comment", args["entryId"], args["contentHash"], args["timestamp"]),
+                 f"🗣️ Commented on journal #{args['entryId']}: {html.escape(snippet(args['contentHash']))} - /viewjournal {args['entryId']}")]
+    if name.startswith("LocationPurchased"):
+        return [(args["buyer"], "purchases", ("purchase", args["locationId"]),
+                 f"🪙 Bought climb #{args['locationId']} - /viewclimb {args['locationId']}")]
+    if name == "ToursPurchased":
+        return [(args["buyer"], "purchases", None, f"🪙 Bought {args['toursAmount'] / 10**18} $TOURS for {args['monAmount'] / 10**18} $MON")]
+    if name.startswith("ProfileCreated"):
+        return [(args["user"], "profile", ("profile",), "🧗 Created your EmpowerTours profile")]
+    if name == "FarcasterProfileUpdated":
+        return [(args["user"], "profile", None, f"🧗 Updated your Farcaster profile ({html.escape(args['newUsername'])})")]
+    if name == "FarcasterCastShared":
+        return [(args["user"], "profile", None, f"📣 Shared {html.escape(args['contentType'])} #{args['contentId']} on Farcaster")]
+    if name == "TournamentCreatedEmbedded":
+        return [(args["creator"], "tournaments", ("created", args["tournamentId"]),
+                 f"🏆 Created tournament #{args['tournamentId']} {html.escape(args['tournamentName'])} ({args['entryFee'] / 10**18} $TOURS entry)")]
+    if name.startswith("TournamentJoined"):
+        return [(args["participant"], "tournaments", ("joined", args["tournamentId"]), f"🏆 Joined tournament #{args['tournamentId']}")]
+    if name == "TournamentEndedEnhanced":
+        return [(args["winner"], "tournaments", ("won", args["tournamentId"]), f"🥇 Won tournament #{args['tournamentId']} ({args['pot'] / 10**18} $TOURS)")]
+    return []  # TournamentCreated, TournamentEnded and OwnershipTransferred name no wallet to file them under
+
+class Activity:
+    __slots__ = ("kind", "line", "timestamp")
+
+    def __init__(self, kind, line, timestamp):
+        self.kind = kind
+        self.line = line
+        self.timestamp = timestamp
+
+    def render(self):
+        when = f" ({datetime.fromtimestamp(self.timestamp).strftime('%Y-%m-%d %H:%M')})" if self.timestamp else ""
+        return self.line + when
+
+class ActivityIndex:
+    # Every contract event filed under the wallets it involves, in chain order (block number, log index), with one
+    # timeline per wallet and one per wallet and kind, so a filtered page is a slice of an already ordered list.
+    # Adding is idempotent, so a history backfill and the live event monitor can overlap.
+    def __init__(self):
+        self.timelines = {}   # wallet -> {None or kind: [(block, log index, Activity)]}
+        self.identities = {}  # wallet -> {identity: Activity}
+        self.positions = set()  # (block, log index) of every event already filed
+
+    def __len__(self):
+        return len(self.timelines)
+
+    def add(self, name, args, block, log_index):
+        if (block, log_index) in self.positions:
+            return
+        self.positions.add((block, log_index))
+        for wallet, kind, identity, line in describe(name, args):
+            if identity is not None:
+                seen = self.identities.setdefault(wallet, {})
+                if identity in seen:
+                    if not name.endswith("Enhanced") and not name.endswith("Embedded"):
+                        continue
+                    seen[identity].line = line  # the Enhanced twin says more about the same action
+                    continue
+            activity = Activity(kind, line, args.get("timestamp"))
+            if identity is not None:
+                seen[identity] = activity
+            timelines = self.timelines.setdefault(wallet, {})
+            for key in (None, kind):
+                insort(timelines.setdefault(key, []), (block, log_index, activity))
+
+    def count(self, wallet, kind=None):
+        return len(self.timelines.get(wallet, {}).get(kind, ()))
+
+    def page(self, wallet, kind=None, page=1, per_page=10):
+        # -> ([Activity] newest first on that 1-based page, number of pages)
+        timeline = self.timelines.get(wallet, {}).get(kind, [])
+        pages = max(1, -(-len(timeline) // per_page))
+        end = len(timeline) - (page - 1) * per_page
+        return [activity for _, _, activity in reversed(timeline[max(0, end - per_page):max(0, end)])], pages
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, JSONResponse, StreamingResponse
 from socketio import AsyncServer, ASGIApp
 from pydantic import BaseModel
 import sqlite3
@@ -6,11 +7,18 @@ import json
 import uuid
 import logging
 import aiohttp
-from web3 import Web3
+from web3 import Web3, AsyncWeb3
+from eth_abi import encode as abi_encode
 from dotenv import load_dotenv
 import os
-from contract import broadcast_transaction
+from contract import broadcast_transaction, get_climbing_locations, CLIMB_CHUNK_SIZE
+from rpc import MultiEndpointProvider
+from receipts import ReceiptTracker
+from db import AsyncSQLite
+from migrations import migrate
+from codec import make_codec
 import time  # For expiry
+import asyncio
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -19,89 +27,47 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 MONAD_RPC_URL = os.getenv("MONAD_RPC_URL")
+MONAD_RPC_URLS = [url.strip() for url in os.getenv("MONAD_RPC_URLS", MONAD_RPC_URL or "").split(",") if url.strip()]
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
 TOURS_TOKEN_ADDRESS = os.getenv("TOURS_TOKEN_ADDRESS")
 WALLET_CONNECT_PROJECT_ID = os.getenv("WALLET_CONNECT_PROJECT_ID")
 BOT_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_HANDLE = "@empowertourschat"
 EXPIRY_SECONDS = 1800  # 30 minutes
+TRANSFER_SELECTOR = "0xa9059cbb"  # transfer(address,uint256)
+FIND_CLIMBS_PAGE_SIZE = 100
+FIND_CLIMBS_MAX_PAGE = 500
 
 # Initialize Web3
 w3 = Web3(Web3.HTTPProvider(MONAD_RPC_URL))
+# Async client for receipt tracking so confirmations never block the event loop
+async_w3 = AsyncWeb3(MultiEndpointProvider(MONAD_RPC_URLS)) if MONAD_RPC_URLS else None
+receipt_tracker = ReceiptTracker(async_w3) if async_w3 else None
 
 # Initialize FastAPI and SocketIO
 app = FastAPI()
 sio = AsyncServer(async_mode='asgi', cors_allowed_origins="*")
 app.mount("/socket.io", ASGIApp(sio))
 
-# Initialize SQLite database
-conn = sqlite3.connect('empowertours.db')
-cursor = conn.cursor()
-
-# Existing tables
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS sessions (
-        user_id TEXT PRIMARY KEY,
-        session_id TEXT,
-        wallet_address TEXT,
-        connected_at INTEGER  -- Timestamp for expiry
-    )
-''')
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pending_txs (
-        user_id TEXT,
-        tx_type TEXT,
-        tx_data TEXT,
-        name TEXT,
-        difficulty TEXT,
-        latitude INTEGER,
-        longitude INTEGER,
-        photo_hash TEXT,
-        location_id INTEGER,
-        tournament_id INTEGER,
-        UNIQUE(user_id, tx_type)  -- Prevent duplicates
-    )
-''')
-
-# New tables for features
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS climbs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        creator_user_id TEXT,
-        title TEXT,
-        description TEXT,
-        picture_url TEXT,  -- Encrypted
-        location TEXT,     -- Encrypted (JSON: {'lat': float, 'lon': float})
-        price_tours INTEGER,
-        created_at INTEGER
-    )
-''')
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS purchases (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        climb_id INTEGER,
-        buyer_user_id TEXT,
-        purchased_at INTEGER
-    )
-''')
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS journals (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        climb_id INTEGER,
-        user_id TEXT,
-        entry_text TEXT,
-        date INTEGER
-    )
-''')
-conn.commit()
-
-# Simple encryption (XOR with key; replace with better e.g., cryptography.fernet)
+# Initialize SQLite database: WAL, one connection per worker thread, batched commits.
+# Tables and indexes are created by the versioned migrations in migrations.py.
+db = AsyncSQLite('empowertours.db')
+db.setup(migrate)
+
+@app.on_event("shutdown")
+async def close_database():
+    # Waits for queued writes to commit before the worker connections close
+    await db.close()
+
+# Field encryption: the legacy XOR format (whole-buffer codec in codec.py), or AES-GCM for new
+# writes when FIELD_AEAD_KEY is set; XOR-encoded rows stay readable either way
 ENCRYPT_KEY = b'secret_key'  # Use env var in prod
+field_codec = make_codec(ENCRYPT_KEY, os.getenv("FIELD_AEAD_KEY"))
 def encrypt(data: str) -> str:
-    return ''.join(chr(ord(c) ^ ENCRYPT_KEY[i % len(ENCRYPT_KEY)]) for i, c in enumerate(data))
+    return field_codec.encode(data)
 
 def decrypt(data: str) -> str:
-    return encrypt(data)  # XOR is symmetric
+    return field_codec.decode(data)
 
 class ConnectRequest(BaseModel):
     user_id: str
@@ -143,11 +109,10 @@ class JournalRequest(BaseModel):
 async def connect_wallet(request: ConnectRequest):
     try:
         session_id = str(uuid.uuid4())
-        cursor.execute(
+        await db.execute(
             "INSERT OR REPLACE INTO sessions (user_id, session_id, wallet_address, connected_at) VALUES (?, ?, ?, ?)",
             (request.user_id, session_id, None, int(time.time()))
         )
-        conn.commit()
         return {"session_id": session_id}
     except Exception as e:
         logger.error(f"Error in /connect: {str(e)}")
@@ -157,16 +122,14 @@ async def connect_wallet(request: ConnectRequest):
 async def set_wallet(request: WalletRequest):
     try:
         # Check if already connected and not expired
-        cursor.execute("SELECT connected_at FROM sessions WHERE user_id = ?", (request.telegramUserId,))
-        row = cursor.fetchone()
-        if row and time.time() - row[0] < EXPIRY_SECONDS:
+        connected_at = await db.fetchval("SELECT connected_at FROM sessions WHERE user_id = ?", (request.telegramUserId,))
+        if connected_at and time.time() - connected_at < EXPIRY_SECONDS:
             return {"status": "already_connected"}
 
-        cursor.execute(
+        await db.execute(
             "UPDATE sessions SET wallet_address = ?, connected_at = ? WHERE user_id = ?",
             (request.walletAddress, int(time.time()), request.telegramUserId)
         )
-        conn.commit()
         async with aiohttp.ClientSession() as session:
             await session.post(
                 f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage",
@@ -185,16 +148,14 @@ async def set_wallet(request: WalletRequest):
 async def sign_transaction(request: SignRequest):
     try:
         # Prevent double: Check pending
-        cursor.execute("SELECT 1 FROM pending_txs WHERE user_id = ?", (request.user_id,))
-        if cursor.fetchone():
+        if await db.fetchone("SELECT 1 FROM pending_txs WHERE user_id = ?", (request.user_id,)):
             raise HTTPException(status_code=400, detail="Transaction already pending")
 
         # Insert pending (assuming tx_data includes all fields)
-        cursor.execute(
+        await db.execute(
             "INSERT INTO pending_txs (user_id, tx_type, tx_data) VALUES (?, ?, ?)",
             (request.user_id, 'transfer', json.dumps(request.tx_data))  # Simplify; add fields as needed
         )
-        conn.commit()
 
         await sio.emit('sign_tx', {
             'user_id': request.user_id,
@@ -211,16 +172,14 @@ async def sign_transaction(request: SignRequest):
 async def broadcast_transaction_endpoint(request: BroadcastRequest):
     try:
         # Check connection expiry
-        cursor.execute("SELECT connected_at FROM sessions WHERE user_id = ?", (request.telegramUserId,))
-        row = cursor.fetchone()
-        if not row or time.time() - row[0] > EXPIRY_SECONDS:
+        session_row = await db.fetchone("SELECT connected_at, wallet_address FROM sessions WHERE user_id = ?", (request.telegramUserId,))
+        if not session_row or time.time() - session_row[0] > EXPIRY_SECONDS:
             raise HTTPException(status_code=401, detail="Session expired; reconnect wallet")
 
-        cursor.execute(
+        pending_tx = await db.fetchone(
             "SELECT tx_type, name, difficulty, location_id, tournament_id FROM pending_txs WHERE user_id = ? ORDER BY ROWID DESC LIMIT 1",
             (request.telegramUserId,)
         )
-        pending_tx = cursor.fetchone()
         if not pending_tx:
             raise HTTPException(status_code=404, detail="No pending transaction found")
         
@@ -229,7 +188,7 @@ async def broadcast_transaction_endpoint(request: BroadcastRequest):
             signed_tx_hex=request.signedTxHex,
             pending_tx={
                 'tx_type': tx_type,
-                'wallet_address': cursor.execute("SELECT wallet_address FROM sessions WHERE user_id = ?", (request.telegramUserId,)).fetchone()[0],
+                'wallet_address': session_row[1],
                 'name': name,
                 'difficulty': difficulty,
                 'location_id': location_id,
@@ -284,19 +243,22 @@ async def broadcast_transaction_endpoint(request: BroadcastRequest):
 async def submit_tx_hash(request: HashRequest):
     try:
         # Check expiry as above
-        cursor.execute("SELECT connected_at FROM sessions WHERE user_id = ?", (request.telegramUserId,))
-        row = cursor.fetchone()
-        if not row or time.time() - row[0] > EXPIRY_SECONDS:
+        session_row = await db.fetchone("SELECT connected_at, wallet_address FROM sessions WHERE user_id = ?", (request.telegramUserId,))
+        if not session_row or time.time() - session_row[0] > EXPIRY_SECONDS:
             raise HTTPException(status_code=401, detail="Session expired; reconnect wallet")
 
         # Confirm tx
-        receipt = w3.eth.wait_for_transaction_receipt(request.txHash, timeout=120)
+        if not receipt_tracker:
+            raise HTTPException(status_code=503, detail="Blockchain unavailable")
+        try:
+            receipt = await receipt_tracker.wait(request.txHash, timeout=120)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Transaction not mined yet; submit the hash again later")
         if receipt.status != 1:
             raise HTTPException(status_code=400, detail="Transaction failed")
 
         # Clear pending
-        cursor.execute("DELETE FROM pending_txs WHERE user_id = ?", (request.telegramUserId,))
-        conn.commit()
+        await db.execute("DELETE FROM pending_txs WHERE user_id = ?", (request.telegramUserId,))
 
         explorer_url = f"https://testnet.monadexplorer.com/tx/{request.txHash}"
         async with aiohttp.ClientSession() as session:
@@ -319,9 +281,12 @@ async def submit_tx_hash(request: HashRequest):
                     "parse_mode": "HTML"
                 }
             )
-            if not group_resp.json().get('ok'):
-                logger.error(f"Group notification failed: {group_resp.json()['description']}")
+            group_data = await group_resp.json()
+            if not group_data.get('ok'):
+                logger.error(f"Group notification failed: {group_data['description']}")
         return {"status": "success", "tx_hash": request.txHash}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in /submit_hash: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -333,54 +298,89 @@ async def build_climb(request: BuildClimbRequest):
     try:
         enc_picture = encrypt(request.picture_url)
         enc_location = encrypt(json.dumps(request.location))
-        cursor.execute(
+        climb_id, _ = await db.execute(
             "INSERT INTO climbs (creator_user_id, title, description, picture_url, location, price_tours, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
             (request.user_id, request.title, request.description, enc_picture, enc_location, request.price_tours, int(time.time()))
         )
-        conn.commit()
-        return {"status": "success", "climb_id": cursor.lastrowid}
+        return {"status": "success", "climb_id": climb_id}
     except Exception as e:
         logger.error(f"Error in /build_climb: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
 @app.get("/find_climbs")
-async def find_climbs():
+async def find_climbs(request: Request, since_id: int = 0, limit: int = FIND_CLIMBS_PAGE_SIZE):
     try:
-        cursor.execute("SELECT id, title, description, price_tours FROM climbs")
-        climbs = [{"id": row[0], "title": row[1], "desc": row[2], "price": row[3]} for row in cursor.fetchall()]
-        return {"climbs": climbs}
+        limit = max(1, min(limit, FIND_CLIMBS_MAX_PAGE))
+        # MAX(id) is read off the rowid b-tree and the counter is a primary-key read, so an unchanged
+        # catalogue costs this one query and an empty 304
+        max_id, version = await db.fetchone(
+            "SELECT (SELECT MAX(id) FROM climbs), version FROM table_versions WHERE name = 'climbs'"
+        )
+        headers = {"ETag": f'W/"climbs-{max_id or 0}-{version}-{since_id}-{limit}"', "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        # Keyset page: the next one starts after the last id returned, so deep pages cost the same as the first
+        rows = await db.fetchall(
+            "SELECT id, title, description, price_tours FROM climbs WHERE id > ? ORDER BY id LIMIT ?",
+            (since_id, limit)
+        )
+        climbs = [{"id": row[0], "title": row[1], "desc": row[2], "price": row[3]} for row in rows]
+        next_since_id = climbs[-1]["id"] if len(climbs) == limit and climbs[-1]["id"] < (max_id or 0) else None
+        return JSONResponse({"climbs": climbs, "next_since_id": next_since_id}, headers=headers)
     except Exception as e:
         logger.error(f"Error in /find_climbs: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/climbing_locations")
+async def climbing_locations(chunk_size: int = CLIMB_CHUNK_SIZE):
+    # On-chain climbs as NDJSON, one record per line; each chunk is written as soon as its RPC batch returns
+    chunk_size = max(1, min(chunk_size, 200))
+
+    async def lines():
+        async for chunk in get_climbing_locations(chunk_size=chunk_size):
+            yield "".join(json.dumps(record._asdict()) + "\n" for record in chunk)
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @app.post("/purchase_climb")
 async def purchase_climb(request: PurchaseClimbRequest):
     try:
         # Fetch climb
-        cursor.execute("SELECT creator_user_id, price_tours FROM climbs WHERE id = ?", (request.climb_id,))
-        row = cursor.fetchone()
+        row = await db.fetchone("SELECT creator_user_id, price_tours FROM climbs WHERE id = ?", (request.climb_id,))
         if not row:
             raise HTTPException(status_code=404, detail="Climb not found")
         creator_id, price = row
 
         # Build transfer tx to creator (similar to sendTours)
-        creator_wallet = cursor.execute("SELECT wallet_address FROM sessions WHERE user_id = ?", (creator_id,)).fetchone()[0]
+        creator_wallet, buyer_wallet = await asyncio.gather(
+            db.fetchval("SELECT wallet_address FROM sessions WHERE user_id = ?", (creator_id,)),
+            db.fetchval("SELECT wallet_address FROM sessions WHERE user_id = ?", (request.user_id,))
+        )
+        if not creator_wallet or not buyer_wallet:
+            raise HTTPException(status_code=409, detail="Creator and buyer must both have a connected wallet")
         tx_data = {
             "value": 0,
             "chainId": 10143,
-            "from": cursor.execute("SELECT wallet_address FROM sessions WHERE user_id = ?", (request.user_id,)).fetchone()[0],
+            "from": buyer_wallet,
             "to": TOURS_TOKEN_ADDRESS,
-            "data": w3.eth.contract(address=TOURS_TOKEN_ADDRESS).functions.transfer(creator_wallet, price * 10**18).build_transaction()['data']  # Assume 18 decimals
+            # transfer(address,uint256) encoded locally; build_transaction would block the loop on gas/fee RPCs
+            "data": TRANSFER_SELECTOR + abi_encode(["address", "uint256"], [Web3.to_checksum_address(creator_wallet), price * 10**18]).hex()  # Assume 18 decimals
         }
 
         # Insert pending purchase tx
-        cursor.execute(
+        await db.execute(
             "INSERT INTO pending_txs (user_id, tx_type, tx_data) VALUES (?, ?, ?)",
             (request.user_id, 'purchase_climb', json.dumps(tx_data))
         )
-        conn.commit()
 
         return {"status": "tx_built", "tx_data": tx_data}  # Frontend signs/broadcasts
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in /purchase_climb: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -389,15 +389,13 @@ async def purchase_climb(request: PurchaseClimbRequest):
 async def add_journal(request: JournalRequest):
     try:
         # Check purchase
-        cursor.execute("SELECT 1 FROM purchases WHERE climb_id = ? AND buyer_user_id = ?", (request.climb_id, request.user_id))
-        if not cursor.fetchone():
+        if not await db.fetchone("SELECT 1 FROM purchases WHERE climb_id = ? AND buyer_user_id = ?", (request.climb_id, request.user_id)):
             raise HTTPException(status_code=403, detail="Not purchased")
 
-        cursor.execute(
+        await db.execute(
             "INSERT INTO journals (climb_id, user_id, entry_text, date) VALUES (?, ?, ?, ?)",
             (request.climb_id, request.user_id, request.entry_text, int(time.time()))
         )
-        conn.commit()
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Error in /add_journal: {str(e)}")
@@ -407,11 +405,12 @@ async def add_journal(request: JournalRequest):
 async def get_climb(climb_id: int, user_id: str):
     try:
         # Check purchase for full details
-        cursor.execute("SELECT 1 FROM purchases WHERE climb_id = ? AND buyer_user_id = ?", (climb_id, user_id))
-        purchased = bool(cursor.fetchone())
-
-        cursor.execute("SELECT title, description, picture_url, location FROM climbs WHERE id = ?", (climb_id,))
-        row = cursor.fetchone()
+        # Independent reads, so they run on two worker connections at once
+        purchase, row = await asyncio.gather(
+            db.fetchone("SELECT 1 FROM purchases WHERE climb_id = ? AND buyer_user_id = ?", (climb_id, user_id)),
+            db.fetchone("SELECT title, description, picture_url, location FROM climbs WHERE id = ?", (climb_id,))
+        )
+        purchased = bool(purchase)
         if not row:
             raise HTTPException(status_code=404, detail="Climb not found")
 
@@ -421,6 +420,8 @@ async def get_climb(climb_id: int, user_id: str):
             data["location"] = json.loads(decrypt(row[3]))
 
         return data
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in /get_climb: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
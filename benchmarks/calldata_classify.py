@@ -0,0 +1,92 @@
+# Compare the CalldataCodec selector table with the string checks it replaced.
+#
+#   python benchmarks/calldata_classify.py --iterations 200000
+#
+# "substring" is the old handle_tx_hash chain ("createProfile" in data ...), which never matches hex
+# calldata; "startswith" is the old /submit_tx chain of hand-written selector literals plus manual slicing.
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.CRITICAL)  # main logs its configuration on import
+from web3 import Web3  # noqa: E402
+from main import CONTRACT_ABI, TOURS_ABI  # noqa: E402
+from calldata import CalldataCodec  # noqa: E402
+
+ADDRESS = "0x000000000000000000000000000000000000dEaD"
+
+def sample_calldata():
+    w3 = Web3()
+    contract = w3.eth.contract(address=ADDRESS, abi=CONTRACT_ABI)
+    tours = w3.eth.contract(address=ADDRESS, abi=TOURS_ABI)
+    return [
+        ("createProfile", contract.encodeABI(fn_name="createProfile", args=[])),
+        ("buyTours", contract.encodeABI(fn_name="buyTours", args=[25 * 10**18])),
+        ("transfer", tours.encodeABI(fn_name="transfer", args=[ADDRESS, 3 * 10**18])),
+        ("approve", tours.encodeABI(fn_name="approve", args=[ADDRESS, 10 * 10**18])),
+        ("purchaseClimbingLocation", contract.encodeABI(fn_name="purchaseClimbingLocation", args=[42])),
+        ("createClimbingLocation", contract.encodeABI(fn_name="createClimbingLocation", args=["Midnight Lightning", "V8", 37746000, -119533000, "QmPhotoHash"])),
+        ("addJournalEntryWithDetails", contract.encodeABI(fn_name="addJournalEntryWithDetails", args=["QmContent", "Yosemite", "5.12a", False, ""])),
+    ]
+
+def substring(data):
+    if "createProfile" in data:
+        return "createProfile", None
+    elif "buyTours" in data:
+        return "buyTours", int.from_bytes(bytes.fromhex(data[10:]), byteorder='big') / 10**18
+    elif "transfer" in data:
+        return "transfer", None
+    elif "createClimbingLocation" in data:
+        return "createClimbingLocation", None
+    return None, None
+
+def startswith(data):
+    if data.startswith('0x00547664'):
+        return "createProfile", None
+    elif data.startswith('0x9954e40d'):
+        return "buyTours", int.from_bytes(bytes.fromhex(data[10:]), byteorder='big') / 10**18
+    elif data.startswith('0xa9059cbb'):
+        return "transfer", None
+    elif data.startswith('0xfe985ae0'):
+        return "createClimbingLocation", None
+    elif data.startswith('0x6b8b0b0a'):
+        return "addJournalEntryWithDetails", None
+    elif data.startswith('0xd2494431'):
+        return "purchaseClimbingLocation", int.from_bytes(bytes.fromhex(data[10:]), 'big')
+    return None, None
+
+def run(label, classify, workload, expected):
+    start = time.perf_counter()
+    for data in workload:
+        classify(data)
+    elapsed = time.perf_counter() - start
+    correct = sum(classify(data)[0] == name for name, data in expected)
+    print(f"{label:<12} {elapsed / len(workload) * 1e9:8.0f} ns/tx   correctly classified {correct}/{len(expected)}")
+
+def main(args):
+    samples = sample_calldata()
+    random.seed(1)
+    workload = [random.choice(samples)[1] for _ in range(args.iterations)]
+    codec = CalldataCodec(contract=CONTRACT_ABI, tours=TOURS_ABI)
+
+    def classify_only(data):
+        return codec.classify(data), None
+
+    def decode(data):
+        call = codec.decode(data)
+        return (call.name, call.args) if call else (None, None)
+
+    print(f"{len(codec.table)} selectors, {args.iterations} calls over {len(samples)} functions")
+    run("substring", substring, workload, samples)
+    run("startswith", startswith, workload, samples)
+    run("classify", classify_only, workload, samples)
+    run("decode", decode, workload, samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200000)
+    main(parser.parse_args())
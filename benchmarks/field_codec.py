@@ -0,0 +1,54 @@
+# Compare the field codec with the per-character XOR loop it replaced in api.py.
+#
+#   python benchmarks/field_codec.py --iterations 20000
+#
+# Single fields: picture URL and location JSON as /get_climb stores them, plus a 4 KB field.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from codec import XorCodec, xor_translate  # noqa: E402
+
+KEY = b'secret_key'
+
+def per_character(data):
+    return ''.join(chr(ord(c) ^ KEY[i % len(KEY)]) for i, c in enumerate(data))
+
+def per_second(label, func, values, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for value in values:
+            func(value)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<14} {elapsed / (iterations * len(values)) * 1e6:8.2f} us/field")
+
+def sample_fields(rng, count):
+    fields = []
+    for i in range(count):
+        fields.append(per_character(f"https://gateway.pinata.cloud/ipfs/Qm{rng.getrandbits(200):x}"))
+        fields.append(per_character(json.dumps({"lat": rng.uniform(-90, 90), "lon": rng.uniform(-180, 180)})))
+    return fields
+
+def main(args):
+    codec = XorCodec(KEY)
+    tables = [bytes(b ^ k for b in range(256)) for k in KEY]
+    rng = random.Random(1)
+    stored = sample_fields(rng, 1)
+    large = per_character("".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(4096)))
+    assert all(codec.decode(value) == per_character(value) for value in stored + [large])
+
+    for label, values in (("picture url", stored[:1]), ("location json", stored[1:]), ("4 KB field", [large])):
+        print(f"{label} ({len(values[0])} chars)")
+        per_second("per-character", per_character, values, args.iterations)
+        per_second("translate", lambda v: xor_translate(v.encode("latin-1"), tables).decode("latin-1"), values, args.iterations)
+        per_second("int xor", codec.decode, values, args.iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args())
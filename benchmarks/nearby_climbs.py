@@ -0,0 +1,87 @@
+# Latency of /nearby lookups on geo.ClimbGrid against a scan over every climb.
+#
+#   python benchmarks/nearby_climbs.py --climbs 100000 --queries 2000 --k 5 --radius 50
+#
+# Climbs are grouped around --crags random crags (a few km across) plus a share scattered anywhere, the way
+# real climbing areas are; queries come from near a crag (a climber on a trip) or from anywhere.
+# Every grid answer is checked against the scan.
+import os
+import sys
+import time
+import random
+import argparse
+import math
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from geo import ClimbGrid, haversine_km  # noqa: E402
+
+def anywhere(rng):
+    # Uniform over the sphere's area (uniform latitude would crowd the poles)
+    return math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+
+def climbs(rng, args):
+    crags = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(args.crags)]
+    points = []
+    for _ in range(args.climbs):
+        if rng.random() < args.scattered:
+            points.append(anywhere(rng))
+            continue
+        lat, lon = rng.choice(crags)
+        points.append((max(-90.0, min(90.0, lat + rng.gauss(0, 0.03))), (lon + rng.gauss(0, 0.03) + 180) % 360 - 180))
+    return crags, points
+
+def queries(rng, crags, args):
+    out = []
+    for i in range(args.queries):
+        if i % 2:
+            out.append(anywhere(rng))
+        else:
+            lat, lon = rng.choice(crags)
+            out.append((max(-90.0, min(90.0, lat + rng.gauss(0, 0.3))), (lon + rng.gauss(0, 0.3) + 180) % 360 - 180))
+    return out
+
+def scan(points, lat, lon, k, radius_km):
+    hits = sorted((haversine_km(lat, lon, plat, plon), i) for i, (plat, plon) in enumerate(points))
+    return [hit for hit in hits if hit[0] <= radius_km][:k]
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {label:<12} median {median(samples) * 1e6:9.1f} us   p99 {p99 * 1e6:9.1f} us   max {samples[-1] * 1e6:9.1f} us")
+
+def main(args):
+    rng = random.Random(1)
+    crags, points = climbs(rng, args)
+    grid = ClimbGrid()
+    start = time.perf_counter()
+    for location_id, (lat, lon) in enumerate(points):
+        grid.add(location_id, lat, lon)
+    print(f"indexed {len(grid)} climbs in {time.perf_counter() - start:.2f}s ({args.crags} crags, {args.scattered:.0%} scattered)")
+
+    asked = queries(rng, crags, args)
+    grid_samples, scan_samples = [], []
+    for i, (lat, lon) in enumerate(asked):
+        start = time.perf_counter()
+        found = grid.nearest(lat, lon, args.k, args.radius)
+        grid_samples.append(time.perf_counter() - start)
+        if i % args.check_every:
+            continue
+        start = time.perf_counter()
+        expected = scan(points, lat, lon, args.k, args.radius)
+        scan_samples.append(time.perf_counter() - start)
+        assert [round(d, 6) for d, _, _ in found] == [round(d, 6) for d, _ in expected], (lat, lon)
+    print(f"\n{len(asked)} queries, k={args.k}, radius {args.radius} km")
+    report("grid", grid_samples)
+    report("full scan", scan_samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--climbs", type=int, default=100000)
+    parser.add_argument("--crags", type=int, default=2000)
+    parser.add_argument("--scattered", type=float, default=0.1, help="share of climbs placed anywhere on the globe")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--radius", type=float, default=50.0, help="km")
+    parser.add_argument("--check-every", type=int, default=50, help="verify every Nth query against the full scan")
+    main(parser.parse_args())
@@ -0,0 +1,110 @@
+# Exercise MultiEndpointProvider against two local JSON-RPC stand-ins with injected latency.
+#
+#   python benchmarks/rpc_failover.py --fast-ms 20 --slow-ms 250 --stall-every 25 --stall-ms 800
+#
+# Phase 1: reads should settle on the fast node, with hedges to the slow one when the fast node stalls.
+# Phase 2: the fast node goes down; reads and the sticky write/nonce path must fail over.
+import os
+import sys
+import time
+import json
+import random
+import asyncio
+import argparse
+from collections import Counter
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web3 import AsyncWeb3  # noqa: E402
+from rpc import MultiEndpointProvider  # noqa: E402
+
+RESULTS = {
+    "eth_blockNumber": "0x1b4",
+    "eth_chainId": "0x279f",
+    "eth_getTransactionCount": "0x7",
+    "eth_getBalance": "0xde0b6b3a7640000",
+    "web3_clientVersion": "standin/1.0",
+}
+
+class StandIn:
+    def __init__(self, name, latency_ms, jitter_ms=0, stall_every=0, stall_ms=0):
+        self.name = name
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.stall_every = stall_every
+        self.stall = stall_ms / 1000
+        self.served = Counter()
+        self.down = False
+        self.requests = 0
+
+    async def handle(self, request):
+        if self.down:
+            raise web.HTTPServiceUnavailable()
+        body = json.loads(await request.read())
+        self.requests += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if self.stall_every and self.requests % self.stall_every == 0:
+            delay += self.stall
+        await asyncio.sleep(delay)
+        self.served[body["method"]] += 1
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": RESULTS.get(body["method"], "0x0")})
+
+async def start(standin, port):
+    app = web.Application()
+    app.router.add_post("/", standin.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+async def timed_reads(w3, n):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await w3.eth.block_number
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def report(label, latencies, fast, slow):
+    print(f"{label}: n={len(latencies)} p50={percentile(latencies, 0.5) * 1000:.1f}ms "
+          f"p95={percentile(latencies, 0.95) * 1000:.1f}ms p99={percentile(latencies, 0.99) * 1000:.1f}ms "
+          f"| fast served {sum(fast.served.values())}, slow served {sum(slow.served.values())}")
+
+async def main(args):
+    fast = StandIn("fast", args.fast_ms, args.jitter_ms, args.stall_every, args.stall_ms)
+    slow = StandIn("slow", args.slow_ms, args.jitter_ms)
+    runners = [await start(fast, args.port), await start(slow, args.port + 1)]
+    # Slow node first on purpose: routing must discover the fast one from latency, not list order
+    provider = MultiEndpointProvider([f"http://127.0.0.1:{args.port + 1}", f"http://127.0.0.1:{args.port}"])
+    w3 = AsyncWeb3(provider)
+    try:
+        report("phase 1 (both up)", await timed_reads(w3, args.requests), fast, slow)
+        nonce = await w3.eth.get_transaction_count("0x000000000000000000000000000000000000dEaD")
+        print(f"sticky nonce read -> {nonce} via {provider.sticky.url}")
+
+        fast.down = True
+        fast.served.clear()
+        slow.served.clear()
+        report("phase 2 (fast down)", await timed_reads(w3, args.requests // 4), fast, slow)
+        nonce = await w3.eth.get_transaction_count("0x000000000000000000000000000000000000dEaD")
+        print(f"sticky nonce read after failover -> {nonce} via {provider.sticky.url}")
+        print(json.dumps(provider.status(), indent=2))
+    finally:
+        await provider.disconnect()
+        for runner in runners:
+            await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18545)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--fast-ms", type=float, default=20)
+    parser.add_argument("--slow-ms", type=float, default=250)
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--stall-every", type=int, default=25)
+    parser.add_argument("--stall-ms", type=float, default=800)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+# Lookup latency of api.py's hot queries on a seeded empowertours.db, before and after the index migration.
+#
+#   python benchmarks/sqlite_indexes.py --purchases 1000000 --lookups 2000
+#
+# "before" is the schema at migration 2 (tables only), "after" applies the remaining migrations on the same data.
+# The database is written to a temporary directory and removed afterwards unless --keep is given.
+import os
+import sys
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from migrations import migrate, LATEST_VERSION  # noqa: E402
+
+BEFORE_VERSION = 2  # tables only; migration 3 adds the indexes
+
+QUERIES = {
+    "purchase check": "SELECT 1 FROM purchases WHERE climb_id = ? AND buyer_user_id = ?",
+    "session expiry": "SELECT connected_at, wallet_address FROM sessions WHERE user_id = ?",
+    "latest pending": "SELECT tx_type, name, difficulty, location_id, tournament_id FROM pending_txs WHERE user_id = ? ORDER BY ROWID DESC LIMIT 1",
+}
+
+def seed(conn, args):
+    rng = random.Random(1)
+    now = int(time.time())
+    start = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO sessions (user_id, session_id, wallet_address, connected_at) VALUES (?, ?, ?, ?)",
+        ((str(u), f"s{u}", f"0x{u:040x}", now) for u in range(args.users))
+    )
+    conn.executemany(
+        "INSERT INTO climbs (creator_user_id, title, description, picture_url, location, price_tours, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((str(rng.randrange(args.users)), f"Climb {c}", "", "", "", 10, now) for c in range(args.climbs))
+    )
+    conn.executemany(
+        "INSERT INTO purchases (climb_id, buyer_user_id, purchased_at) VALUES (?, ?, ?)",
+        ((rng.randrange(1, args.climbs + 1), str(rng.randrange(args.users)), now) for _ in range(args.purchases))
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO pending_txs (user_id, tx_type, tx_data) VALUES (?, ?, ?)",
+        ((str(rng.randrange(args.users)), rng.choice(("approve_tours", "purchase_climbing_location", "join_tournament")), "{}") for _ in range(args.pending))
+    )
+    conn.commit()
+    print(f"seeded {args.users} sessions, {args.climbs} climbs, {args.purchases} purchases, {args.pending} pending txs in {time.perf_counter() - start:.1f}s")
+
+def params_for(name, rng, args):
+    user = str(rng.randrange(args.users))
+    if name == "purchase check":
+        return (rng.randrange(1, args.climbs + 1), user)
+    return (user,)
+
+def measure(conn, args, label):
+    print(f"\n{label} (schema version {conn.execute('PRAGMA user_version').fetchone()[0]})")
+    for name, sql in QUERIES.items():
+        plan = " / ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params_for(name, random.Random(0), args)))
+        rng = random.Random(2)
+        lookups = args.lookups if "SCAN" not in plan else max(1, args.lookups // args.scan_divisor)
+        samples = []
+        for _ in range(lookups):
+            params = params_for(name, rng, args)
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchone()
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"  {name:<15} median {median(samples) * 1e6:10.1f} us   p99 {p99 * 1e6:10.1f} us   ({lookups} lookups)  {plan}")
+
+def main(args):
+    directory = tempfile.mkdtemp(prefix="empowertours-bench-")
+    path = os.path.join(directory, "empowertours.db")
+    try:
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        migrate(conn, target=BEFORE_VERSION)
+        seed(conn, args)
+        measure(conn, args, "before")
+        start = time.perf_counter()
+        migrate(conn)
+        print(f"\nmigrations {BEFORE_VERSION + 1}-{LATEST_VERSION} took {time.perf_counter() - start:.1f}s")
+        measure(conn, args, "after")
+        conn.close()
+    finally:
+        if args.keep:
+            print(f"\ndatabase kept at {path}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--purchases", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--climbs", type=int, default=5000)
+    parser.add_argument("--pending", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--scan-divisor", type=int, default=20, help="full-scan queries run lookups / scan-divisor times")
+    parser.add_argument("--keep", action="store_true")
+    main(parser.parse_args())
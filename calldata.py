@@ -0,0 +1,123 @@
+import logging
+from functools import lru_cache
+from typing import NamedTuple
+from eth_abi import decode as abi_decode
+from eth_utils import keccak, to_checksum_address
+
+logger = logging.getLogger(__name__)
+
+class DecodedCall(NamedTuple):
+    target: str  # which ABI the selector came from, e.g. "contract" or "tours"
+    name: str
+    args: dict
+    values: tuple  # positional, ready for contract.functions[name](*values)
+
+class FunctionSpec:
+    __slots__ = ("target", "name", "selector", "types", "names", "signature", "decode_values")
+
+    def __init__(self, target, entry):
+        self.target = target
+        self.name = entry["name"]
+        self.types = tuple(collapse_type(param) for param in entry.get("inputs", []))
+        self.names = tuple(param.get("name") or f"arg{i}" for i, param in enumerate(entry.get("inputs", [])))
+        self.signature = f"{self.name}({','.join(self.types)})"
+        self.selector = keccak(text=self.signature)[:4]
+        self.decode_values = self.word_decoder() or self.abi_decoder()
+
+    def word_decoder(self):
+        # Single-word statics and string/bytes (everything this contract's ABI uses) decode by slicing the
+        # head words and following tail offsets; arrays and tuples fall back to eth_abi
+        readers = []
+        for t in self.types:
+            if t == "address":
+                readers.append(lambda body, word: checksum(word[12:]))
+            elif t == "bool":
+                readers.append(lambda body, word: word[31] == 1)
+            elif t == "bytes32":
+                readers.append(lambda body, word: bytes(word))
+            elif t.startswith("uint") and t[4:].isdigit():
+                readers.append(lambda body, word: int.from_bytes(word, "big"))
+            elif t.startswith("int") and t[3:].isdigit():
+                readers.append(lambda body, word: int.from_bytes(word, "big", signed=True))
+            elif t == "bytes":
+                readers.append(read_tail)
+            elif t == "string":
+                readers.append(lambda body, word: read_tail(body, word).decode("utf-8"))
+            else:
+                return None
+        size = 32 * len(readers)
+
+        def decode(body):
+            if len(body) < size:
+                raise ValueError(f"Calldata for {self.signature} is {len(body)} bytes, expected at least {size}")
+            return tuple(read(body, body[32 * i:32 * i + 32]) for i, read in enumerate(readers))
+        return decode
+
+    def abi_decoder(self):
+        types = list(self.types)
+        return lambda body: tuple(abi_decode(types, body))
+
+@lru_cache(maxsize=4096)
+def checksum(raw):
+    # Checksumming costs a keccak per call; the same spender/recipient addresses recur constantly
+    return to_checksum_address(raw)
+
+def read_tail(body, word):
+    offset = int.from_bytes(word, "big")
+    length = int.from_bytes(body[offset:offset + 32], "big")
+    if offset + 32 + length > len(body):
+        raise ValueError("Calldata tail runs past the end of the input")
+    return body[offset + 32:offset + 32 + length]
+
+def collapse_type(param):
+    # Tuples are spelled out as (t1,t2,...) in the canonical signature
+    t = param["type"]
+    if t.startswith("tuple"):
+        return f"({','.join(collapse_type(c) for c in param['components'])}){t[5:]}"
+    return t
+
+class CalldataCodec:
+    # Selector table built once from the ABIs; classifying calldata is one dict lookup on its first 4 bytes
+    def __init__(self, **abis):
+        self.table = {}
+        for target, abi in abis.items():
+            for entry in abi:
+                if entry.get("type") != "function":
+                    continue
+                spec = FunctionSpec(target, entry)
+                existing = self.table.get(spec.selector)
+                if existing:
+                    logger.warning(f"Selector 0x{spec.selector.hex()} of {target}.{spec.signature} collides with {existing.target}.{existing.signature}, keeping the first")
+                    continue
+                self.table[spec.selector] = spec
+        self.by_name = {(spec.target, spec.name): spec for spec in self.table.values()}
+        # Same table keyed by "0x" + 8 hex digits, so hex calldata is classified without converting it
+        self.by_hex = {"0x" + selector.hex(): spec for selector, spec in self.table.items()}
+
+    def selector(self, target, name):
+        return "0x" + self.by_name[(target, name)].selector.hex()
+
+    def spec(self, data):
+        if isinstance(data, str):
+            return self.by_hex.get(data[:10].lower())
+        return self.table.get(bytes(data[:4])) if data else None
+
+    def classify(self, data):
+        # Name only, no argument decoding
+        spec = self.spec(data)
+        return spec.name if spec else None
+
+    def decode(self, data):
+        spec = self.spec(data)
+        if spec is None:
+            return None
+        values = spec.decode_values(as_bytes(data)[4:])
+        return DecodedCall(spec.target, spec.name, dict(zip(spec.names, values)), values)
+
+def as_bytes(data):
+    # Accepts the hex strings build_transaction produces as well as HexBytes from get_transaction
+    if not data:
+        return b""
+    if isinstance(data, str):
+        return bytes.fromhex(data[2:] if data[:2] in ("0x", "0X") else data)
+    return bytes(data)
@@ -0,0 +1,201 @@
+import sys
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional: filters fall back to a loop over the same columns
+    np = None
+
+from grades import parse_grade
+
+SORTS = ("id", "newest", "popular")
+
+def quarter(value):
+    # Grades are multiples of a quarter YDS letter; bucket keys are those quarters as integers
+    return int(round(value * 4))
+
+class ClimbCatalogue:
+    # Every climb as one row across typed columns instead of a pre-formatted string: integers live in
+    # array('q') buffers (NumPy reads them in place), names, difficulties and creators are interned so
+    # repeated values share one object, and difficulty is also kept as a small integer code for filtering.
+    # Rows are appended in arrival order and rewritten in place when a climb is seen again.
+    # Each difficulty is parsed once into a normalized grade (grades.py) and its rows sit in per-grade buckets,
+    # so a grade range reads only the buckets it covers, whatever system each climb was graded in.
+    __slots__ = (
+        "ids", "latitudes", "longitudes", "created", "purchases", "photos", "difficulty_codes",
+        "names", "difficulties", "creators", "codes", "rows", "explorer_url",
+        "grades", "grade_buckets", "grade_keys", "grade_spans",
+    )
+
+    def __init__(self, explorer_url=""):
+        self.ids = array("q")
+        self.latitudes = array("q")   # int256 microdegrees, as stored on chain
+        self.longitudes = array("q")
+        self.created = array("q")
+        self.purchases = array("q")
+        self.photos = array("b")
+        self.difficulty_codes = array("i")
+        self.names = []
+        self.difficulties = []  # one entry per code
+        self.creators = []
+        self.codes = {}  # difficulty -> code
+        self.rows = {}   # location_id -> row
+        self.explorer_url = explorer_url
+        self.grades = []  # one Grade (or None for free text) per code
+        self.grade_buckets = {"route": {}, "boulder": {}}  # discipline -> {quarter grade of the low end: {rows}}
+        self.grade_keys = {"route": [], "boulder": []}     # discipline -> sorted bucket keys
+        self.grade_spans = {"route": 0.0, "boulder": 0.0}  # discipline -> widest grade seen (high - low)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, location_id):
+        return location_id in self.rows
+
+    def code(self, difficulty):
+        difficulty = sys.intern(str(difficulty))
+        code = self.codes.get(difficulty)
+        if code is None:
+            code = self.codes[difficulty] = len(self.difficulties)
+            self.difficulties.append(difficulty)
+            grade = parse_grade(difficulty)
+            self.grades.append(grade)
+            if grade:
+                self.grade_spans[grade.discipline] = max(self.grade_spans[grade.discipline], grade.high - grade.low)
+        return code
+
+    def bucket(self, row, code, remove=False):
+        grade = self.grades[code]
+        if grade is None:
+            return
+        buckets, keys = self.grade_buckets[grade.discipline], self.grade_keys[grade.discipline]
+        key = quarter(grade.low)
+        if not remove:
+            if key not in buckets:
+                buckets[key] = set()
+                insort(keys, key)
+            buckets[key].add(row)
+            return
+        buckets[key].discard(row)
+        if not buckets[key]:
+            del buckets[key]
+            del keys[bisect_left(keys, key)]
+
+    def add(self, location_id, location):
+        # location is a climbingLocations() tuple:
+        # (creator, name, difficulty, latitude, longitude, photoHash, timestamp, fid, castHash, shared, purchaseCount)
+        values = (
+            location_id, location[3], location[4], location[6], location[10],
+            1 if location[5] else 0, self.code(location[2]),
+        )
+        columns = (self.ids, self.latitudes, self.longitudes, self.created, self.purchases, self.photos, self.difficulty_codes)
+        row = self.rows.get(location_id)
+        if row is None:
+            row = self.rows[location_id] = len(self.ids)
+            for column, value in zip(columns, values):
+                column.append(value)
+            self.names.append(sys.intern(location[1]))
+            self.creators.append(sys.intern(location[0]))
+            self.bucket(row, values[-1])
+            return
+        if self.difficulty_codes[row] != values[-1]:
+            self.bucket(row, self.difficulty_codes[row], remove=True)
+            self.bucket(row, values[-1])
+        for column, value in zip(columns, values):
+            column[row] = value
+        self.names[row] = sys.intern(location[1])
+        self.creators[row] = sys.intern(location[0])
+
+    def grade_rows(self, grade):
+        # Rows whose grade overlaps the Grade range, in row order. Buckets are keyed by each climb's low end, so
+        # the keys read run from the range's low end minus the widest grade seen up to its high end; only rows
+        # below the range's low end need their own high end checked
+        keys, buckets = self.grade_keys[grade.discipline], self.grade_buckets[grade.discipline]
+        low, high = quarter(grade.low), quarter(grade.high)
+        rows = []
+        for key in keys[bisect_left(keys, low - quarter(self.grade_spans[grade.discipline])):bisect_right(keys, high)]:
+            if key >= low:
+                rows.extend(buckets[key])
+                continue
+            rows.extend(row for row in buckets[key] if self.grades[self.difficulty_codes[row]].high >= grade.low)
+        rows.sort()
+        return rows
+
+    def query(self, difficulty=None, bbox=None, sort="id", limit=None, grade=None):
+        # -> row numbers matching every filter, in sort order. bbox is (south, west, north, east) in degrees;
+        # grade is a grades.Grade range; sort is "id", "newest" (timestamp, newest first) or "popular"
+        # (purchase count, highest first)
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort {sort!r}, expected one of {', '.join(SORTS)}")
+        code = None
+        if difficulty is not None:
+            code = self.codes.get(str(difficulty))
+            if code is None:
+                return []
+        rows = range(len(self.ids))
+        if grade is not None:
+            rows = self.grade_rows(grade)
+            if not rows:
+                return []
+        if np is not None and len(self.ids):
+            return self.query_numpy(rows, code, bbox, sort, limit)
+        if code is not None:
+            rows = [row for row in rows if self.difficulty_codes[row] == code]
+        if bbox is not None:
+            south, west, north, east = (int(round(value * 10**6)) for value in bbox)
+            rows = [
+                row for row in rows
+                if south <= self.latitudes[row] <= north and west <= self.longitudes[row] <= east
+            ]
+        if sort == "id":
+            key = self.ids.__getitem__
+        else:
+            column = self.created if sort == "newest" else self.purchases
+            key = lambda row: (-column[row], -self.ids[row])  # noqa: E731
+        return sorted(rows, key=key) if limit is None else heapq.nsmallest(limit, rows, key=key)
+
+    def query_numpy(self, rows, code, bbox, sort, limit):
+        # frombuffer views share memory with the arrays; they are rebuilt per query since appends may reallocate
+        rows = np.arange(len(self.ids)) if isinstance(rows, range) else np.array(rows, dtype=np.int64)
+        if code is not None:
+            rows = rows[np.frombuffer(self.difficulty_codes, dtype=np.int32)[rows] == code]
+        if bbox is not None:
+            south, west, north, east = (int(round(value * 10**6)) for value in bbox)
+            latitudes = np.frombuffer(self.latitudes, dtype=np.int64)[rows]
+            longitudes = np.frombuffer(self.longitudes, dtype=np.int64)[rows]
+            rows = rows[(latitudes >= south) & (latitudes <= north) & (longitudes >= west) & (longitudes <= east)]
+        ids = np.frombuffer(self.ids, dtype=np.int64)[rows]
+        if sort == "id":
+            order = np.argsort(ids, kind="stable")
+        else:
+            column = self.created if sort == "newest" else self.purchases
+            values = -np.frombuffer(column, dtype=np.int64)[rows]
+            if limit is not None and limit < len(rows):
+                # Only rows up to the limit-th value (ties included) can make the cut; sort just those
+                keep = np.flatnonzero(values <= np.partition(values, limit - 1)[limit - 1])
+                rows, ids, values = rows[keep], ids[keep], values[keep]
+            # lexsort sorts by its last key first: the column descending, then newest id first on ties
+            order = np.lexsort((-ids, values))
+        if limit is not None:
+            order = order[:limit]
+        return rows[order].tolist()
+
+    def render(self, row):
+        # The /findaclimb Markdown entry for one row
+        creator = self.creators[row]
+        photo_info = " (has photo)" if self.photos[row] else ""
+        latitude, longitude = self.latitudes[row] / 1000000, self.longitudes[row] / 1000000
+        return (
+            f"🧗 Climb ID: {self.ids[row]} - {self.names[row]}{photo_info} ({self.difficulties[self.difficulty_codes[row]]}) by [{creator[:6]}...]({self.explorer_url}/address/{creator})\n"
+            f"   Location: {latitude:.6f},{longitude:.6f}\n"
+            f"   Map: https://www.google.com/maps?q={latitude:.6f},{longitude:.6f}\n"
+            f"   Created: {datetime.fromtimestamp(self.created[row]).strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"   Purchases: {self.purchases[row]}"
+        )
+
+    def render_rows(self, rows):
+        return [self.render(row) for row in rows]
+
@@ -0,0 +1,93 @@
+import os
+import base64
+import logging
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # optional: AeadCodec needs it
+    AESGCM = None
+
+logger = logging.getLogger(__name__)
+
+AEAD_PREFIX = "gcm1:"
+
+def xor_int(data, mask):
+    # One big-integer XOR over the whole buffer; mask is at least len(data) bytes of the repeated key
+    n = len(data)
+    return (int.from_bytes(data, "little") ^ int.from_bytes(mask[:n], "little")).to_bytes(n, "little")
+
+def xor_translate(data, tables):
+    # One bytes.translate per key byte over a strided slice: position i uses tables[i % len(tables)]
+    out = bytearray(data)
+    step = len(tables)
+    for offset, table in enumerate(tables):
+        out[offset::step] = data[offset::step].translate(table)
+    return bytes(out)
+
+class XorCodec:
+    # The stored field format of api.py: every code point XORed with key[i % len(key)], kept as text.
+    # Strings whose code points all fit in a byte (URLs, JSON) are transformed as one latin-1 buffer;
+    # anything wider goes through UTF-32 with the key in the low byte of each code unit.
+    def __init__(self, key):
+        self.key = bytes(key)
+        if not self.key:
+            raise ValueError("XorCodec needs a non-empty key")
+        self.mask = self.key
+        self.wide_mask = b"".join(bytes((k, 0, 0, 0)) for k in self.key)
+
+    def masks(self, n):
+        # The repeated key is grown once and reused by every shorter field after it
+        if len(self.mask) < n:
+            self.mask = self.key * (n // len(self.key) + 1)
+        return self.mask
+
+    def apply(self, text):
+        try:
+            data = text.encode("latin-1")
+        except UnicodeEncodeError:
+            data = text.encode("utf-32-le", "surrogatepass")
+            repeats = len(data) // len(self.wide_mask) + 1
+            return xor_int(data, self.wide_mask * repeats).decode("utf-32-le", "surrogatepass")
+        return xor_int(data, self.masks(len(data))).decode("latin-1")
+
+    def encode(self, text):
+        return None if text is None else self.apply(text)
+
+    def decode(self, text):
+        return None if text is None else self.apply(text)
+
+class AeadCodec:
+    # AES-256-GCM per field, stored as "gcm1:" + base64(nonce + ciphertext). New writes are sealed; values
+    # without the prefix were written by XorCodec and are still read through it, so no backfill is needed.
+    def __init__(self, key, legacy=None):
+        if AESGCM is None:
+            raise RuntimeError("AeadCodec needs the cryptography package")
+        self.aead = AESGCM(key)
+        self.legacy = legacy
+
+    def encode(self, text):
+        if text is None:
+            return None
+        nonce = os.urandom(12)
+        sealed = self.aead.encrypt(nonce, text.encode("utf-8"), None)
+        return AEAD_PREFIX + base64.urlsafe_b64encode(nonce + sealed).decode("ascii")
+
+    def decode(self, text):
+        if text is None:
+            return None
+        if not text.startswith(AEAD_PREFIX):
+            if self.legacy is None:
+                raise ValueError("Field is not AEAD-sealed and no legacy codec is configured")
+            return self.legacy.decode(text)
+        raw = base64.urlsafe_b64decode(text[len(AEAD_PREFIX):])
+        return self.aead.decrypt(raw[:12], raw[12:], None).decode("utf-8")
+
+def make_codec(legacy_key, aead_key=None):
+    # aead_key is the urlsafe-base64 form of a 16/24/32-byte key (e.g. from FIELD_AEAD_KEY)
+    legacy = XorCodec(legacy_key)
+    if not aead_key:
+        return legacy
+    if AESGCM is None:
+        logger.warning("FIELD_AEAD_KEY is set but the cryptography package is not installed; fields stay XOR-encoded")
+        return legacy
+    return AeadCodec(base64.urlsafe_b64decode(aead_key), legacy=legacy)
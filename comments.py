@@ -0,0 +1,55 @@
+from bisect import insort
+
+class CommentIndex:
+    # Comment threads keyed by journal entry id, each kept in timestamp order. A thread is read from the contract
+    # once, the first time its entry is viewed, and then grows from CommentAdded* events; since one comment can
+    # arrive both ways, comments are deduplicated on (commenter, contentHash, timestamp). The count of a loaded
+    # thread is its length, and a page is a slice, so a view costs no RPC calls however long the thread gets.
+    def __init__(self):
+        self.threads = {}  # entry id -> [(timestamp, arrival, commenter, content)], oldest first
+        self.seen = {}     # entry id -> {(commenter, content, timestamp)}
+        self.loaded = set()
+        self.arrivals = 0  # keeps comments with equal timestamps in the order they were indexed
+
+    def __len__(self):
+        return len(self.loaded)
+
+    def __contains__(self, entry_id):
+        return entry_id in self.loaded
+
+    def begin(self, entry_id):
+        # Called before the comment count is read: from here on add() keeps events for this thread, so a comment
+        # mined while the load is in flight is not lost between the count and the event
+        self.threads.setdefault(entry_id, [])
+        self.seen.setdefault(entry_id, set())
+
+    def load(self, entry_id, comments, complete=True):
+        # comments are journalComments() tuples: (commenter, contentHash, timestamp, farcasterFid, farcasterCastHash).
+        # An incomplete load (some reads failed) is kept but not marked loaded, so the next view reads it again.
+        self.begin(entry_id)
+        for comment in comments:
+            self.add(entry_id, comment[0], comment[1], comment[2])
+        if complete:
+            self.loaded.add(entry_id)
+
+    def add(self, entry_id, commenter, content, timestamp):
+        # -> True if the comment was new. Threads never begun are left alone: their first load includes it
+        seen = self.seen.get(entry_id)
+        key = (commenter, content, timestamp)
+        if seen is None or key in seen:
+            return False
+        seen.add(key)
+        self.arrivals += 1
+        insort(self.threads[entry_id], (timestamp, self.arrivals, commenter, content))
+        return True
+
+    def count(self, entry_id):
+        thread = self.threads.get(entry_id)
+        return len(thread) if thread is not None else None
+
+    def page(self, entry_id, page, per_page):
+        # -> ([(commenter, content, timestamp)] on that 1-based page, number of pages)
+        thread = self.threads.get(entry_id, [])
+        pages = max(1, -(-len(thread) // per_page))
+        start = (page - 1) * per_page
+        return [(commenter, content, timestamp) for timestamp, _, commenter, content in thread[start:start + per_page]], pages
@@ -1,9 +1,18 @@
 import os
 import json
+from typing import NamedTuple
 import sqlite3
+import asyncio
 import logging
-from web3 import Web3
+from web3 import AsyncWeb3
 from web3.exceptions import ContractLogicError
+from eth_abi import decode as abi_decode
+from logs import CREATED_EVENTS, decode_events, created_entity_id
+from fees import FeeOracle, GasLimits, FALLBACK_MAX_FEE, FALLBACK_PRIORITY_FEE
+from rpc import MultiEndpointProvider
+from receipts import ReceiptTracker
+from migrations import migrate
+from codec import make_codec
 from dotenv import load_dotenv
 import time
 
@@ -14,6 +23,7 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 MONAD_RPC_URL = os.getenv("MONAD_RPC_URL", "https://testnet-rpc.monad.xyz")
+MONAD_RPC_URLS = [url.strip() for url in os.getenv("MONAD_RPC_URLS", MONAD_RPC_URL or "").split(",") if url.strip()]
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
 TOURS_TOKEN_ADDRESS = os.getenv("TOURS_TOKEN_ADDRESS")
 OWNER_ADDRESS = os.getenv("OWNER_ADDRESS")
@@ -22,21 +32,39 @@ API_BASE_URL = os.getenv("API_BASE_URL")
 CHAT_HANDLE = os.getenv("CHAT_HANDLE")
 EXPIRY_SECONDS = 1800  # 30 minutes for session expiry
 
-# Initialize Web3 with retry logic
+# Initialize Web3
 w3 = None
 contract = None
 tours_contract = None
+fee_oracle = None
+receipt_tracker = None
+FEE_REFRESH_SECONDS = float(os.getenv("FEE_REFRESH_SECONDS", "1"))
+CLIMB_CHUNK_SIZE = int(os.getenv("CLIMB_CHUNK_SIZE", "50"))
+# These two ran out of gas on estimate_gas * 1.2, so they start from a fixed limit until receipts refine it
+gas_limits = GasLimits({"addJournalEntry": 500000, "createClimbingLocation": 500000})
+TX_TYPE_FUNCTIONS = {
+    'create_profile': 'createProfile',
+    'journal_entry': 'addJournalEntry',
+    'add_comment': 'addComment',
+    'approve_tours': 'approve',
+    'create_climbing_location': 'createClimbingLocation',
+    'purchase_climbing_location': 'purchaseClimbingLocation',
+    'create_tournament': 'createTournament',
+    'join_tournament': 'joinTournament',
+    'end_tournament': 'endTournament',
+}
 
 def initialize_web3():
-    global w3, contract, tours_contract
-    retries = 3
-    for attempt in range(1, retries + 1):
-        try:
-            w3 = Web3(Web3.HTTPProvider(MONAD_RPC_URL, request_kwargs={'timeout': 10}))
-            if w3.is_connected():
-                logger.info("Successfully connected to Monad testnet")
-                # EmpowerTours contract ABI (as provided)
-                CONTRACT_ABI = [
+    global w3, contract, tours_contract, fee_oracle, receipt_tracker
+    if not MONAD_RPC_URLS:
+        logger.error("Cannot initialize Web3: no MONAD_RPC_URL(S) configured")
+        return
+    try:
+        # AsyncWeb3 connects lazily, so nothing here touches the network; the provider
+        # fails over between MONAD_RPC_URLS instead of retrying a single endpoint at import
+        w3 = AsyncWeb3(MultiEndpointProvider(MONAD_RPC_URLS))
+        # EmpowerTours contract ABI (as provided)
+        CONTRACT_ABI = [
     {
         "inputs": [
             {"internalType": "uint256", "name": "entryId", "type": "uint256"},
@@ -852,8 +880,8 @@ def initialize_web3():
     }
 ]
 
-                # ToursToken ABI
-                TOURS_ABI = [
+        # ToursToken ABI
+        TOURS_ABI = [
                     {
                         "constant": False,
                         "inputs": [
@@ -893,86 +921,51 @@ def initialize_web3():
                     }
                 ]
 
-                contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
-                tours_contract = w3.eth.contract(address=TOURS_TOKEN_ADDRESS, abi=TOURS_ABI)
-                break
-            else:
-                logger.warning(f"Connection attempt {attempt} failed. Retrying in 5 seconds...")
-                time.sleep(5)
-        except Exception as e:
-            logger.error(f"Error in initialize_web3 attempt {attempt}: {str(e)}")
-            if attempt < retries:
-                time.sleep(5)
-    if not w3:
-        logger.error("Failed to connect to Monad testnet after retries")
+        contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+        tours_contract = w3.eth.contract(address=TOURS_TOKEN_ADDRESS, abi=TOURS_ABI)
+        fee_oracle = FeeOracle(w3)
+        receipt_tracker = ReceiptTracker(w3)
+        logger.info("AsyncWeb3 initialized for Monad testnet")
+    except Exception as e:
+        logger.error(f"Error in initialize_web3: {str(e)}")
+        w3 = None
 
 initialize_web3()
 
 # Initialize SQLite database
 conn = sqlite3.connect('empowertours.db')
 cursor = conn.cursor()
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS sessions (
-        user_id TEXT PRIMARY KEY,
-        session_id TEXT,
-        wallet_address TEXT,
-        connected_at INTEGER  -- For expiry
-    )
-''')
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pending_txs (
-        user_id TEXT,
-        tx_type TEXT UNIQUE,  -- Prevent duplicates per type
-        tx_data TEXT,
-        name TEXT,
-        difficulty TEXT,
-        latitude INTEGER,
-        longitude INTEGER,
-        photo_hash TEXT,
-        location_id INTEGER,
-        tournament_id INTEGER
-    )
-''')
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pending_actions (
-        user_id TEXT PRIMARY KEY,
-        action_type TEXT,  # 'journal' or 'climb'
-        content_hash TEXT,
-        name TEXT,
-        difficulty TEXT
-    )
-''')
-conn.commit()
+# Same schema as api.py; whichever module imports first applies the pending migrations
+migrate(conn)
 
-# Simple encryption (XOR; replace with better in prod)
-ENCRYPT_KEY = b'secret_key'  # Use env var
+# Field encryption: the legacy XOR format (whole-buffer codec in codec.py), or AES-GCM for new
+# writes when FIELD_AEAD_KEY is set; XOR-encoded rows stay readable either way
+ENCRYPT_KEY = b'secret_key'  # Use env var in prod
+field_codec = make_codec(ENCRYPT_KEY, os.getenv("FIELD_AEAD_KEY"))
 def encrypt(data: str) -> str:
-    return ''.join(chr(ord(c) ^ ENCRYPT_KEY[i % len(ENCRYPT_KEY)]) for i, c in enumerate(data))
+    return field_codec.encode(data)
 
 def decrypt(data: str) -> str:
-    return encrypt(data)  # Symmetric
+    return field_codec.decode(data)
 
 async def get_gas_fees(wallet_address):
-    if not w3:
+    if not w3 or not fee_oracle:
         logger.error("Web3 not available for gas fee calculation")
         return {
-            'maxFeePerGas': 2 * 10**9,  # 2 gwei fallback
-            'maxPriorityFeePerGas': 1 * 10**9  # 1 gwei fallback
-        }
-    try:
-        base_fee = w3.eth.get_block('latest')['baseFeePerGas']
-        max_priority_fee = w3.eth.max_priority_fee
-        max_fee_per_gas = base_fee + max_priority_fee
-        return {
-            'maxFeePerGas': max_fee_per_gas,
-            'maxPriorityFeePerGas': max_priority_fee
-        }
-    except Exception as e:
-        logger.error(f"Error fetching gas fees for {wallet_address}: {str(e)}")
-        return {
-            'maxFeePerGas': 2 * 10**9,
-            'maxPriorityFeePerGas': 1 * 10**9
+            'maxFeePerGas': FALLBACK_MAX_FEE,
+            'maxPriorityFeePerGas': FALLBACK_PRIORITY_FEE
         }
+    # At most one eth_feeHistory per block; builders in between (or waiting on it) get the cached quote
+    return await fee_oracle.fees(max_age=FEE_REFRESH_SECONDS)
+
+async def simulate(function, call, estimate=None):
+    # The eth_call simulation and the first estimate_gas for this function go out together and the gas
+    # limit is returned. A revert raises ContractLogicError from either one.
+    results = await asyncio.gather(w3.eth.call(call), gas_limits.limit_async(function, estimate), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results[1]
 
 async def create_profile_tx(wallet_address, user):
     if not w3 or not contract:
@@ -984,27 +977,28 @@ async def create_profile_tx(wallet_address, user):
         if not row or time.time() - row[0] > EXPIRY_SECONDS:
             return {'status': 'error', 'message': "Session expired; please reconnect your wallet! 🔄"}
 
-        profile = contract.functions.profiles(wallet_address).call()
+        # All reads the checks below need, in one round of concurrent requests
+        profile, profile_fee, balance, nonce, gas_fees = await asyncio.gather(
+            contract.functions.profiles(wallet_address).call(),
+            contract.functions.profileFee().call(),
+            w3.eth.get_balance(wallet_address),
+            w3.eth.get_transaction_count(wallet_address),
+            get_gas_fees(wallet_address)
+        )
         if profile[0]:
             return {'status': 'error', 'message': f"Profile already exists for {wallet_address}! Try /journal or /buildaclimb. 🪨"}
         
-        profile_fee = contract.functions.profileFee().call()
-        balance = w3.eth.get_balance(wallet_address)
-        
         # Simulate createProfile transaction
         try:
-            w3.eth.call({
+            gas_limit = await simulate('createProfile', {
                 'from': wallet_address,
                 'to': CONTRACT_ADDRESS,
                 'data': contract.encodeABI(fn_name='createProfile', args=[])
-            })
+            }, estimate=lambda: contract.functions.createProfile().estimate_gas({'from': wallet_address}))
         except ContractLogicError as e:
             logger.error(f"Simulation error in createProfile: {str(e)}")
             return {'status': 'error', 'message': f"Contract error: {str(e)}. Ensure the contract is valid. 😅"}
         
-        gas_estimate = contract.functions.createProfile().estimate_gas({'from': wallet_address})
-        gas_limit = int(gas_estimate * 1.2)
-        gas_fees = await get_gas_fees(wallet_address)
         gas_cost = gas_limit * gas_fees['maxFeePerGas']
         
         if balance < gas_cost + profile_fee:
@@ -1018,8 +1012,7 @@ async def create_profile_tx(wallet_address, user):
             }
         
         # Build createProfile transaction
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        create_tx = contract.functions.createProfile().build_transaction({
+        create_tx = await contract.functions.createProfile().build_transaction({
             'chainId': 10143,
             'from': wallet_address,
             'nonce': nonce,
@@ -1076,12 +1069,16 @@ async def add_journal_entry_tx(wallet_address, content_hash, user):
         if not row or time.time() - row[0] > EXPIRY_SECONDS:
             return {'status': 'error', 'message': "Session expired; please reconnect your wallet! 🔄"}
 
-        profile = contract.functions.profiles(wallet_address).call()
+        profile, nonce, gas_fees = await asyncio.gather(
+            contract.functions.profiles(wallet_address).call(),
+            w3.eth.get_transaction_count(wallet_address),
+            get_gas_fees(wallet_address)
+        )
         if not profile[0]:
             return {'status': 'error', 'message': "You need to create a profile first with /createprofile! 🪙"}
         
         try:
-            w3.eth.call({
+            gas_limit = await simulate('addJournalEntry', {
                 'from': wallet_address,
                 'to': CONTRACT_ADDRESS,
                 'data': contract.encodeABI(fn_name='addJournalEntry', args=[content_hash])
@@ -1090,12 +1087,7 @@ async def add_journal_entry_tx(wallet_address, content_hash, user):
             logger.error(f"Simulation error in addJournalEntry: {str(e)}")
             return {'status': 'error', 'message': f"Contract error: {str(e)}. Ensure you have a profile. 😅"}
         
-        gas_estimate = contract.functions.addJournalEntry(content_hash).estimate_gas({'from': wallet_address})
-        gas_limit = 500000  # Fixed to prevent OOG
-        logger.info(f"Gas estimate for addJournalEntry: {gas_estimate}, set limit: {gas_limit}")
-        gas_fees = await get_gas_fees(wallet_address)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        tx = contract.functions.addJournalEntry(content_hash).build_transaction({
+        tx = await contract.functions.addJournalEntry(content_hash).build_transaction({
             'chainId': 10143,
             'from': wallet_address,
             'nonce': nonce,
@@ -1130,30 +1122,31 @@ async def add_comment_tx(wallet_address, entry_id, comment, user):
         if not row or time.time() - row[0] > EXPIRY_SECONDS:
             return {'status': 'error', 'message': "Session expired; please reconnect your wallet! 🔄"}
 
-        profile = contract.functions.profiles(wallet_address).call()
+        profile, comment_fee, balance, nonce, gas_fees = await asyncio.gather(
+            contract.functions.profiles(wallet_address).call(),
+            contract.functions.commentFee().call(),
+            w3.eth.get_balance(wallet_address),
+            w3.eth.get_transaction_count(wallet_address),
+            get_gas_fees(wallet_address)
+        )
         if not profile[0]:
             return {'status': 'error', 'message': "You need to create a profile first with /createprofile! 🪙"}
         
         comment_hash = w3.keccak(text=comment).hex()
-        comment_fee = contract.functions.commentFee().call()
-        balance = w3.eth.get_balance(wallet_address)
         try:
-            w3.eth.call({
+            gas_limit = await simulate('addComment', {
                 'from': wallet_address,
                 'to': CONTRACT_ADDRESS,
                 'value': comment_fee,
                 'data': contract.encodeABI(fn_name='addComment', args=[entry_id, comment_hash])
-            })
+            }, estimate=lambda: contract.functions.addComment(entry_id, comment_hash).estimate_gas({
+                'from': wallet_address,
+                'value': comment_fee
+            }))
         except ContractLogicError as e:
             logger.error(f"Simulation error in addComment: {str(e)}")
             return {'status': 'error', 'message': f"Contract error: {str(e)}. Ensure the entry exists. 😅"}
         
-        gas_estimate = contract.functions.addComment(entry_id, comment_hash).estimate_gas({
-            'from': wallet_address,
-            'value': comment_fee
-        })
-        gas_limit = int(gas_estimate * 1.2)
-        gas_fees = await get_gas_fees(wallet_address)
         gas_cost = gas_limit * gas_fees['maxFeePerGas']
         
         if balance < gas_cost + comment_fee:
@@ -1166,8 +1159,7 @@ async def add_comment_tx(wallet_address, entry_id, comment, user):
                 )
             }
         
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        tx = contract.functions.addComment(entry_id, comment_hash).build_transaction({
+        tx = await contract.functions.addComment(entry_id, comment_hash).build_transaction({
             'chainId': 10143,
             'from': wallet_address,
             'value': comment_fee,
@@ -1203,16 +1195,20 @@ async def create_climbing_location_tx(wallet_address, name, difficulty, latitude
         if not row or time.time() - row[0] > EXPIRY_SECONDS:
             return {'status': 'error', 'message': "Session expired; please reconnect your wallet! 🔄"}
 
-        profile = contract.functions.profiles(wallet_address).call()
-        if not profile[0]:
-            return {'status': 'error', 'message': "You need to create a profile first with /createprofile! 🪙"}
-        
         if not name or not difficulty:
             return {'status': 'error', 'message': "Name and difficulty cannot be empty! 😅"}
         
-        location_cost = contract.functions.locationCreationCost().call()
-        balance = tours_contract.functions.balanceOf(wallet_address).call()
-        allowance = tours_contract.functions.allowance(wallet_address, CONTRACT_ADDRESS).call()
+        profile, location_cost, balance, allowance, nonce, gas_fees = await asyncio.gather(
+            contract.functions.profiles(wallet_address).call(),
+            contract.functions.locationCreationCost().call(),
+            tours_contract.functions.balanceOf(wallet_address).call(),
+            tours_contract.functions.allowance(wallet_address, CONTRACT_ADDRESS).call(),
+            w3.eth.get_transaction_count(wallet_address),
+            get_gas_fees(wallet_address)
+        )
+        if not profile[0]:
+            return {'status': 'error', 'message': "You need to create a profile first with /createprofile! 🪙"}
+        
         if balance < location_cost:
             return {
                 'status': 'error',
@@ -1222,13 +1218,11 @@ async def create_climbing_location_tx(wallet_address, name, difficulty, latitude
                 )
             }
         if allowance < location_cost:
-            gas_fees = await get_gas_fees(wallet_address)
-            nonce = w3.eth.get_transaction_count(wallet_address)
-            approve_tx = tours_contract.functions.approve(CONTRACT_ADDRESS, location_cost).build_transaction({
+            approve_tx = await tours_contract.functions.approve(CONTRACT_ADDRESS, location_cost).build_transaction({
                 'chainId': 10143,
                 'from': wallet_address,
                 'nonce': nonce,
-                'gas': 100000,
+                'gas': gas_limits.limit('approve'),
                 'maxFeePerGas': gas_fees['maxFeePerGas'],
                 'maxPriorityFeePerGas': gas_fees['maxPriorityFeePerGas']
             })
@@ -1256,7 +1250,7 @@ async def create_climbing_location_tx(wallet_address, name, difficulty, latitude
             }
         
         try:
-            w3.eth.call({
+            gas_limit = await simulate('createClimbingLocation', {
                 'from': wallet_address,
                 'to': CONTRACT_ADDRESS,
                 'data': contract.encodeABI(
@@ -1268,14 +1262,7 @@ async def create_climbing_location_tx(wallet_address, name, difficulty, latitude
             logger.error(f"Simulation error in createClimbingLocation: {str(e)}")
             return {'status': 'error', 'message': f"Contract error: {str(e)}. Check parameters or contract state. 😅"}
         
-        gas_estimate = contract.functions.createClimbingLocation(
-            name, difficulty, latitude, longitude, photo_hash
-        ).estimate_gas({'from': wallet_address})
-        gas_limit = 500000  # Fixed to prevent OOG
-        logger.info(f"Gas estimate: {gas_estimate}, limit: {gas_limit}")
-        gas_fees = await get_gas_fees(wallet_address)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        tx = contract.functions.createClimbingLocation(
+        tx = await contract.functions.createClimbingLocation(
             name, difficulty, latitude, longitude, photo_hash
         ).build_transaction({
             'chainId': 10143,
@@ -1312,13 +1299,17 @@ async def purchase_climbing_location_tx(wallet_address, location_id, user):
         if not row or time.time() - row[0] > EXPIRY_SECONDS:
             return {'status': 'error', 'message': "Session expired; please reconnect your wallet! 🔄"}
 
-        profile = contract.functions.profiles(wallet_address).call()
+        profile, location_cost, balance, allowance, nonce, gas_fees = await asyncio.gather(
+            contract.functions.profiles(wallet_address).call(),
+            contract.functions.locationCreationCost().call(),
+            tours_contract.functions.balanceOf(wallet_address).call(),
+            tours_contract.functions.allowance(wallet_address, CONTRACT_ADDRESS).call(),
+            w3.eth.get_transaction_count(wallet_address),
+            get_gas_fees(wallet_address)
+        )
         if not profile[0]:
             return {'status': 'error', 'message': "You need to create a profile first with /createprofile! 🪙"}
         
-        location_cost = contract.functions.locationCreationCost().call()
-        balance = tours_contract.functions.balanceOf(wallet_address).call()
-        allowance = tours_contract.functions.allowance(wallet_address, CONTRACT_ADDRESS).call()
         if balance < location_cost:
             return {
                 'status': 'error',
@@ -1328,13 +1319,11 @@ async def purchase_climbing_location_tx(wallet_address, location_id, user):
                 )
             }
         if allowance < location_cost:
-            gas_fees = await get_gas_fees(wallet_address)
-            nonce = w3.eth.get_transaction_count(wallet_address)
-            approve_tx = tours_contract.functions.approve(CONTRACT_ADDRESS, location_cost).build_transaction({
+            approve_tx = await tours_contract.functions.approve(CONTRACT_ADDRESS, location_cost).build_transaction({
                 'chainId': 10143,
                 'from': wallet_address,
                 'nonce': nonce,
-                'gas': 100000,
+                'gas': gas_limits.limit('approve'),
                 'maxFeePerGas': gas_fees['maxFeePerGas'],
                 'maxPriorityFeePerGas': gas_fees['maxPriorityFeePerGas']
             })
@@ -1358,23 +1347,19 @@ async def purchase_climbing_location_tx(wallet_address, location_id, user):
             }
         
         try:
-            w3.eth.call({
+            gas_limit = await simulate('purchaseClimbingLocation', {
                 'from': wallet_address,
                 'to': CONTRACT_ADDRESS,
                 'data': contract.encodeABI(
                     fn_name='purchaseClimbingLocation',
                     args=[location_id]
                 )
-            })
+            }, estimate=lambda: contract.functions.purchaseClimbingLocation(location_id).estimate_gas({'from': wallet_address}))
         except ContractLogicError as e:
             logger.error(f"Simulation error in purchaseClimbingLocation: {str(e)}")
             return {'status': 'error', 'message': f"Contract error: {str(e)}. Ensure the location ID is valid. 😅"}
         
-        gas_estimate = contract.functions.purchaseClimbingLocation(location_id).estimate_gas({'from': wallet_address})
-        gas_limit = int(gas_estimate * 1.2)
-        gas_fees = await get_gas_fees(wallet_address)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        tx = contract.functions.purchaseClimbingLocation(location_id).build_transaction({
+        tx = await contract.functions.purchaseClimbingLocation(location_id).build_transaction({
             'chainId': 10143,
             'from': wallet_address,
             'nonce': nonce,
@@ -1409,28 +1394,28 @@ async def create_tournament_tx(wallet_address, entry_fee, user):
         if not row or time.time() - row[0] > EXPIRY_SECONDS:
             return {'status': 'error', 'message': "Session expired; please reconnect your wallet! 🔄"}
 
-        profile = contract.functions.profiles(wallet_address).call()
+        profile, nonce, gas_fees = await asyncio.gather(
+            contract.functions.profiles(wallet_address).call(),
+            w3.eth.get_transaction_count(wallet_address),
+            get_gas_fees(wallet_address)
+        )
         if not profile[0]:
             return {'status': 'error', 'message': "You need to create a profile first with /createprofile! 🪙"}
         
         try:
-            w3.eth.call({
+            gas_limit = await simulate('createTournament', {
                 'from': wallet_address,
                 'to': CONTRACT_ADDRESS,
                 'data': contract.encodeABI(
                     fn_name='createTournament',
                     args=[entry_fee]
                 )
-            })
+            }, estimate=lambda: contract.functions.createTournament(entry_fee).estimate_gas({'from': wallet_address}))
         except ContractLogicError as e:
             logger.error(f"Simulation error in createTournament: {str(e)}")
             return {'status': 'error', 'message': f"Contract error: {str(e)}. Ensure you have a profile. 😅"}
         
-        gas_estimate = contract.functions.createTournament(entry_fee).estimate_gas({'from': wallet_address})
-        gas_limit = int(gas_estimate * 1.2)
-        gas_fees = await get_gas_fees(wallet_address)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        tx = contract.functions.createTournament(entry_fee).build_transaction({
+        tx = await contract.functions.createTournament(entry_fee).build_transaction({
             'chainId': 10143,
             'from': wallet_address,
             'nonce': nonce,
@@ -1465,14 +1450,18 @@ async def join_tournament_tx(wallet_address, tournament_id, user):
         if not row or time.time() - row[0] > EXPIRY_SECONDS:
             return {'status': 'error', 'message': "Session expired; please reconnect your wallet! 🔄"}
 
-        profile = contract.functions.profiles(wallet_address).call()
+        profile, tournament, balance, allowance, nonce, gas_fees = await asyncio.gather(
+            contract.functions.profiles(wallet_address).call(),
+            contract.functions.tournaments(tournament_id).call(),
+            tours_contract.functions.balanceOf(wallet_address).call(),
+            tours_contract.functions.allowance(wallet_address, CONTRACT_ADDRESS).call(),
+            w3.eth.get_transaction_count(wallet_address),
+            get_gas_fees(wallet_address)
+        )
         if not profile[0]:
             return {'status': 'error', 'message': "You need to create a profile first with /createprofile! 🪙"}
         
-        tournament = contract.functions.tournaments(tournament_id).call()
         entry_fee = tournament[0]
-        balance = tours_contract.functions.balanceOf(wallet_address).call()
-        allowance = tours_contract.functions.allowance(wallet_address, CONTRACT_ADDRESS).call()
         if balance < entry_fee:
             return {
                 'status': 'error',
@@ -1482,13 +1471,11 @@ async def join_tournament_tx(wallet_address, tournament_id, user):
                 )
             }
         if allowance < entry_fee:
-            gas_fees = await get_gas_fees(wallet_address)
-            nonce = w3.eth.get_transaction_count(wallet_address)
-            approve_tx = tours_contract.functions.approve(CONTRACT_ADDRESS, entry_fee).build_transaction({
+            approve_tx = await tours_contract.functions.approve(CONTRACT_ADDRESS, entry_fee).build_transaction({
                 'chainId': 10143,
                 'from': wallet_address,
                 'nonce': nonce,
-                'gas': 100000,
+                'gas': gas_limits.limit('approve'),
                 'maxFeePerGas': gas_fees['maxFeePerGas'],
                 'maxPriorityFeePerGas': gas_fees['maxPriorityFeePerGas']
             })
@@ -1512,23 +1499,19 @@ async def join_tournament_tx(wallet_address, tournament_id, user):
             }
         
         try:
-            w3.eth.call({
+            gas_limit = await simulate('joinTournament', {
                 'from': wallet_address,
                 'to': CONTRACT_ADDRESS,
                 'data': contract.encodeABI(
                     fn_name='joinTournament',
                     args=[tournament_id]
                 )
-            })
+            }, estimate=lambda: contract.functions.joinTournament(tournament_id).estimate_gas({'from': wallet_address}))
         except ContractLogicError as e:
             logger.error(f"Simulation error in joinTournament: {str(e)}")
             return {'status': 'error', 'message': f"Contract error: {str(e)}. Ensure the tournament ID is valid. 😅"}
         
-        gas_estimate = contract.functions.joinTournament(tournament_id).estimate_gas({'from': wallet_address})
-        gas_limit = int(gas_estimate * 1.2)
-        gas_fees = await get_gas_fees(wallet_address)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        tx = contract.functions.joinTournament(tournament_id).build_transaction({
+        tx = await contract.functions.joinTournament(tournament_id).build_transaction({
             'chainId': 10143,
             'from': wallet_address,
             'nonce': nonce,
@@ -1568,24 +1551,25 @@ async def end_tournament_tx(wallet_address, tournament_id, winner_address, user)
         if not w3.is_address(winner_address):
             return {'status': 'error', 'message': "Invalid winner address! 😕"}
         
+        # No state to check first, so the simulation goes out together with the nonce and fee reads
         try:
-            w3.eth.call({
-                'from': wallet_address,
-                'to': CONTRACT_ADDRESS,
-                'data': contract.encodeABI(
-                    fn_name='endTournament',
-                    args=[tournament_id, winner_address]
-                )
-            })
+            gas_limit, nonce, gas_fees = await asyncio.gather(
+                simulate('endTournament', {
+                    'from': wallet_address,
+                    'to': CONTRACT_ADDRESS,
+                    'data': contract.encodeABI(
+                        fn_name='endTournament',
+                        args=[tournament_id, winner_address]
+                    )
+                }, estimate=lambda: contract.functions.endTournament(tournament_id, winner_address).estimate_gas({'from': wallet_address})),
+                w3.eth.get_transaction_count(wallet_address),
+                get_gas_fees(wallet_address)
+            )
         except ContractLogicError as e:
             logger.error(f"Simulation error in endTournament: {str(e)}")
             return {'status': 'error', 'message': f"Contract error: {str(e)}. Ensure the tournament ID is valid. 😅"}
         
-        gas_estimate = contract.functions.endTournament(tournament_id, winner_address).estimate_gas({'from': wallet_address})
-        gas_limit = int(gas_estimate * 1.2)
-        gas_fees = await get_gas_fees(wallet_address)
-        nonce = w3.eth.get_transaction_count(wallet_address)
-        tx = contract.functions.endTournament(tournament_id, winner_address).build_transaction({
+        tx = await contract.functions.endTournament(tournament_id, winner_address).build_transaction({
             'chainId': 10143,
             'from': wallet_address,
             'nonce': nonce,
@@ -1610,30 +1594,92 @@ async def end_tournament_tx(wallet_address, tournament_id, winner_address, user)
         logger.error(f"Error in end_tournament_tx: {str(e)}")
         return {'status': 'error', 'message': f"Oops, something went wrong: {str(e)}. Try again! 😅"}
 
-async def get_climbing_locations():
+class ClimbRecord(NamedTuple):
+    location_id: int
+    creator: str
+    name: str
+    difficulty: str
+    latitude: int  # micro-degrees, as stored on chain
+    longitude: int
+    photo_hash: str
+    timestamp: int
+    purchase_count: int
+
+    @classmethod
+    def from_location(cls, location_id, location):
+        return cls(location_id, location[0], location[1], location[2], location[3], location[4], location[5], location[6], location[10])
+
+def format_climbing_location(record):
+    return (
+        f"🏔️ {record.name} ({record.difficulty}) - By {record.creator[:6]}...\n"
+        f"   Location: ({record.latitude/10**6:.4f}, {record.longitude/10**6:.4f})\n"
+        f"   Map: https://www.google.com/maps?q={record.latitude/10**6},{record.longitude/10**6}"
+    )
+
+async def fetch_climbing_locations(location_ids):
+    # The whole chunk goes out as one JSON-RPC batch of eth_calls when the provider supports it;
+    # entries that fail are logged and skipped, like the per-call gathers in main.py
+    batch = getattr(w3.provider, "make_batch_request", None)
+    if batch is None:
+        locations = await asyncio.gather(*(contract.functions.climbingLocations(i).call() for i in location_ids), return_exceptions=True)
+    else:
+        responses = await batch([
+            ("eth_call", [{"to": contract.address, "data": contract.encodeABI(fn_name='climbingLocations', args=[i])}, "latest"])
+            for i in location_ids
+        ])
+        output_types = [output['type'] for entry in contract.abi if entry.get('name') == 'climbingLocations' for output in entry['outputs']]
+        locations = []
+        for response in responses:
+            if response.get("error") or not response.get("result"):
+                locations.append(ValueError(response.get("error") or "empty eth_call result"))
+                continue
+            location = list(abi_decode(output_types, bytes.fromhex(response["result"][2:])))
+            location[0] = AsyncWeb3.to_checksum_address(location[0])
+            locations.append(location)
+    records = []
+    for location_id, location in zip(location_ids, locations):
+        if isinstance(location, Exception):
+            logger.warning(f"Skipping climbing location {location_id}: {str(location)}")
+            continue
+        records.append(ClimbRecord.from_location(location_id, location))
+    return records
+
+async def get_climbing_locations(chunk_size=CLIMB_CHUNK_SIZE, start=0):
+    # Async generator of ClimbRecord lists, chunk_size locations per RPC batch. The next chunk is requested
+    # before the current one is handed out, so at most two chunks are in flight or in memory at a time.
     if not w3 or not contract:
-        return []
+        return
+    task = upcoming = None
     try:
-        location_count = contract.functions.getClimbingLocationCount().call()
-        tour_list = []
-        for i in range(location_count):
-            location = contract.functions.climbingLocations(i).call()
-            tour_list.append(
-                f"🏔️ {location[1]} ({location[2]}) - By {location[0][:6]}...\n"
-                f"   Location: ({location[3]/10**6:.4f}, {location[4]/10**6:.4f})\n"
-                f"   Map: https://www.google.com/maps?q={location[3]/10**6},{location[4]/10**6}"
-            )
-        return tour_list
+        location_count = await contract.functions.getClimbingLocationCount().call()
+        for chunk_start in range(start, location_count, chunk_size):
+            upcoming = asyncio.ensure_future(fetch_climbing_locations(range(chunk_start, min(chunk_start + chunk_size, location_count))))
+            if task is not None:
+                yield await task
+            task = upcoming
+        if task is not None:
+            yield await task
+            task = None
     except Exception as e:
         logger.error(f"Error in get_climbing_locations: {str(e)}")
-        return []
+    finally:
+        # The caller may stop early (e.g. one Telegram page); don't leave the prefetch running
+        for pending in (task, upcoming):
+            if pending is None:
+                continue
+            if not pending.done():
+                pending.cancel()
+            elif not pending.cancelled():
+                pending.exception()  # mark retrieved; the error that ended the loop is logged above
 
 async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
     if not w3:
         return {'status': 'error', 'message': "Blockchain connection unavailable. Try again later! 😅"}
     try:
-        tx_hash = w3.eth.send_raw_transaction(signed_tx_hex)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+        tx_hash = await w3.eth.send_raw_transaction(signed_tx_hex)
+        # The shared tracker polls every outstanding hash in one batched request per block,
+        # instead of this coroutine polling its own receipt for up to five minutes
+        receipt = await receipt_tracker.wait(tx_hash.hex(), timeout=300)
         
         cursor.execute("DELETE FROM pending_txs WHERE user_id = ? AND tx_type = ?", (str(user.id), pending_tx['tx_type']))
         conn.commit()
@@ -1641,6 +1687,7 @@ async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
         explorer_url = f"https://testnet.monadexplorer.com/tx/{tx_hash.hex()}"
         
         if receipt.status == 1:
+            gas_limits.observe(TX_TYPE_FUNCTIONS.get(pending_tx['tx_type']), receipt.gasUsed)
             if pending_tx['tx_type'] == 'create_profile':
                 cursor.execute("UPDATE sessions SET wallet_address = ? WHERE user_id = ?", (pending_tx['wallet_address'], str(user.id)))
                 conn.commit()
@@ -1666,10 +1713,12 @@ async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
                 }
             elif pending_tx['tx_type'] == 'approve_tours' and 'next_tx' in pending_tx:
                 next_tx_type = pending_tx['next_tx']['type']
-                gas_fees = await get_gas_fees(pending_tx['wallet_address'])
-                nonce = w3.eth.get_transaction_count(pending_tx['wallet_address'])
+                nonce, gas_fees = await asyncio.gather(
+                    w3.eth.get_transaction_count(pending_tx['wallet_address']),
+                    get_gas_fees(pending_tx['wallet_address'])
+                )
                 if next_tx_type == 'create_climbing_location':
-                    next_tx = contract.functions.createClimbingLocation(
+                    next_tx = await contract.functions.createClimbingLocation(
                         pending_tx['next_tx']['name'],
                         pending_tx['next_tx']['difficulty'],
                         pending_tx['next_tx']['latitude'],
@@ -1679,7 +1728,7 @@ async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
                         'chainId': 10143,
                         'from': pending_tx['wallet_address'],
                         'nonce': nonce,
-                        'gas': 200000,
+                        'gas': gas_limits.limit('createClimbingLocation'),
                         'maxFeePerGas': gas_fees['maxFeePerGas'],
                         'maxPriorityFeePerGas': gas_fees['maxPriorityFeePerGas']
                     })
@@ -1704,13 +1753,13 @@ async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
                         'tx_data': next_tx
                     }
                 elif next_tx_type == 'purchase_climbing_location':
-                    next_tx = contract.functions.purchaseClimbingLocation(
+                    next_tx = await contract.functions.purchaseClimbingLocation(
                         pending_tx['next_tx']['location_id']
                     ).build_transaction({
                         'chainId': 10143,
                         'from': pending_tx['wallet_address'],
                         'nonce': nonce,
-                        'gas': 100000,
+                        'gas': gas_limits.limit('purchaseClimbingLocation'),
                         'maxFeePerGas': gas_fees['maxFeePerGas'],
                         'maxPriorityFeePerGas': gas_fees['maxPriorityFeePerGas']
                     })
@@ -1732,13 +1781,13 @@ async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
                         'tx_data': next_tx
                     }
                 elif next_tx_type == 'join_tournament':
-                    next_tx = contract.functions.joinTournament(
+                    next_tx = await contract.functions.joinTournament(
                         pending_tx['next_tx']['tournament_id']
                     ).build_transaction({
                         'chainId': 10143,
                         'from': pending_tx['wallet_address'],
                         'nonce': nonce,
-                        'gas': 100000,
+                        'gas': gas_limits.limit('joinTournament'),
                         'maxFeePerGas': gas_fees['maxFeePerGas'],
                         'maxPriorityFeePerGas': gas_fees['maxPriorityFeePerGas']
                     })
@@ -1760,8 +1809,24 @@ async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
                         'tx_data': next_tx
                     }
             elif pending_tx['tx_type'] == 'create_climbing_location':
-                location_id = contract.functions.getClimbingLocationCount().call() - 1
-                location = contract.functions.climbingLocations(location_id).call()
+                created = next(decode_events(contract, receipt, CREATED_EVENTS['climb'][0]), None)
+                if created is None:
+                    # The transaction succeeded; only the id is unknown, so report it without the location
+                    logger.error(f"No ClimbingLocationCreated event in receipt {tx_hash.hex()}")
+                    return {
+                        'status': 'success',
+                        'message': f"Climb created, {user.first_name}! 🪨 {pending_tx['name']} ({pending_tx['difficulty']}). <a href='{explorer_url}'>Tx: {tx_hash.hex()}</a>",
+                        'group_message': (
+                            f"New climb by {user.username or user.first_name}! 🧗\n"
+                            f"Name: {pending_tx['name']} ({pending_tx['difficulty']})\n"
+                            f"<a href='{explorer_url}'>Tx: {tx_hash.hex()}</a>"
+                        )
+                    }
+                location_id = created.args.locationId
+                if 'latitude' in created.args:
+                    location = (None, None, None, created.args.latitude, created.args.longitude)
+                else:
+                    location = await contract.functions.climbingLocations(location_id).call()
                 return {
                     'status': 'success',
                     'message': (
@@ -1788,7 +1853,14 @@ async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
                     'group_message': f"{user.username or user.first_name} commented on journal entry #{pending_tx['location_id']}! 🗣️ <a href='{explorer_url}'>Tx: {tx_hash.hex()}</a>"
                 }
             elif pending_tx['tx_type'] == 'create_tournament':
-                tournament_id = contract.functions.getTournamentCount().call() - 1
+                tournament_id = created_entity_id(contract, receipt, 'tournament')
+                if tournament_id is None:
+                    logger.error(f"No TournamentCreated event in receipt {tx_hash.hex()}")
+                    return {
+                        'status': 'success',
+                        'message': f"Tournament created, {user.first_name}! 🏆 Find its ID with /tournaments to share it. <a href='{explorer_url}'>Tx: {tx_hash.hex()}</a>",
+                        'group_message': f"New tournament by {user.username or user.first_name}! 🏆 See /tournaments to join. <a href='{explorer_url}'>Tx: {tx_hash.hex()}</a>"
+                    }
                 return {
                     'status': 'success',
                     'message': f"Tournament #{tournament_id} created, {user.first_name}! 🏆 Share this ID with others to join using /jointournament {tournament_id}. <a href='{explorer_url}'>Tx: {tx_hash.hex()}</a>",
@@ -1812,6 +1884,9 @@ async def broadcast_transaction(signed_tx_hex, pending_tx, user, context):
                 }
         else:
             return {'status': 'error', 'message': "Transaction failed. Ensure the signed transaction is valid and try again! 💪"}
+    except asyncio.TimeoutError:
+        logger.warning("No receipt for broadcast transaction after 300 seconds")
+        return {'status': 'error', 'message': "Transaction sent but not confirmed after 5 minutes. Check the explorer before retrying! ⏳"}
     except Exception as e:
         logger.error(f"Error in broadcast_transaction: {str(e)}")
         return {'status': 'error', 'message': f"Oops, something went wrong: {str(e)}. Try again! 😅"}
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class AsyncSQLite:
+    # sqlite3 calls run on worker threads so routes never block the event loop. Every thread owns its
+    # connection (connections and cursors are never shared); WAL lets the readers run while the writer commits.
+    # Writes are queued to the single writer connection, which commits whatever has piled up in one transaction.
+    def __init__(self, path, readers=4, commit_batch=64, cached_statements=256, busy_timeout=5000):
+        self.path = path
+        self.commit_batch = commit_batch
+        self.cached_statements = cached_statements  # per-connection cache of prepared statements, keyed by SQL text
+        self.busy_timeout = busy_timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
+        self.reader_pool = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="sqlite-read")
+        self.writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-write")
+        self.queue = None
+        self.task = None
+        self.commits = 0
+        self.writes = 0
+
+    def setup(self, migrate):
+        # Runs once at import on the calling thread; journal_mode=WAL is stored in the database file.
+        # migrate(conn) brings the schema up to date and returns its version.
+        conn = sqlite3.connect(self.path)
+        try:
+            mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            version = migrate(conn)
+        finally:
+            conn.close()
+        logger.info(f"SQLite {self.path} ready, journal_mode={mode}, schema version {version}")
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # isolation_level=None: no implicit transactions, the writer issues BEGIN/COMMIT itself
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, cached_statements=self.cached_statements)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def read(self, sql, params, many):
+        cur = self.connection().execute(sql, params)
+        try:
+            return cur.fetchall() if many else cur.fetchone()
+        finally:
+            cur.close()
+
+    async def fetchone(self, sql, params=()):
+        return await asyncio.get_running_loop().run_in_executor(self.reader_pool, self.read, sql, params, False)
+
+    async def fetchall(self, sql, params=()):
+        return await asyncio.get_running_loop().run_in_executor(self.reader_pool, self.read, sql, params, True)
+
+    async def fetchval(self, sql, params=()):
+        row = await self.fetchone(sql, params)
+        return row[0] if row else None
+
+    async def execute(self, sql, params=()):
+        # Resolves once the batch holding this statement is committed, with (lastrowid, rowcount);
+        # a constraint error (e.g. sqlite3.IntegrityError) is raised here without failing the rest of the batch
+        loop = asyncio.get_running_loop()
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.commit_loop())
+        future = loop.create_future()
+        self.queue.put_nowait((sql, params, future))
+        return await future
+
+    async def commit_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Statements queued while the previous batch was committing go out together in the next one
+            batch = [await self.queue.get()]
+            while len(batch) < self.commit_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self.writer_pool, self.apply, [(sql, params) for sql, params, _ in batch])
+            except Exception as e:
+                logger.error(f"SQLite batch of {len(batch)} writes failed: {str(e)}")
+                results = [e] * len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+                self.queue.task_done()
+
+    def apply(self, statements):
+        conn = self.connection()
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                # SQLite undoes only the failing statement on a constraint error; the transaction stays open
+                try:
+                    cur = conn.execute(sql, params)
+                    results.append((cur.lastrowid, cur.rowcount))
+                except sqlite3.DatabaseError as e:
+                    results.append(e)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        self.commits += 1
+        self.writes += len(statements)
+        return results
+
+    async def close(self):
+        if self.queue is not None:
+            await self.queue.join()
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.reader_pool.shutdown(wait=True)
+        self.writer_pool.shutdown(wait=True)
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections.clear()
+
+    def status(self):
+        return {
+            "writes": self.writes,
+            "commits": self.commits,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "connections": len(self.connections),
+        }
@@ -0,0 +1,159 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from statistics import median
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_MAX_FEE = 2 * 10**9  # 2 gwei
+FALLBACK_PRIORITY_FEE = 1 * 10**9  # 1 gwei
+# Functions whose gas grows with their string arguments, so one call's receipt says little about the next
+SIZED_FUNCTIONS = {"createClimbingLocation", "addJournalEntry", "addJournalEntryWithDetails", "addComment"}
+
+class FeeOracle:
+    # Follows the chain head and keeps a window of base fees and priority-fee percentiles from
+    # eth_feeHistory, so building a transaction never waits on a fee RPC
+    def __init__(self, w3, history_blocks=20, percentiles=(10, 50, 90), base_fee_multiplier=2, poll_interval=1.0):
+        self.w3 = w3
+        self.history_blocks = history_blocks
+        self.percentiles = tuple(percentiles)
+        self.base_fee_multiplier = base_fee_multiplier
+        self.poll_interval = poll_interval
+        self.base_fees = deque(maxlen=history_blocks)
+        self.rewards = deque(maxlen=history_blocks)  # one tuple of percentile rewards per block
+        self.next_base_fee = None
+        self.block_number = None
+        self.updated_at = 0.0
+        self.task = None
+        self.refreshing = None
+
+    def ingest(self, history, block_number):
+        # baseFeePerGas has one more entry than reward: the last one is the base fee of the next block
+        base_fees = list(history["baseFeePerGas"])
+        self.base_fees.clear()
+        self.base_fees.extend(base_fees[:-1])
+        self.next_base_fee = base_fees[-1] if base_fees else None
+        self.rewards.clear()
+        self.rewards.extend(tuple(block) for block in history.get("reward") or [])
+        self.block_number = block_number
+        self.updated_at = time.monotonic()
+
+    async def refresh(self):
+        block_number = await self.w3.eth.block_number
+        if block_number == self.block_number:
+            self.updated_at = time.monotonic()
+            return False
+        history = await self.w3.eth.fee_history(self.history_blocks, "latest", list(self.percentiles))
+        self.ingest(history, block_number)
+        return True
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Fee oracle refresh failed: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return self.task
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    def priority_fee(self, percentile=50):
+        index = self.percentiles.index(percentile) if percentile in self.percentiles else len(self.percentiles) // 2
+        # Empty blocks report a zero reward; they say nothing about what it takes to get included
+        samples = [block[index] for block in self.rewards if block and block[index] > 0]
+        return int(median(samples)) if samples else FALLBACK_PRIORITY_FEE
+
+    def quote(self, percentile=50):
+        if self.next_base_fee is None:
+            return {'maxFeePerGas': FALLBACK_MAX_FEE, 'maxPriorityFeePerGas': FALLBACK_PRIORITY_FEE}
+        priority_fee = self.priority_fee(percentile)
+        # Headroom for the base fee rising over the next few blocks; unused max fee is never charged
+        return {
+            'maxFeePerGas': self.base_fee_multiplier * self.next_base_fee + priority_fee,
+            'maxPriorityFeePerGas': priority_fee
+        }
+
+    async def fees(self, percentile=50, max_age=None):
+        # Only the very first caller (before the background task has a snapshot) waits on RPC. Without the
+        # background task, max_age bounds how old the snapshot may be; concurrent callers share one refresh.
+        stale = self.next_base_fee is None or (max_age is not None and time.monotonic() - self.updated_at >= max_age)
+        if stale:
+            if self.refreshing is None or self.refreshing.done():
+                self.refreshing = asyncio.get_running_loop().create_task(self.refresh())
+            try:
+                await asyncio.shield(self.refreshing)
+            except Exception as e:
+                logger.warning(f"Fee oracle refresh failed, using {'fallback' if self.next_base_fee is None else 'last'} fees: {str(e)}")
+        return self.quote(percentile)
+
+    def status(self):
+        return {
+            "block": self.block_number,
+            "next_base_fee": self.next_base_fee,
+            "priority_fee": self.priority_fee() if self.rewards else None,
+            "age": round(time.monotonic() - self.updated_at, 1) if self.updated_at else None,
+        }
+
+class GasLimits:
+    # Gas limit per contract function (i.e. per selector): seeded with a default or a single
+    # estimate_gas, then refined from the gasUsed of confirmed receipts. For sized functions receipts
+    # can only raise the limit: the seeded default (or this call's own estimate) stays the floor
+    def __init__(self, defaults=None, headroom=1.25, window=50, fallback=500000, sized=SIZED_FUNCTIONS):
+        self.defaults = dict(defaults or {})
+        self.sized = set(sized)
+        self.headroom = headroom
+        self.window = window
+        self.fallback = fallback
+        self.used = {}  # name: deque of gasUsed from receipts
+        self.estimates = {}  # name: cached estimate_gas result
+
+    def observe(self, name, gas_used):
+        if not name or not gas_used:
+            return
+        self.used.setdefault(name, deque(maxlen=self.window)).append(int(gas_used))
+
+    def learned(self, name):
+        samples = self.used.get(name)
+        return int(max(samples) * self.headroom) if samples else None
+
+    def limit(self, name, estimate=None):
+        learned = self.learned(name)
+        if name in self.sized:
+            # Estimated on every call, since the arguments differ each time
+            floor = int(estimate() * self.headroom) if estimate is not None else self.defaults.get(name, self.fallback)
+            return max(learned or 0, floor)
+        if learned is not None:
+            return learned
+        if name in self.estimates:
+            return self.estimates[name]
+        if estimate is not None:
+            # estimate is a zero-argument callable returning estimate_gas; it runs once per function
+            self.estimates[name] = int(estimate() * self.headroom)
+            return self.estimates[name]
+        return self.defaults.get(name, self.fallback)
+
+    async def limit_async(self, name, estimate=None):
+        # limit() for AsyncWeb3: estimate returns an awaitable, and is only awaited the first time
+        # (every time for sized functions)
+        if estimate is not None and name in self.sized:
+            return max(self.learned(name) or 0, int(await estimate() * self.headroom))
+        if estimate is not None and name not in self.used and name not in self.estimates:
+            self.estimates[name] = int(await estimate() * self.headroom)
+        return self.limit(name)
+
+    def status(self):
+        return {name: {"samples": len(samples), "max_used": max(samples), "limit": self.limit(name)} for name, samples in self.used.items()}
@@ -0,0 +1,170 @@
+import math
+import heapq
+
+EARTH_RADIUS_KM = 6371.0088
+MICRODEGREES = 10**6
+
+def unit_vector(lat, lon):
+    # Degrees -> point on the unit sphere; the straight-line (chord) distance between two of these grows with
+    # the great-circle distance, so candidates are compared without any trigonometry
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+def km_to_chord(km):
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    # Degrees
+    x1, y1, z1 = unit_vector(lat1, lon1)
+    x2, y2, z2 = unit_vector(lat2, lon2)
+    return chord_to_km(math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2 + (z1 - z2) ** 2))
+
+class ClimbGrid:
+    # Climbs bucketed in a lat/lon grid of cell_deg cells, with coarser grids stacked on top (each cell covers
+    # branching x branching cells of the level below) up to a handful of cells for the whole globe.
+    # nearest() is a best-first search: cells and climbs share one heap keyed by (a lower bound on) their
+    # distance, so only the cells around the query are opened and the first k climbs popped are the answer.
+    def __init__(self, cell_deg=0.05, branching=4, levels=6):
+        self.cell = cell_deg
+        self.branching = branching
+        self.rows = math.ceil(180 / cell_deg)
+        self.cols = math.ceil(360 / cell_deg)
+        self.sizes = [cell_deg * branching ** level for level in range(levels)]
+        self.buckets = {}  # finest level: (row, col) -> {location_id: (x, y, z)}
+        self.counts = [{} for _ in range(levels - 1)]  # coarser levels: (row, col) -> climbs below that cell
+        self.points = {}  # location_id -> (row, col, item)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, location_id):
+        return location_id in self.points
+
+    def cell_of(self, lat, lon):
+        row = min(self.rows - 1, max(0, int((lat + 90) // self.cell)))
+        col = int((lon + 180) // self.cell) % self.cols
+        return row, col
+
+    def add(self, location_id, lat, lon, item=None):
+        # Degrees; re-adding an id moves it (events and a full rebuild may both report the same climb)
+        self.remove(location_id)
+        row, col = self.cell_of(lat, lon)
+        self.buckets.setdefault((row, col), {})[location_id] = unit_vector(lat, lon)
+        for counts in self.counts:
+            row, col = row // self.branching, col // self.branching
+            counts[(row, col)] = counts.get((row, col), 0) + 1
+        self.points[location_id] = (*self.cell_of(lat, lon), item)
+
+    def add_microdegrees(self, location_id, latitude, longitude, item=None):
+        self.add(location_id, latitude / MICRODEGREES, longitude / MICRODEGREES, item)
+
+    def remove(self, location_id):
+        entry = self.points.pop(location_id, None)
+        if entry is None:
+            return
+        row, col, _ = entry
+        bucket = self.buckets[(row, col)]
+        del bucket[location_id]
+        if not bucket:
+            del self.buckets[(row, col)]
+        for counts in self.counts:
+            row, col = row // self.branching, col // self.branching
+            counts[(row, col)] -= 1
+            if not counts[(row, col)]:
+                del counts[(row, col)]
+
+    def window(self, lat, lon, radius_km):
+        # Finest-level rows and columns that can hold a point within radius_km: a latitude band, and in longitude
+        # the half-width asin(sin(d) / cos(lat)) of the circle's bounding box, or every column once it reaches
+        # a pole. -> (first row, last row, [(first col, last col), ...] or None for every column)
+        d = radius_km / EARTH_RADIUS_KM
+        span = math.degrees(d)
+        low, _ = self.cell_of(max(-90.0, lat - span), lon)
+        high, col = self.cell_of(min(90.0, lat + span), lon)
+        cos_lat = math.cos(math.radians(lat))
+        if lat - span <= -90 or lat + span >= 90 or math.sin(d) >= cos_lat:
+            return low, high, None
+        half = int(math.degrees(math.asin(math.sin(d) / cos_lat)) // self.cell) + 1
+        first, last = col - half, col + half
+        if last - first + 1 >= self.cols:
+            return low, high, None
+        if first < 0:
+            return low, high, [(first + self.cols, self.cols - 1), (0, last)]
+        if last >= self.cols:
+            return low, high, [(first, self.cols - 1), (0, last - self.cols)]
+        return low, high, [(first, last)]
+
+    def inside(self, window, level, key):
+        scale = self.branching ** level
+        low, high, cols = window
+        row, col = key
+        if not low // scale <= row <= high // scale:
+            return False
+        return cols is None or any(first // scale <= col <= last // scale for first, last in cols)
+
+    def bound(self, lat, lon, level, key):
+        # Lower bound on the squared chord from the query to any point of the cell: the latitude gap alone,
+        # or the longitude gap dl between latitudes no further than phi from the equator, which is at least
+        # 2 * cos(phi) * sin(dl / 2) as a chord
+        size = self.sizes[level]
+        row, col = key
+        south, north = row * size - 90, min(90.0, (row + 1) * size - 90)
+        west, east = col * size - 180, min(180.0, (col + 1) * size - 180)
+        dlat = south - lat if lat < south else lat - north if lat > north else 0.0
+        dlon = 0.0 if west <= lon <= east else min((west - lon) % 360, (lon - east) % 360)
+        if not dlat and not dlon:
+            return 0.0
+        phi = math.radians(max(abs(lat), abs(south), abs(north)))
+        chord = max(2 * math.sin(math.radians(dlat) / 2), 2 * math.cos(phi) * math.sin(math.radians(min(180.0, dlon)) / 2))
+        return chord * chord
+
+    def children(self, level, key):
+        row, col = key
+        below = self.buckets if level == 1 else self.counts[level - 2]
+        for child_row in range(row * self.branching, (row + 1) * self.branching):
+            for child_col in range(col * self.branching, (col + 1) * self.branching):
+                if (child_row, child_col) in below:
+                    yield child_row, child_col
+
+    def nearest(self, lat, lon, k=5, radius_km=50.0):
+        # -> [(distance_km, location_id, item)] closest first, at most k, all within radius_km
+        if not self.points or k <= 0:
+            return []
+        qx, qy, qz = unit_vector(lat, lon)
+        limit = km_to_chord(radius_km) ** 2
+        top = len(self.counts)
+        # Entries are (squared chord, 0, location_id) for climbs and (lower bound, 1, level, key) for cells;
+        # a climb pops before any cell that could still hold something closer than it is
+        window = self.window(lat, lon, radius_km)
+        heap = []
+        for key in (self.counts[-1] if self.counts else self.buckets):
+            if not self.inside(window, top, key):
+                continue
+            bound = self.bound(lat, lon, top, key)
+            if bound <= limit:
+                heap.append((bound, 1, top, key))
+        heapq.heapify(heap)
+        found = []
+        while heap and len(found) < k:
+            entry = heapq.heappop(heap)
+            if entry[1] == 0:
+                found.append(entry)
+                continue
+            _, _, level, key = entry
+            if level == 0:
+                for location_id, (x, y, z) in self.buckets[key].items():
+                    squared = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+                    if squared <= limit:
+                        heapq.heappush(heap, (squared, 0, location_id))
+                continue
+            for child in self.children(level, key):
+                if not self.inside(window, level - 1, child):
+                    continue
+                bound = self.bound(lat, lon, level - 1, child)
+                if bound <= limit:
+                    heapq.heappush(heap, (bound, 1, level - 1, child))
+        return [(chord_to_km(math.sqrt(squared)), location_id, self.points[location_id][2]) for squared, _, location_id in found]
@@ -0,0 +1,118 @@
+import re
+from typing import NamedTuple
+
+# One numeric scale for every grading system, in YDS points: 5.9 -> 9.0, 5.10a -> 10.0, 5.10b -> 10.25,
+# 5.11d -> 11.75. French sport and V/Font boulder grades are placed on it through the usual conversion
+# tables, which are approximate by nature; a grade keeps its discipline so route and boulder filters stay apart.
+LETTERS = {"a": 0.0, "b": 0.25, "c": 0.5, "d": 0.75}
+
+FRENCH = {
+    "1": 2.0, "2": 3.0, "3": 4.0, "4a": 5.0, "4b": 6.0, "4c": 7.0, "5a": 7.5, "5b": 8.0, "5c": 9.0,
+    "6a": 10.0, "6a+": 10.25, "6b": 10.5, "6b+": 11.0, "6c": 11.25, "6c+": 11.5,
+    "7a": 11.75, "7a+": 12.0, "7b": 12.25, "7b+": 12.5, "7c": 12.75, "7c+": 13.0,
+    "8a": 13.25, "8a+": 13.5, "8b": 13.75, "8b+": 14.0, "8c": 14.25, "8c+": 14.5,
+    "9a": 14.75, "9a+": 15.0, "9b": 15.25, "9b+": 15.5, "9c": 15.75,
+}
+
+V_SCALE = {
+    -1: 9.0, 0: 10.0, 1: 11.0, 2: 11.5, 3: 12.0, 4: 12.25, 5: 12.75, 6: 13.0, 7: 13.25, 8: 13.5,
+    9: 13.75, 10: 14.0, 11: 14.25, 12: 14.5, 13: 14.75, 14: 15.0, 15: 15.25, 16: 15.5, 17: 15.75,
+}
+
+FONT = {  # Fontainebleau boulder grade -> V grade (VB is -1)
+    "3": -1, "4": 0, "4+": 0, "5": 1, "5+": 2, "6a": 3, "6a+": 3, "6b": 4, "6b+": 4, "6c": 5, "6c+": 5,
+    "7a": 6, "7a+": 7, "7b": 8, "7b+": 8, "7c": 9, "7c+": 10, "8a": 11, "8a+": 12, "8b": 13, "8b+": 14,
+    "8c": 15, "8c+": 16, "9a": 17,
+}
+
+YDS = re.compile(r"5\.(\d{1,2})([abcd](?:/[abcd])?)?([+-])?")
+V = re.compile(r"v(b|\d{1,2})(?:[/-]v?(\d{1,2}))?[+-]?")
+FONT_PREFIX = re.compile(r"(?:fb|font|f)\s*(?=\d)")
+FRENCH_GRADE = re.compile(r"(\d[abc]?\+?)(?:/(\d[abc]?\+?))?")
+
+class Grade(NamedTuple):
+    low: float
+    high: float
+    discipline: str  # "route" (YDS, French) or "boulder" (V, Font)
+
+    def overlaps(self, other):
+        return self.discipline == other.discipline and self.low <= other.high and other.low <= self.high
+
+def parse_yds(text):
+    match = YDS.fullmatch(text)
+    if not match:
+        return None
+    number, letters, modifier = float(match.group(1)), match.group(2), match.group(3)
+    if number > 15:
+        return None
+    if letters:
+        first, _, last = letters.partition("/")
+        return Grade(number + LETTERS[first], number + LETTERS[last or first], "route")
+    if number < 10:
+        # 5.9 and below have no letter grades; + and - sit between the whole grades
+        value = number + {"+": 0.5, "-": -0.25}.get(modifier, 0.0)
+        return Grade(value, value, "route")
+    if modifier == "-":
+        return Grade(number, number + 0.25, "route")
+    if modifier == "+":
+        return Grade(number + 0.5, number + 0.75, "route")
+    return Grade(number, number + 0.75, "route")  # "5.10" covers 5.10a to 5.10d
+
+def parse_v(text):
+    match = V.fullmatch(text)
+    if not match:
+        return None
+    first = -1 if match.group(1) == "b" else int(match.group(1))
+    last = int(match.group(2)) if match.group(2) else first
+    if first not in V_SCALE or last not in V_SCALE:
+        return None
+    return Grade(V_SCALE[min(first, last)], V_SCALE[max(first, last)], "boulder")
+
+def parse_table(text, table, convert, discipline):
+    match = FRENCH_GRADE.fullmatch(text)
+    if not match or match.group(1) not in table or (match.group(2) and match.group(2) not in table):
+        return None
+    low, high = convert(table[match.group(1)]), convert(table[match.group(2) or match.group(1)])
+    return Grade(min(low, high), max(low, high), discipline)
+
+def parse_grade(text):
+    # "5.10a", "5.10a/b", "5.10+", "5.9", "V4", "V4-5", "VB", "6a+", "7a/7a+" (French sport),
+    # "7A", "Fb 7a", "Font 6b+" (Fontainebleau: upper-case letter or a prefix) -> Grade, or None for free text
+    raw = str(text or "").strip()
+    if not raw:
+        return None
+    lowered = raw.lower()
+    grade = parse_yds(lowered) or parse_v(lowered)
+    if grade:
+        return grade
+    prefixed = FONT_PREFIX.match(lowered)
+    if prefixed or any(c in "ABC" for c in raw):
+        return parse_table(lowered[prefixed.end():] if prefixed else lowered, FONT, V_SCALE.__getitem__, "boulder")
+    return parse_table(lowered, FRENCH, float, "route")
+
+def parse_grade_range(text):
+    # "5.10-5.11", "V3-V5", "6a-6c+" or a single grade -> Grade spanning both ends, or None.
+    # A "-" can also be a modifier ("5.10-") or part of a V range ("V4-5"), so each split point is tried.
+    raw = str(text or "").strip()
+    grade = parse_grade(raw)
+    if grade:
+        return grade
+    for i, char in enumerate(raw):
+        if char != "-":
+            continue
+        first, last = parse_grade(raw[:i]), parse_grade(raw[i + 1:])
+        if first and last and first.discipline == last.discipline:
+            return Grade(min(first.low, last.low), max(first.high, last.high), first.discipline)
+    return None
+
+def grade_label(grade):
+    # Canonical spelling of a grade's low end: YDS for routes, V for boulders
+    if grade is None:
+        return ""
+    if grade.discipline == "boulder":
+        v = min(V_SCALE, key=lambda key: abs(V_SCALE[key] - grade.low))
+        return "VB" if v < 0 else f"V{v}"
+    number = int(grade.low)
+    if number < 10:
+        return f"5.{int(grade.low + 0.25)}"  # 5.9- (8.75) and 5.9+ (9.5) are both 5.9
+    return f"5.{number}{'abcd'[min(3, int(round((grade.low - number) * 4)))]}"
@@ -0,0 +1,27 @@
+from web3.logs import DISCARD
+
+# Events that announce a newly created entity, and the argument carrying its id
+CREATED_EVENTS = {
+    "climb": (("ClimbingLocationCreated", "ClimbingLocationCreatedEnhanced"), "locationId"),
+    "journal": (("JournalEntryAdded", "JournalEntryAddedEnhanced"), "entryId"),
+    # main.py's ABI calls the richer tournament event TournamentCreatedEmbedded, contract.py's TournamentCreatedEnhanced
+    "tournament": (("TournamentCreated", "TournamentCreatedEnhanced", "TournamentCreatedEmbedded"), "tournamentId"),
+}
+
+def decode_events(contract, receipt, event_names):
+    # Decode only logs emitted by `contract`; logs of other contracts (e.g. the token) are skipped
+    address = contract.address.lower()
+    for name in event_names:
+        try:
+            event = getattr(contract.events, name)
+        except AttributeError:
+            continue  # ABI without this variant
+        for decoded in event().process_receipt(receipt, errors=DISCARD):
+            if decoded.address.lower() == address:
+                yield decoded
+
+def created_entity_id(contract, receipt, entry_type):
+    event_names, id_arg = CREATED_EVENTS[entry_type]
+    for decoded in decode_events(contract, receipt, event_names):
+        return decoded.args[id_arg]
+    return None
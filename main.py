@@ -5,14 +5,15 @@ import asyncio
 import time
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import Response, FileResponse
+from fastapi.responses import Response, FileResponse, StreamingResponse
 from contextlib import asynccontextmanager
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity, ReplyKeyboardMarkup, KeyboardButton
 from telegram.constants import ChatAction
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, ConversationHandler
 import aiohttp
 from web3 import AsyncWeb3
-from web3.providers.async_rpc import AsyncHTTPProvider
+from eth_utils import event_abi_to_log_topic
+from eth_abi import decode as abi_decode
 from dotenv import load_dotenv
 import html
 import uvicorn
@@ -22,6 +23,23 @@ import subprocess
 from datetime import datetime
 import asyncpg  # Added for Postgres
 from tenacity import retry, wait_exponential, stop_after_attempt  # Added for retries
+from ratelimit import CommandRateLimiter, parse_costs
+from middleware import CommandRequest, pipeline, typing_indicator
+from rpc import RpcHealth, MultiEndpointProvider
+from receipts import ReceiptTracker
+from logs import created_entity_id
+from calldata import CalldataCodec
+from fees import FeeOracle, GasLimits
+from push import TxNotifier, sse
+from pending import PendingStore
+from geo import ClimbGrid
+from catalogue import ClimbCatalogue, SORTS
+from search import SearchIndex, tokenize
+from grades import parse_grade, parse_grade_range, grade_label
+from standings import TournamentStore, ZERO_ADDRESS
+from comments import CommentIndex
+from activity import ActivityIndex, KINDS
+from metrics import time_command, rpc_metrics_middleware, init_pg_connection, TimedHTTPXRequest, TELEGRAM_LATENCY, render_latest
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -34,6 +52,8 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 API_BASE_URL = os.getenv("API_BASE_URL")
 CHAT_HANDLE = os.getenv("CHAT_HANDLE")
 MONAD_RPC_URL = os.getenv("MONAD_RPC_URL")
+# Comma-separated list of RPC endpoints; MONAD_RPC_URL alone still works
+MONAD_RPC_URLS = [url.strip() for url in os.getenv("MONAD_RPC_URLS", MONAD_RPC_URL or "").split(",") if url.strip()]
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
 TOURS_TOKEN_ADDRESS = os.getenv("TOURS_TOKEN_ADDRESS")
 OWNER_ADDRESS = os.getenv("OWNER_ADDRESS")
@@ -42,6 +62,23 @@ PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 WALLET_CONNECT_PROJECT_ID = os.getenv("WALLET_CONNECT_PROJECT_ID")
 EXPLORER_URL = "https://testnet.monadexplorer.com"
 DATABASE_URL = os.getenv("DATABASE_URL")
+RATE_LIMIT_USER_CAPACITY = float(os.getenv("RATE_LIMIT_USER_CAPACITY", "10"))
+RATE_LIMIT_USER_REFILL = float(os.getenv("RATE_LIMIT_USER_REFILL", "0.2"))  # tokens per second
+RATE_LIMIT_GLOBAL_CAPACITY = float(os.getenv("RATE_LIMIT_GLOBAL_CAPACITY", "200"))
+RATE_LIMIT_GLOBAL_REFILL = float(os.getenv("RATE_LIMIT_GLOBAL_REFILL", "20"))  # tokens per second
+RPC_PROBE_INTERVAL = int(os.getenv("RPC_PROBE_INTERVAL", "15"))  # seconds
+RECEIPT_WAIT_TIMEOUT = int(os.getenv("RECEIPT_WAIT_TIMEOUT", "120"))  # seconds
+TX_STREAM_KEEPALIVE = int(os.getenv("TX_STREAM_KEEPALIVE", "20"))  # seconds between SSE comments on an idle stream
+CONTRACT_READ_CHUNK = int(os.getenv("CONTRACT_READ_CHUNK", "50"))  # view calls per JSON-RPC batch when loading an index
+NEARBY_K = int(os.getenv("NEARBY_K", "5"))  # climbs listed by /nearby
+NEARBY_RADIUS_KM = float(os.getenv("NEARBY_RADIUS_KM", "50"))
+NEARBY_MAX_RADIUS_KM = float(os.getenv("NEARBY_MAX_RADIUS_KM", "500"))
+SEARCH_RESULTS = int(os.getenv("SEARCH_RESULTS", "10"))  # hits listed by /search
+COMMENTS_PER_PAGE = int(os.getenv("COMMENTS_PER_PAGE", "10"))  # comments per /viewjournal page
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "10"))  # wallets listed per /leaderboard table
+ACTIVITY_PER_PAGE = int(os.getenv("ACTIVITY_PER_PAGE", "10"))  # timeline lines per /myactivity page
+EVENT_FROM_BLOCK = int(os.getenv("EVENT_FROM_BLOCK", "0"))  # first block of the event log backfills (the contract's deploy block)
+EVENT_LOG_STEP = int(os.getenv("EVENT_LOG_STEP", "500"))  # blocks per eth_getLogs call in those backfills
 
 # Log environment variables
 logger.info("Environment variables:")
@@ -49,6 +86,7 @@ logger.info(f"TELEGRAM_TOKEN: {'Set' if TELEGRAM_TOKEN else 'Missing'}")
 logger.info(f"API_BASE_URL: {'Set' if API_BASE_URL else 'Missing'}")
 logger.info(f"CHAT_HANDLE: {'Set' if CHAT_HANDLE else 'Missing'}")
 logger.info(f"MONAD_RPC_URL: {'Set' if MONAD_RPC_URL else 'Missing'}")
+logger.info(f"MONAD_RPC_URLS: {len(MONAD_RPC_URLS)} endpoint(s)")
 logger.info(f"CONTRACT_ADDRESS: {'Set' if CONTRACT_ADDRESS else 'Missing'}")
 logger.info(f"TOURS_TOKEN_ADDRESS: {'Set' if TOURS_TOKEN_ADDRESS else 'Missing'}")
 logger.info(f"OWNER_ADDRESS: {'Set' if OWNER_ADDRESS else 'Missing'}")
@@ -60,7 +98,7 @@ missing_vars = []
 if not TELEGRAM_TOKEN: missing_vars.append("TELEGRAM_TOKEN")
 if not API_BASE_URL: missing_vars.append("API_BASE_URL")
 if not CHAT_HANDLE: missing_vars.append("CHAT_HANDLE")
-if not MONAD_RPC_URL: missing_vars.append("MONAD_RPC_URL")
+if not MONAD_RPC_URLS: missing_vars.append("MONAD_RPC_URL")
 if not CONTRACT_ADDRESS: missing_vars.append("CONTRACT_ADDRESS")
 if not TOURS_TOKEN_ADDRESS: missing_vars.append("TOURS_TOKEN_ADDRESS")
 if not OWNER_ADDRESS: missing_vars.append("OWNER_ADDRESS")
@@ -932,34 +970,108 @@ TOURS_ABI = [
     }
 ]
 
+# Selector table for classifying and decoding pending/submitted calldata
+calldata_codec = CalldataCodec(contract=CONTRACT_ABI, tours=TOURS_ABI)
+
+# Topic hash (hex, no 0x) -> event name, computed from the ABI so event matching follows the contract's signatures
+CONTRACT_EVENTS = {event_abi_to_log_topic(abi).hex(): abi["name"] for abi in CONTRACT_ABI if abi.get("type") == "event"}
+TOURNAMENT_EVENTS = [name for name in CONTRACT_EVENTS.values() if name.startswith("Tournament")]
+
+def log_event_name(log):
+    # HexBytes.hex() carries a 0x prefix in some hexbytes versions and not in others
+    return CONTRACT_EVENTS.get(log['topics'][0].hex().removeprefix("0x"))
+
 # Global blockchain variables
 w3 = None
 contract = None
 tours_contract = None
 pool = None
 sessions = {}
-pending_wallets = {}
+pending_store = PendingStore()
 journal_data = {}
 reverse_sessions = {}  # wallet: user_id mapping for event PMs
 webhook_failed = False
 last_processed_block = 0
 processed_updates = set()  # To prevent duplicate processing
-climb_cache = None  # Cache for climbs
+climb_cache = None  # ClimbCatalogue of every climb, rendered per /findaclimb request
 journal_cache = None  # Cache for journals
 cache_timestamp = 0
 CACHE_TTL = 300  # 5 minutes
+climb_grid = ClimbGrid()  # Spatial index of climbs for /nearby; loaded on first use, then kept current by monitor_events
+climb_grid_ready = False
+climb_grid_lock = asyncio.Lock()
+# Inverted index of journals and climbs for /search; loaded on first use, then kept current by monitor_events
+search_index = SearchIndex(weights={"name": 3.0, "location": 2.0, "difficulty": 1.5, "content": 1.0})
+search_index_ready = False
+search_index_lock = asyncio.Lock()
+comment_index = CommentIndex()  # Comment threads for /viewjournal; each read once on first view, then kept current by monitor_events
+comment_loads = {}  # entry id -> task reading its thread, shared by concurrent first views
+# Tournaments, participants and leaderboards materialized from events; backfilled by a scheduled job, then kept current by monitor_events
+tournament_store = TournamentStore()
+tournaments_ready = False  # history backfilled and every ended tournament's winner read
+tournament_lock = asyncio.Lock()
+# Every contract event filed by wallet for /myactivity; the same scheduled scan of the chain's history feeds
+# tournament_store, then monitor_events keeps both current
+activity_index = ActivityIndex()
+activity_ready = False
+activity_lock = asyncio.Lock()
+activity_log_gaps = None  # block ranges the backfill still has to read; None until it first runs
+rpc_health = RpcHealth()
+receipt_tracker = None
+confirming_tx_hashes = set()  # hashes a confirm_tx_hash task is already waiting on
+fee_oracle = None
+tx_notifier = TxNotifier()
+# Starting gas limits per contract function until confirmed receipts refine them
+gas_limits = GasLimits({
+    "createProfile": 300000,
+    "buyTours": 300000,
+    "transfer": 100000,
+    "approve": 100000,
+    "addComment": 200000,
+    "addJournalEntryWithDetails": 500000,
+    "createClimbingLocation": 500000,
+    "purchaseClimbingLocation": 200000,
+    "createTournament": 200000,
+    "joinTournament": 200000,
+    "endTournament": 200000,
+})
+
+# Token cost per command, roughly proportional to the RPC/DB work it triggers.
+# Override with COMMAND_COSTS="findaclimb=8,journals=8"
+COMMAND_COSTS = {
+    "start": 1, "tutorial": 1, "help": 1, "ping": 1, "debug": 1, "connectwallet": 1,
+    "forcewebhook": 3, "clearcache": 1,
+    "balance": 2, "buyTours": 3, "sendTours": 3, "createprofile": 3,
+    "journal": 2, "comment": 3, "buildaclimb": 5, "purchaseclimb": 3,
+    "findaclimb": 5, "journals": 5, "viewjournal": 3, "viewclimb": 2, "mypurchases": 4,
+    "createtournament": 3, "tournaments": 4, "jointournament": 3, "endtournament": 3, "nearby": 2,
+    "search": 3, "leaderboard": 2, "myactivity": 2,
+}
+COMMAND_COSTS.update(parse_costs(os.getenv("COMMAND_COSTS")))
+command_limiter = CommandRateLimiter(
+    costs=COMMAND_COSTS,
+    user_capacity=RATE_LIMIT_USER_CAPACITY,
+    user_refill=RATE_LIMIT_USER_REFILL,
+    global_capacity=RATE_LIMIT_GLOBAL_CAPACITY,
+    global_refill=RATE_LIMIT_GLOBAL_REFILL,
+)
 
 @retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(5))
 async def initialize_web3():
-    global w3, contract, tours_contract
-    if not MONAD_RPC_URL or not CONTRACT_ADDRESS or not TOURS_TOKEN_ADDRESS:
+    global w3, contract, tours_contract, receipt_tracker, fee_oracle
+    if not MONAD_RPC_URLS or not CONTRACT_ADDRESS or not TOURS_TOKEN_ADDRESS:
         logger.error("Cannot initialize Web3: missing blockchain-related environment variables")
         return False
     try:
-        w3 = AsyncWeb3(AsyncHTTPProvider(MONAD_RPC_URL))
+        w3 = AsyncWeb3(MultiEndpointProvider(MONAD_RPC_URLS))
+        w3.middleware_onion.add(rpc_metrics_middleware, name="metrics")
+        w3.middleware_onion.add(rpc_health.middleware, name="health")
+        receipt_tracker = ReceiptTracker(w3)
+        fee_oracle = FeeOracle(w3)
         is_connected = await w3.is_connected()
         if is_connected:
             logger.info("AsyncWeb3 initialized successfully")
+            fee_oracle.start()
             contract = w3.eth.contract(address=w3.to_checksum_address(CONTRACT_ADDRESS), abi=CONTRACT_ABI)
             tours_contract = w3.eth.contract(address=w3.to_checksum_address(TOURS_TOKEN_ADDRESS), abi=TOURS_ABI)
             logger.info("Contracts initialized successfully")
@@ -975,6 +1087,67 @@ def escape_html(text):
         return ""
     return html.escape(str(text))
 
+async def reply_throttled(update: Update, command, retry_after):
+    # Cheap reply for throttled users: serve whatever is already cached, never touch RPC or DB
+    cached = {"findaclimb": climb_cache.render_rows(climb_cache.query()) if climb_cache else None, "journals": journal_cache}.get(command)
+    if cached:
+        await update.message.reply_text("\n\n".join(cached), parse_mode="Markdown")
+        return
+    await update.message.reply_text(f"Slow down! /{command} is available again in {int(retry_after) + 1}s. ⏳")
+
+async def rate_limit(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest, call_next):
+    retry_after = command_limiter.check(req.user_id or "anonymous", req.command)
+    if retry_after:
+        logger.info(f"Throttled /{req.command} from user {req.user_id}, retry after {retry_after:.1f}s")
+        if update.message and command_limiter.should_notify(req.user_id, req.command, retry_after):
+            await reply_throttled(update, req.command, retry_after)
+        return
+    return await call_next()
+
+async def require_api(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest, call_next):
+    if not API_BASE_URL:
+        logger.error(f"API_BASE_URL missing, /{req.command} command disabled")
+        await update.message.reply_text(f"/{req.command} is unavailable due to configuration issues. Try again later! 😅")
+        logger.info(f"/{req.command} failed due to missing API_BASE_URL, took {req.elapsed():.2f} seconds")
+        return
+    return await call_next()
+
+def require_web3(tours=False):
+    async def middleware(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest, call_next):
+        if not w3 or not contract or (tours and not tours_contract):
+            logger.error(f"Web3 or contract not initialized, /{req.command} command disabled")
+            await update.message.reply_text("Blockchain connection unavailable. Try again later! 😅")
+            logger.info(f"/{req.command} failed due to Web3 issues, took {req.elapsed():.2f} seconds")
+            return
+        if not rpc_health.healthy:
+            logger.error(f"RPC provider unhealthy ({rpc_health.last_error}), /{req.command} command disabled")
+            await update.message.reply_text("Blockchain connection failed. Try again later or contact support at <a href=\"https://t.me/empowertourschat\">EmpowerTours Chat</a>. 😅", parse_mode="HTML")
+            logger.info(f"/{req.command} failed due to Web3 connection, took {req.elapsed():.2f} seconds")
+            return
+        return await call_next()
+    return middleware
+
+def resolve_wallet(required=True):
+    # Resolve session, wallet and checksum address once for the whole handler
+    async def middleware(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest, call_next):
+        req.session = await get_session(req.user_id)
+        req.wallet_address = req.session.get("wallet_address") if req.session else None
+        if req.wallet_address:
+            try:
+                req.checksum_address = AsyncWeb3.to_checksum_address(req.wallet_address)
+            except Exception as e:
+                logger.error(f"Error converting wallet address to checksum: {str(e)}")
+                await update.message.reply_text(f"Invalid wallet address format: {str(e)}. Try /connectwallet again. 😅")
+                logger.info(f"/{req.command} failed due to checksum error, took {req.elapsed():.2f} seconds")
+                return
+            logger.info(f"Wallet address for user {req.user_id}: {req.checksum_address}")
+        elif required:
+            await update.message.reply_text("No wallet connected. Use /connectwallet first! 🪙")
+            logger.info(f"/{req.command} failed due to missing wallet, took {req.elapsed():.2f} seconds")
+            return
+        return await call_next()
+    return middleware
+
 async def send_notification(chat_id, message):
     async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
         try:
@@ -983,17 +1156,20 @@ async def send_notification(chat_id, message):
                 "text": message,
                 "parse_mode": "HTML"
             }
-            async with session.post(
-                f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage",
-                json=payload
-            ) as response:
+            # Only the request counts towards Telegram latency, not reading the reply back or logging it
+            with TELEGRAM_LATENCY.labels("sendMessage").time():
+                response = await session.post(
+                    f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage",
+                    json=payload
+                )
+            async with response:
                 response_data = await response.json()
-                logger.info(f"Sent notification to chat {chat_id}: payload={json.dumps(payload, default=str)}, response={response_data}")
-                if response_data.get("ok"):
-                    return response_data
-                else:
-                    logger.error(f"Failed to send notification to chat {chat_id}: {response_data}")
-                    return response_data
+            logger.info(f"Sent notification to chat {chat_id}: payload={json.dumps(payload, default=str)}, response={response_data}")
+            if response_data.get("ok"):
+                return response_data
+            else:
+                logger.error(f"Failed to send notification to chat {chat_id}: {response_data}")
+                return response_data
         except Exception as e:
             logger.error(f"Error in send_notification to chat {chat_id}: {str(e)}")
             return {"ok": False, "error": str(e)}
@@ -1059,10 +1235,8 @@ async def reset_webhook():
         webhook_failed = True
         return False
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /start command from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         welcome_message = (
             f"Welcome to EmpowerTours! 🧗\n"
@@ -1078,14 +1252,13 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def ping(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /ping command from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def ping(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         webhook_ok = await check_webhook()
         status = "Webhook OK" if webhook_ok else "Webhook failed, using polling"
-        await update.message.reply_text(f"Pong! Bot is running. {status}. Try /start or /createprofile.")
+        rpc_status = "RPC OK" if rpc_health.healthy else f"RPC degraded ({rpc_health.error_rate():.0%} errors)"
+        await update.message.reply_text(f"Pong! Bot is running. {status}, {rpc_status}. Try /start or /createprofile.")
         logger.info(f"Sent /ping response to user {update.effective_user.id}, took {time.time() - start_time:.2f} seconds")
     except Exception as e:
         logger.error(f"Error in /ping: {str(e)}, took {time.time() - start_time:.2f} seconds")
@@ -1093,10 +1266,8 @@ async def ping(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def clearcache(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /clearcache command from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def clearcache(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         await update.message.reply_text("Clearing cache with dummy messages to reset Telegram responses.")
         await send_notification(update.effective_chat.id, "Dummy message 1 to clear Telegram cache.")
@@ -1111,10 +1282,8 @@ async def clearcache(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def forcewebhook(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /forcewebhook command from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def forcewebhook(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         await update.message.reply_text("Attempting to force reset webhook...")
         webhook_success = await reset_webhook()
@@ -1129,9 +1298,8 @@ async def forcewebhook(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def debug_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
+async def debug_command(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     command_text = update.message.text if update.message else "Unknown command"
     logger.info(f"Received command: {command_text} from user {update.effective_user.id} in chat {update.effective_chat.id}")
     try:
@@ -1147,12 +1315,10 @@ async def debug_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.effective_message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def tutorial(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /tutorial command from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def tutorial(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
-        if not CHAT_HANDLE or not MONAD_RPC_URL:
+        if not CHAT_HANDLE or not MONAD_RPC_URLS:
             logger.error("CHAT_HANDLE or MONAD_RPC_URL missing, /tutorial command limited")
             await update.message.reply_text("Tutorial unavailable due to missing configuration (CHAT_HANDLE or MONAD_RPC_URL). Try /help! 😅")
             logger.info(f"/tutorial failed due to missing config, took {time.time() - start_time:.2f} seconds")
@@ -1176,13 +1342,17 @@ async def tutorial(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "- /comment id your comment - Comment on a journal (0.1 $MON)\n"
             "- /buildaclimb name difficulty - Create a climb (10 $TOURS)\n"
             "- /purchaseclimb id - Buy a climb (10 $TOURS)\n"
-            "- /findaclimb - List available climbs\n"
+            "- /findaclimb [newest|popular] [difficulty:value] [grade:range] - List available climbs\n"
+            "- /nearby [radius_km] [count] - Share your location to find the closest climbs\n"
             "- /journals - List all journal entries\n"
-            "- /viewjournal id - View a journal entry and its comments\n"
+            "- /search terms - Find journals and climbs by crag, content, location or difficulty\n"
+            "- /viewjournal id [page] - View a journal entry and its comments, a page at a time\n"
             "- /viewclimb id - View a specific climb\n"
             "- /mypurchases - View your purchased climbs\n"
+            "- /myactivity [climbs|journals|comments|purchases|tournaments|profile] [page] - Your on-chain history, newest first\n"
             "- /createtournament fee - Start a tournament with an entry fee in $TOURS (e.g., /createtournament 10 for 10 $TOURS per participant)\n"
-            "- /tournaments - List all tournaments with IDs and participant counts\n"
+            "- /tournaments [active] - List all tournaments (or only active ones) with IDs and participant counts\n"
+            "- /leaderboard - Top tournament winners by wins and by $TOURS won\n"
             "- /jointournament id - Join a tournament by paying the entry fee\n"
             "- /endtournament id winner - End a tournament (owner only) and award the prize to the winner’s wallet address (e.g., /endtournament 1 0x5fE8373C839948bFCB707A8a8A75A16E2634A725)\n"
             "- /balance - Check your $MON and $TOURS balance\n"
@@ -1197,10 +1367,8 @@ async def tutorial(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error in tutorial: {error_msg}. Try again or use /help! 😅 Contact support at {support_link}.", parse_mode="HTML")
 
-async def help(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /help command from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def help(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         help_text = (
             "<b>EmpowerTours Commands</b>\n"
@@ -1214,13 +1382,17 @@ async def help(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "/buildaclimb name difficulty - Create a new climb with name, difficulty, and optional photo/location (10 $TOURS)\n\n"
             "/comment id comment - Comment on a journal (0.1 $MON)\n\n"
             "/purchaseclimb id - Buy a climb (10 $TOURS)\n\n"
-            "/findaclimb - List available climbs\n\n"
+            "/findaclimb [newest|popular] [difficulty:value] [grade:range] - List available climbs, optionally sorted or filtered; grade:5.10-5.11 also matches the same range graded in French, and grade:V3-V5 in Font\n\n"
+            "/nearby [radius_km] [count] - Share your location to find the closest climbs (default 50 km, 5 climbs)\n\n"
             "/journals - List all journal entries\n\n"
-            "/viewjournal id - View a journal entry and its comments\n\n"
+            "/search terms - Find journals and climbs by crag, content, location or difficulty (e.g., /search eldorado 5.10)\n\n"
+            "/viewjournal id [page] - View a journal entry and its comments; long threads are paged (e.g., /viewjournal 3 2)\n\n"
             "/viewclimb id - View a specific climb\n\n"
             "/mypurchases - View your purchased climbs\n\n"
+            "/myactivity [climbs|journals|comments|purchases|tournaments|profile] [page] - Your climbs, journals, comments, purchases and tournaments, newest first (e.g., /myactivity comments 2)\n\n"
             "/createtournament fee - Start a tournament with an entry fee in $TOURS (e.g., /createtournament 10 sets a 10 $TOURS fee per participant)\n\n"
-            "/tournaments - List all tournaments with IDs and participant counts\n\n"
+            "/tournaments [active] - List all tournaments (or only active ones) with IDs and participant counts\n\n"
+            "/leaderboard - Top tournament winners by number of wins and by $TOURS won\n\n"
             "/jointournament id - Join a tournament by paying the entry fee in $TOURS\n\n"
             "/endtournament id winner - End a tournament (owner only) and award the prize pool to the winner’s wallet address (e.g., /endtournament 1 0x5fE8373C839948bFCB707A8a8A75A16E2634A725)\n\n"
             "/balance - Check wallet balance ($MON, $TOURS, profile status)\n\n"
@@ -1238,15 +1410,8 @@ async def help(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def connect_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /connectwallet command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /connectwallet command disabled")
-        await update.message.reply_text("Wallet connection unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/connectwallet failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
+async def connect_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         base_url = API_BASE_URL.rstrip('/')
@@ -1264,7 +1429,7 @@ async def connect_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(message, reply_markup=reply_markup, parse_mode="HTML")
         logger.info(f"Sent /connectwallet response to user {update.effective_user.id}: {message}, took {time.time() - start_time:.2f} seconds")
         await set_pending_wallet(user_id, {"awaiting_wallet": True, "timestamp": time.time()})
-        logger.info(f"Added user {user_id} to pending_wallets: {pending_wallets.get(user_id)}")
+        logger.info(f"Added user {user_id} to pending_txs: {pending_store.get(user_id)}")
     except Exception as e:
         logger.error(f"Error in /connectwallet for user {user_id}: {str(e)}, took {time.time() - start_time:.2f} seconds")
         error_msg = html.escape(str(e))
@@ -1300,20 +1465,8 @@ async def handle_wallet_address(user_id: str, wallet_address: str, context: Cont
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await context.bot.send_message(user_id, f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def buy_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /buyTours command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /buyTours command disabled")
-        await update.message.reply_text("Buying $TOURS unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/buyTours failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract or not tours_contract:
-        logger.error("Web3 or contract not initialized, /buyTours command disabled")
-        await update.message.reply_text("Buying $TOURS unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/buyTours failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def buy_tours(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         args = context.args
@@ -1329,31 +1482,8 @@ async def buy_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("Invalid amount. Use a positive number (e.g., /buyTours 10 for 10 $TOURS). 😅")
             logger.info(f"/buyTours failed due to invalid amount, took {time.time() - start_time:.2f} seconds")
             return
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("No wallet connected. Use /connectwallet first! 🪙")
-            logger.info(f"/buyTours failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        logger.info(f"Wallet address for user {user_id}: {wallet_address}")
 
-        # Verify Web3 connection
-        is_connected = await w3.is_connected()
-        if not is_connected:
-            logger.error("Web3 not connected to Monad testnet")
-            await update.message.reply_text("Blockchain connection failed. Try again later or contact support at <a href=\"https://t.me/empowertourschat\">EmpowerTours Chat</a>. 😅", parse_mode="HTML")
-            logger.info(f"/buyTours failed due to Web3 connection, took {time.time() - start_time:.2f} seconds")
-            return
-
-        # Ensure checksum address
-        try:
-            checksum_address = w3.to_checksum_address(wallet_address)
-            logger.info(f"Using contract address: {contract.address}")
-        except Exception as e:
-            logger.error(f"Error converting wallet address to checksum: {str(e)}")
-            await update.message.reply_text(f"Invalid wallet address format: {str(e)}. Try /connectwallet again. 😅")
-            logger.info(f"/buyTours failed due to checksum error, took {time.time() - start_time:.2f} seconds")
-            return
+        checksum_address = req.checksum_address
 
         # Check profile existence with $TOURS balance first
         profile_exists = False
@@ -1411,7 +1541,7 @@ async def buy_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
             mon_required = (amount * tours_price) // 10**18
             mon_balance = await w3.eth.get_balance(checksum_address)
             logger.info(f"$MON balance for {checksum_address}: {mon_balance / 10**18} $MON")
-            if mon_balance < mon_required + (300000 * await w3.eth.gas_price):
+            if mon_balance < mon_required + gas_limits.limit("buyTours") * fee_oracle.quote()['maxFeePerGas']:
                 await update.message.reply_text(
                     f"Insufficient $MON balance. You have {mon_balance / 10**18} $MON, need {mon_required / 10**18} $MON plus gas (~0.015 $MON). Top up at https://testnet.monad.xyz/faucet. 😅"
                 )
@@ -1474,8 +1604,8 @@ async def buy_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 'from': checksum_address,
                 'value': mon_required,
                 'nonce': nonce,
-                'gas': 300000,
-                'gas_price': await w3.eth.gas_price
+                'gas': gas_limits.limit("buyTours"),
+                **(await fee_oracle.fees())
             })
             logger.info(f"Transaction built for user {user_id}: {json.dumps(tx, default=str)}")
             await set_pending_wallet(user_id, {
@@ -1502,20 +1632,8 @@ async def buy_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Unexpected error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/buyTours failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def send_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /sendTours command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /sendTours command disabled")
-        await update.message.reply_text("Sending $TOURS unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/sendTours failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not tours_contract:
-        logger.error("Web3 or tours_contract not initialized, /sendTours command disabled")
-        await update.message.reply_text("Sending $TOURS unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/sendTours failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def send_tours(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         args = context.args
@@ -1530,25 +1648,10 @@ async def send_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("Invalid amount. Use a number (e.g., /sendTours 0x123...456 10 for 10 $TOURS). 😅")
             logger.info(f"/sendTours failed due to invalid amount, took {time.time() - start_time:.2f} seconds")
             return
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("No wallet connected. Use /connectwallet first! 🪙")
-            logger.info(f"/sendTours failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        logger.info(f"Wallet address for user {user_id}: {wallet_address}")
 
-        # Verify Web3 connection
-        is_connected = await w3.is_connected()
-        if not is_connected:
-            logger.error("Web3 not connected to Monad testnet")
-            await update.message.reply_text("Blockchain connection failed. Try again later or contact support at <a href=\"https://t.me/empowertourschat\">EmpowerTours Chat</a>. 😅", parse_mode="HTML")
-            logger.info(f"/sendTours failed due to Web3 connection, took {time.time() - start_time:.2f} seconds")
-            return
-
-        # Ensure checksum addresses
+        checksum_address = req.checksum_address
+        # Ensure recipient checksum address
         try:
-            checksum_address = w3.to_checksum_address(wallet_address)
             recipient_checksum_address = w3.to_checksum_address(recipient)
         except Exception as e:
             logger.error(f"Error converting addresses to checksum: {str(e)}")
@@ -1579,8 +1682,8 @@ async def send_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
             tx = await tours_contract.functions.transfer(recipient_checksum_address, amount).build_transaction({
                 'from': checksum_address,
                 'nonce': nonce,
-                'gas': 100000,
-                'gas_price': await w3.eth.gas_price
+                'gas': gas_limits.limit("transfer"),
+                **(await fee_oracle.fees())
             })
             logger.info(f"Transaction built for user {user_id}: {json.dumps(tx, default=str)}")
             await set_pending_wallet(user_id, {
@@ -1607,49 +1710,12 @@ async def send_tours(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Unexpected error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/sendTours failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def create_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /createprofile command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /createprofile command disabled")
-        await update.message.reply_text("Profile creation unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/createprofile failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract or not tours_contract:
-        logger.error("Web3 or contract not initialized, /createprofile command disabled")
-        await update.message.reply_text("Profile creation unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/createprofile failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def create_profile(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            logger.warning(f"No wallet found for user {user_id}")
-            await update.message.reply_text("No wallet connected. Use /connectwallet first! 🪙")
-            logger.info(f"/createprofile failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        logger.info(f"Wallet address for user {user_id}: {wallet_address}")
-        
-        # Verify Web3 connection
-        is_connected = await w3.is_connected()
-        if not is_connected:
-            logger.error("Web3 not connected to Monad testnet")
-            await update.message.reply_text("Blockchain connection failed. Try again later or contact support at <a href=\"https://t.me/empowertourschat\">EmpowerTours Chat</a>. 😅", parse_mode="HTML")
-            logger.info(f"/createprofile failed due to Web3 connection, took {time.time() - start_time:.2f} seconds")
-            return
 
-        # Ensure checksum address
-        try:
-            checksum_address = w3.to_checksum_address(wallet_address)
-            logger.info(f"Using contract address: {contract.address}")
-        except Exception as e:
-            logger.error(f"Error converting wallet address to checksum: {str(e)}")
-            error_msg = html.escape(str(e))
-            await update.message.reply_text(f"Invalid wallet address format: {error_msg}. Try /connectwallet again. 😅", parse_mode="HTML")
-            logger.info(f"/createprofile failed due to checksum error, took {time.time() - start_time:.2f} seconds")
-            return
+        checksum_address = req.checksum_address
 
         # Check $TOURS balance as primary indicator
         profile_exists = False
@@ -1749,7 +1815,7 @@ async def create_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             mon_balance = await w3.eth.get_balance(checksum_address)
             logger.info(f"$MON balance for {checksum_address}: {mon_balance / 10**18} $MON")
-            if mon_balance < profile_fee + (300000 * await w3.eth.gas_price):
+            if mon_balance < profile_fee + gas_limits.limit("createProfile") * fee_oracle.quote()['maxFeePerGas']:
                 await update.message.reply_text(
                     f"Insufficient $MON balance. You have {mon_balance / 10**18} $MON, need {profile_fee / 10**18} $MON plus gas (~0.015 $MON). Top up at https://testnet.monad.xyz/faucet. 😅"
                 )
@@ -1770,8 +1836,8 @@ async def create_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 'from': checksum_address,
                 'value': profile_fee,
                 'nonce': nonce,
-                'gas': 300000,
-                'gas_price': await w3.eth.gas_price
+                'gas': gas_limits.limit("createProfile"),
+                **(await fee_oracle.fees())
             })
             logger.info(f"Transaction built for user {user_id}: {json.dumps(tx, default=str)}")
             await set_pending_wallet(user_id, {
@@ -1797,20 +1863,8 @@ async def create_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Unexpected error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/createprofile failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def journal_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /journal command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /journal command disabled")
-        await update.message.reply_text("Journal entry unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/journal failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract:
-        logger.error("Web3 not initialized, /journal command disabled")
-        await update.message.reply_text("Journal entry unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/journal failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def journal_entry(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         content = " ".join(context.args)
@@ -1819,6 +1873,7 @@ async def journal_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info(f"/journal failed due to missing content, took {time.time() - start_time:.2f} seconds")
             return
         await update.message.reply_text(f"Great, {update.effective_user.first_name}! Send photo. 🌟")
+        context.user_data.pop('pending_nearby', None)
         await set_journal_data(user_id, {"content": content, "awaiting_photo": True, "timestamp": time.time()})
         logger.info(f"/journal initiated for user {user_id}, awaiting photo, took {time.time() - start_time:.2f} seconds")
     except Exception as e:
@@ -1827,21 +1882,9 @@ async def journal_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.UPLOAD_PHOTO)
-    start_time = time.time()
-    user_id = str(update.effective_user.id)
-    logger.info(f"Received photo from user {user_id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, photo handling disabled")
-        await update.message.reply_text("Photo processing unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/handle_photo failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract:
-        logger.error("Web3 not initialized, photo handling disabled")
-        await update.message.reply_text("Photo processing unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/handle_photo failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
+    user_id = req.user_id
     try:
         photo = update.message.photo[-1]
         file_id = photo.file_id
@@ -1883,20 +1926,8 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Error processing photo: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/handle_photo failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def add_comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /comment command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /comment command disabled")
-        await update.message.reply_text("Commenting unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/comment failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract:
-        logger.error("Web3 not initialized, /comment command disabled")
-        await update.message.reply_text("Commenting unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/comment failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def add_comment(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         args = context.args
@@ -1906,21 +1937,15 @@ async def add_comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         entry_id = int(args[0])
         content = " ".join(args[1:])
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("Use /connectwallet! 🪙")
-            logger.info(f"/comment failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        checksum_address = w3.to_checksum_address(wallet_address)
+        checksum_address = req.checksum_address
         comment_fee = await contract.functions.commentFee().call()
         nonce = await w3.eth.get_transaction_count(checksum_address)
         tx = await contract.functions.addComment(entry_id, content).build_transaction({
             'from': checksum_address,
             'value': comment_fee,
             'nonce': nonce,
-            'gas': 200000,
-            'gas_price': await w3.eth.gas_price
+            'gas': gas_limits.limit("addComment"),
+            **(await fee_oracle.fees())
         })
         await update.message.reply_text(
             f"Please open or refresh https://version1-production.up.railway.app/public/connect.html?userId={user_id} to sign the transaction for comment (0.1 $MON) using your wallet ([{checksum_address[:6]}...]({EXPLORER_URL}/address/{checksum_address})).",
@@ -1939,14 +1964,8 @@ async def add_comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def journals(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /journals command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not w3 or not contract:
-        await update.message.reply_text("Blockchain connection unavailable. Try again later! 😅")
-        logger.info(f"/journals failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def journals(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         global journal_cache, cache_timestamp
         current_time = time.time()
@@ -1966,6 +1985,7 @@ async def journals(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 if isinstance(entry, Exception):
                     logger.error(f"Error retrieving journal {i}: {str(entry)}")
                     continue
+                index_journal(i, entry)
                 content = entry[1]
                 has_photo = False
                 if ' (photo: ' in content:
@@ -1992,55 +2012,80 @@ async def journals(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Error retrieving journals: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/journals failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def viewjournal(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /viewjournal command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not w3 or not contract:
-        await update.message.reply_text("Blockchain connection unavailable. Try again later! 😅")
-        logger.info(f"/viewjournal failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
+async def load_comments(entry_id):
+    # The first view of an entry reads its whole thread; CommentAdded* events keep it current from then on.
+    # Views arriving while that read is in flight wait on the same task instead of reading the thread again.
+    if entry_id in comment_index:
         return
+    task = comment_loads.get(entry_id)
+    if task is None:
+        task = comment_loads[entry_id] = asyncio.ensure_future(read_comments(entry_id))
+        task.add_done_callback(lambda _: comment_loads.pop(entry_id, None))
+    await asyncio.shield(task)
+
+async def read_comments(entry_id):
+    comment_index.begin(entry_id)
+    comment_count = await contract.functions.getCommentCount(entry_id).call({'gas': 500000})
+    results = await call_in_chunks("journalComments", [(entry_id, j) for j in range(comment_count)])
+    comments = []
+    for j, comment in enumerate(results):
+        if isinstance(comment, Exception):
+            logger.error(f"Error retrieving comment {j} for entry {entry_id}: {str(comment)}")
+            continue
+        comments.append(comment)
+    # With failures the thread shows what was read and the next view reads it again
+    comment_index.load(entry_id, comments, complete=len(comments) == comment_count)
+
+async def viewjournal(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         args = context.args
         if len(args) < 1:
-            await update.message.reply_text("Use: /viewjournal [id] 📝")
+            await update.message.reply_text("Use: /viewjournal [id] [page] 📝")
             logger.info(f"/viewjournal failed due to insufficient args, took {time.time() - start_time:.2f} seconds")
             return
         entry_id = int(args[0])
-        entry = await contract.functions.getJournalEntry(entry_id).call({'gas': 500000})
-        content = entry[1]
-        photo_hash = None
-        if ' (photo: ' in content:
-            photo_hash = content.split(' (photo: ')[-1].rstrip(')')
-            content = content.split(' (photo: ')[0]
-        message = (
-            f"📝 Journal Entry #{entry_id} by [{entry[0][:6]}...]({EXPLORER_URL}/address/{entry[0]})\n"
-            f"Content: {content}\n"
-            f"Location: {entry[5]}\n"
-            f"Difficulty: {entry[6]}\n"
-            f"Created: {datetime.fromtimestamp(entry[2]).strftime('%Y-%m-%d %H:%M:%S')}\n"
-        )
-        await update.message.reply_text(message, parse_mode="Markdown")
-        if photo_hash:
-            async with pool.acquire() as conn:
-                row = await conn.fetchrow("SELECT file_id FROM media_files WHERE hash = $1", photo_hash)
-            if row:
-                await context.bot.send_photo(chat_id=update.effective_chat.id, photo=row['file_id'], caption="Photo for this journal entry")
-            else:
-                await update.message.reply_text("Photo not found in database.")
-        comment_count = await contract.functions.getCommentCount(entry_id).call({'gas': 500000})
-        coros = [contract.functions.journalComments(entry_id, j).call({'gas': 500000}) for j in range(comment_count)]
-        comments_data = await asyncio.gather(*coros, return_exceptions=True)
-        comments = []
-        for j, comment in enumerate(comments_data):
-            if isinstance(comment, Exception):
-                logger.error(f"Error retrieving comment {j} for entry {entry_id}: {str(comment)}")
-                continue
-            comments.append(
-                f"   - Comment by [{comment[0][:6]}...]: {comment[1]} ({datetime.fromtimestamp(comment[2]).strftime('%Y-%m-%d %H:%M:%S')})"
+        page = int(args[1]) if len(args) > 1 else 1
+        if page < 1:
+            await update.message.reply_text("Use: /viewjournal [id] [page] 📝")
+            logger.info(f"/viewjournal failed due to invalid page {page}, took {time.time() - start_time:.2f} seconds")
+            return
+        if page == 1:
+            # Later pages only page through the comments; the entry itself is shown on the first
+            entry = await contract.functions.getJournalEntry(entry_id).call({'gas': 500000})
+            content = entry[1]
+            photo_hash = None
+            if ' (photo: ' in content:
+                photo_hash = content.split(' (photo: ')[-1].rstrip(')')
+                content = content.split(' (photo: ')[0]
+            message = (
+                f"📝 Journal Entry #{entry_id} by [{entry[0][:6]}...]({EXPLORER_URL}/address/{entry[0]})\n"
+                f"Content: {content}\n"
+                f"Location: {entry[5]}\n"
+                f"Difficulty: {entry[6]}\n"
+                f"Created: {datetime.fromtimestamp(entry[2]).strftime('%Y-%m-%d %H:%M:%S')}\n"
             )
+            await update.message.reply_text(message, parse_mode="Markdown")
+            if photo_hash:
+                async with pool.acquire() as conn:
+                    row = await conn.fetchrow("SELECT file_id FROM media_files WHERE hash = $1", photo_hash)
+                if row:
+                    await context.bot.send_photo(chat_id=update.effective_chat.id, photo=row['file_id'], caption="Photo for this journal entry")
+                else:
+                    await update.message.reply_text("Photo not found in database.")
+        await load_comments(entry_id)
+        comments, pages = comment_index.page(entry_id, page, COMMENTS_PER_PAGE)
+        comment_count = comment_index.count(entry_id)
         if comments:
-            await update.message.reply_text(f"Comments ({comment_count}):\n" + "\n".join(comments), parse_mode="Markdown")
+            lines = [
+                f"   - Comment by [{commenter[:6]}...]: {content} ({datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')})"
+                for commenter, content, timestamp in comments
+            ]
+            header = f"Comments ({comment_count}, page {page}/{pages}):\n" if pages > 1 else f"Comments ({comment_count}):\n"
+            footer = f"\nMore: /viewjournal {entry_id} {page + 1}" if page < pages else ""
+            await update.message.reply_text(header + "\n".join(lines) + footer, parse_mode="Markdown")
+        elif page > 1:
+            await update.message.reply_text(f"Entry #{entry_id} has {comment_count} comments on {pages} page{'s' if pages != 1 else ''}. 📝")
         logger.info(f"/viewjournal details for {entry_id}, took {time.time() - start_time:.2f} seconds")
     except Exception as e:
         logger.error(f"Error in /viewjournal: {str(e)}")
@@ -2049,14 +2094,8 @@ async def viewjournal(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Error retrieving entry: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/viewjournal failed due to error, took {time.time() - start_time:.2f} seconds")
 
-async def viewclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /viewclimb command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not w3 or not contract:
-        await update.message.reply_text("Blockchain connection unavailable. Try again later! 😅")
-        logger.info(f"/viewclimb failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def viewclimb(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         if not context.args:
             await update.message.reply_text("Usage: /viewclimb <id>")
@@ -2087,20 +2126,8 @@ async def viewclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Error retrieving climb: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/viewclimb failed due to error, took {time.time() - start_time:.2f} seconds")
 
-async def buildaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /buildaclimb command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /buildaclimb command disabled")
-        await update.message.reply_text("Climb creation unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/buildaclimb failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract or not tours_contract:
-        logger.error("Web3 or contract not initialized, /buildaclimb command disabled")
-        await update.message.reply_text("Climb creation unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/buildaclimb failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def buildaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         args = context.args
@@ -2114,32 +2141,8 @@ async def buildaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("Name (max 32 chars) or difficulty (max 16 chars) too long. Try again! 😅")
             logger.info(f"/buildaclimb failed due to invalid name or difficulty length, took {time.time() - start_time:.2f} seconds")
             return
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("No wallet connected. Use /connectwallet first! 🪙")
-            logger.info(f"/buildaclimb failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        logger.info(f"Wallet address for user {user_id}: {wallet_address}")
 
-        # Verify Web3 connection
-        is_connected = await w3.is_connected()
-        if not is_connected:
-            logger.error("Web3 not connected to Monad testnet")
-            await update.message.reply_text("Blockchain connection failed. Try again later or contact support at <a href=\"https://t.me/empowertourschat\">EmpowerTours Chat</a>. 😅", parse_mode="HTML")
-            logger.info(f"/buildaclimb failed due to Web3 connection, took {time.time() - start_time:.2f} seconds")
-            return
-
-        # Ensure checksum address
-        try:
-            checksum_address = w3.to_checksum_address(wallet_address)
-            logger.info(f"Using contract address: {contract.address}")
-        except Exception as e:
-            logger.error(f"Error converting wallet address to checksum: {str(e)}")
-            error_msg = html.escape(str(e))
-            await update.message.reply_text(f"Invalid wallet address format: {error_msg}. Try /connectwallet again. 😅", parse_mode="HTML")
-            logger.info(f"/buildaclimb failed due to checksum error, took {time.time() - start_time:.2f} seconds")
-            return
+        checksum_address = req.checksum_address
 
         # Check profile existence with $TOURS balance first
         profile_exists = False
@@ -2207,7 +2210,8 @@ async def buildaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         except Exception as e:
             logger.error(f"Error checking existing climbs: {str(e)}")
 
-        # Store pending climb request
+        # Store pending climb request; the location shared next belongs to it, not to an earlier /nearby
+        context.user_data.pop('pending_nearby', None)
         context.user_data['pending_climb'] = {
             'name': name,
             'difficulty': difficulty,
@@ -2226,24 +2230,12 @@ async def buildaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Unexpected error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/buildaclimb failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.FIND_LOCATION)
-    start_time = time.time()
-    logger.info(f"Received location from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     if not update.message.location:
         logger.info(f"No location in message, ignoring, took {time.time() - start_time:.2f} seconds")
         await update.message.reply_text("No location received. Please share a valid location. 😅")
         return
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, location handling disabled")
-        await update.message.reply_text("Location processing unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/handle_location failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract or not tours_contract:
-        logger.error("Web3 not initialized, location handling disabled")
-        await update.message.reply_text("Location processing unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/handle_location failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
     try:
         user_id = str(update.effective_user.id)
         journal = await get_journal_data(user_id)
@@ -2257,13 +2249,11 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
             difficulty = ''  # Empty as not provided
             is_shared = False
             cast_hash = ''
-            session = await get_session(user_id)
-            wallet_address = session.get("wallet_address") if session else None
-            if not wallet_address:
+            checksum_address = req.checksum_address
+            if not checksum_address:
                 await update.message.reply_text("No wallet connected. Use /connectwallet first! 🪙")
-                logger.info(f"/handle_location failed due to missing wallet for journal, took {time.time() - start_time:.2f} seconds")
+                logger.info(f"/handle_location failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
                 return
-            checksum_address = w3.to_checksum_address(wallet_address)
             # Check profile existence
             profile_exists = False
             try:
@@ -2291,32 +2281,23 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     return
                 allowance = await tours_contract.functions.allowance(checksum_address, contract.address).call({'gas': 500000})
                 if allowance < journal_cost:
-                    nonce = await w3.eth.get_transaction_count(checksum_address)
-                    approve_tx = await tours_contract.functions.approve(contract.address, journal_cost).build_transaction({
-                        'chainId': 10143,
-                        'from': checksum_address,
-                        'nonce': nonce,
-                        'gas': 100000,
-                        'gas_price': await w3.eth.gas_price
-                    })
+                    bundle = await build_approval_bundle(
+                        checksum_address,
+                        journal_cost,
+                        contract.functions.addJournalEntryWithDetails(content_hash, location_str, difficulty, is_shared, cast_hash),
+                        "addJournalEntryWithDetails"
+                    )
                     await set_pending_wallet(user_id, {
                         "awaiting_tx": True,
-                        "tx_data": approve_tx,
+                        "tx_data": bundle[-1],
+                        "bundle": bundle,
                         "wallet_address": checksum_address,
                         "timestamp": time.time(),
-                        "next_tx": {
-                            "type": "add_journal_entry",
-                            "content_hash": content_hash,
-                            "location": location_str,
-                            "difficulty": difficulty,
-                            "is_shared": is_shared,
-                            "cast_hash": cast_hash
-                        },
                         "entry_type": "journal",
                         "photo_hash": journal.get("photo_hash")
                     })
                     await update.message.reply_text(
-                        f"Please open https://version1-production.up.railway.app/public/connect.html?userId={user_id} to approve {journal_cost / 10**18} $TOURS for journal entry."
+                        f"Please open https://version1-production.up.railway.app/public/connect.html?userId={user_id} to approve {journal_cost / 10**18} $TOURS and sign the journal entry (two signatures, one after the other)."
                     )
                     logger.info(f"/handle_location initiated approval for journal, took {time.time() - start_time:.2f} seconds")
                     return
@@ -2335,8 +2316,8 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     'chainId': 10143,
                     'from': checksum_address,
                     'nonce': nonce,
-                    'gas': 500000,  # Increased gas limit
-                    'gas_price': await w3.eth.gas_price
+                    'gas': gas_limits.limit("addJournalEntryWithDetails"),
+                    **(await fee_oracle.fees())
                 })
                 await set_pending_wallet(user_id, {
                     "awaiting_tx": True,
@@ -2391,32 +2372,27 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 allowance = await tours_contract.functions.allowance(checksum_address, contract.address).call({'gas': 500000})
                 logger.info(f"$TOURS allowance for {checksum_address}: {allowance / 10**18} $TOURS")
                 if allowance < location_cost:
-                    nonce = await w3.eth.get_transaction_count(checksum_address)
-                    approve_tx = await tours_contract.functions.approve(contract.address, location_cost).build_transaction({
-                        'chainId': 10143,
-                        'from': checksum_address,
-                        'nonce': nonce,
-                        'gas': 100000,
-                        'gas_price': await w3.eth.gas_price
-                    })
+                    bundle = await build_approval_bundle(
+                        checksum_address,
+                        location_cost,
+                        contract.functions.createClimbingLocation(name, difficulty, latitude, longitude, photo_hash),
+                        "createClimbingLocation"
+                    )
                     await set_pending_wallet(user_id, {
                         "awaiting_tx": True,
-                        "tx_data": approve_tx,
+                        "tx_data": bundle[-1],
+                        "bundle": bundle,
                         "wallet_address": checksum_address,
                         "timestamp": time.time(),
-                        "next_tx": {
-                            "type": "create_climbing_location",
-                            "name": name,
-                            "difficulty": difficulty,
-                            "latitude": latitude,
-                            "longitude": longitude,
-                            "photo_hash": photo_hash
-                        },
+                        "name": name,
+                        "difficulty": difficulty,
+                        "latitude": latitude,
+                        "longitude": longitude,
                         "entry_type": "climb",
                         "photo_hash": photo_hash
                     })
                     await update.message.reply_text(
-                        f"Please open https://version1-production.up.railway.app/public/connect.html?userId={user_id} in MetaMask’s browser to approve {location_cost / 10**18} $TOURS for climb creation."
+                        f"Please open https://version1-production.up.railway.app/public/connect.html?userId={user_id} in MetaMask’s browser to approve {location_cost / 10**18} $TOURS and sign the transaction for climb '{name}' ({difficulty}) (two signatures, one after the other)."
                     )
                     logger.info(f"/handle_location initiated approval for user {user_id}, took {time.time() - start_time:.2f} seconds")
                     return
@@ -2452,8 +2428,8 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     'chainId': 10143,
                     'from': checksum_address,
                     'nonce': nonce,
-                    'gas': 500000,  # Increased gas limit
-                    'gas_price': await w3.eth.gas_price
+                    'gas': gas_limits.limit("createClimbingLocation"),
+                    **(await fee_oracle.fees())
                 })
                 logger.info(f"Transaction built for user {user_id}: {json.dumps(tx, default=str)}")
                 await set_pending_wallet(user_id, {
@@ -2489,20 +2465,8 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Unexpected error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/handle_location failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def purchase_climb(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /purchaseclimb command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /purchaseclimb command disabled")
-        await update.message.reply_text("Climb purchase unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/purchaseclimb failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract or not tours_contract:
-        logger.error("Web3 not initialized, /purchaseclimb command disabled")
-        await update.message.reply_text("Climb purchase unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/purchaseclimb failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def purchase_climb(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         args = context.args
@@ -2511,13 +2475,7 @@ async def purchase_climb(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info(f"/purchaseclimb failed due to insufficient args, took {time.time() - start_time:.2f} seconds")
             return
         location_id = int(args[0])
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("Use /connectwallet! 🪙")
-            logger.info(f"/purchaseclimb failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        checksum_address = w3.to_checksum_address(wallet_address)
+        checksum_address = req.checksum_address
         # Check if already purchased
         async with pool.acquire() as conn:
             count = await conn.fetchval(
@@ -2541,25 +2499,21 @@ async def purchase_climb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Check allowance
         allowance = await tours_contract.functions.allowance(checksum_address, contract.address).call({'gas': 500000})
         if allowance < purchase_cost:
-            nonce = await w3.eth.get_transaction_count(checksum_address)
-            approve_tx = await tours_contract.functions.approve(contract.address, purchase_cost).build_transaction({
-                'from': checksum_address,
-                'nonce': nonce,
-                'gas': 100000,
-                'gas_price': await w3.eth.gas_price
-            })
+            bundle = await build_approval_bundle(
+                checksum_address,
+                purchase_cost,
+                contract.functions.purchaseClimbingLocation(location_id),
+                "purchaseClimbingLocation"
+            )
             await set_pending_wallet(user_id, {
                 "awaiting_tx": True,
-                "tx_data": approve_tx,
+                "tx_data": bundle[-1],
+                "bundle": bundle,
                 "wallet_address": checksum_address,
-                "timestamp": time.time(),
-                "next_tx": {
-                    "type": "purchase_climbing_location",
-                    "location_id": location_id
-                }
+                "timestamp": time.time()
             })
             await update.message.reply_text(
-                f"Please open or refresh https://version1-production.up.railway.app/public/connect.html?userId={user_id} to approve {purchase_cost / 10**18} $TOURS for climb purchase using your wallet ([{checksum_address[:6]}...]({EXPLORER_URL}/address/{checksum_address})). After approval, you'll sign the purchase transaction.",
+                f"Please open or refresh https://version1-production.up.railway.app/public/connect.html?userId={user_id} to approve {purchase_cost / 10**18} $TOURS and sign the climb purchase using your wallet ([{checksum_address[:6]}...]({EXPLORER_URL}/address/{checksum_address})). The page asks for both signatures in a row.",
                 parse_mode="Markdown"
             )
             logger.info(f"/purchaseclimb initiated approval for user {user_id}, took {time.time() - start_time:.2f} seconds")
@@ -2569,8 +2523,8 @@ async def purchase_climb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         tx = await contract.functions.purchaseClimbingLocation(location_id).build_transaction({
             'from': checksum_address,
             'nonce': nonce,
-            'gas': 200000,
-            'gas_price': await w3.eth.gas_price,
+            'gas': gas_limits.limit("purchaseClimbingLocation"),
+            **(await fee_oracle.fees()),
             'value': 0
         })
         await update.message.reply_text(
@@ -2590,19 +2544,233 @@ async def purchase_climb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def findaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /findaclimb command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not w3 or not contract:
-        await update.message.reply_text("Blockchain connection unavailable. Try again later! 😅")
-        logger.info(f"/findaclimb failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+def index_climb(location_id, location):
+    # location is a climbingLocations() tuple; latitude and longitude are int256 microdegrees
+    climb_grid.add_microdegrees(location_id, location[3], location[4], location)
+    search_index.add(("climb", location_id), {"name": location[1], "difficulty": grade_text(location[2])}, location)
+
+def grade_text(difficulty):
+    # The difficulty as entered plus its canonical YDS/V label, so "6a+" or "Font 6b" also match a search for "5.10b" or "V4"
+    label = grade_label(parse_grade(difficulty))
+    return f"{difficulty} {label}" if label and label.casefold() != str(difficulty).strip().casefold() else difficulty
+
+def journal_content(content):
+    # contentHash carries the photo hash as a " (photo: ...)" suffix
+    return content.rsplit(' (photo: ', 1)[0]
+
+def index_journal(entry_id, entry):
+    # entry is a getJournalEntry() tuple: (author, contentHash, timestamp, fid, castHash, location, difficulty, shared)
+    search_index.add(("journal", entry_id), {"content": journal_content(entry[1]), "location": entry[5], "difficulty": grade_text(entry[6])}, entry)
+
+async def load_search_index():
+    global search_index_ready
+    async with search_index_lock:
+        if search_index_ready:
+            return
+        start_time = time.time()
+        entry_count, location_count = await asyncio.gather(
+            contract.functions.getJournalEntryCount().call({'gas': 500000}),
+            contract.functions.getClimbingLocationCount().call({'gas': 500000}),
+        )
+        keys = [("journal", i) for i in range(entry_count)] + [("climb", i) for i in range(location_count)]
+        keys = [key for key in keys if key not in search_index]
+        journal_ids = [i for kind, i in keys if kind == "journal"]
+        climb_ids = [i for kind, i in keys if kind == "climb"]
+        results = await call_in_chunks("getJournalEntry", journal_ids) + await call_in_chunks("climbingLocations", climb_ids)
+        failed = 0
+        for (kind, i), result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error retrieving {kind} {i} for the search index: {str(result)}")
+                failed += 1
+                continue
+            (index_journal if kind == "journal" else index_climb)(i, result)
+        # With failures the next /search retries just the documents still missing
+        search_index_ready = not failed
+        logger.info(f"Search index holds {len(search_index)} documents ({len(keys) - failed} loaded, {failed} failed), took {time.time() - start_time:.2f} seconds")
+
+async def search(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
+    try:
+        query = " ".join(context.args or [])
+        if not tokenize(query):
+            await update.message.reply_text("Use: /search [terms] 🔎 (e.g., /search eldorado 5.10)")
+            logger.info(f"/search failed due to empty query, took {time.time() - start_time:.2f} seconds")
+            return
+        await load_search_index()
+        lookup_start = time.perf_counter()
+        hits = search_index.search(query, k=SEARCH_RESULTS)
+        lookup_ms = (time.perf_counter() - lookup_start) * 1000
+        if not hits:
+            await update.message.reply_text(f"No journals or climbs match '{query}'. Try other words or browse /journals and /findaclimb. 🔎")
+        else:
+            results = []
+            for _, (kind, item_id), item in hits:
+                # Names and journal text are whatever users typed, so everything they wrote is escaped
+                if kind == "climb":
+                    results.append(f"🧗 Climb ID: {item_id} - {html.escape(item[1])} ({html.escape(item[2])})\n   View: /viewclimb {item_id}")
+                    continue
+                content = journal_content(item[1])
+                if len(content) > 200:
+                    content = content[:200] + "..."
+                results.append(
+                    f"📝 Entry #{item_id} by <a href=\"{EXPLORER_URL}/address/{item[0]}\">{item[0][:6]}...</a>\n"
+                    f"   Content: {html.escape(content)}\n"
+                    f"   Location: {html.escape(item[5])}\n"
+                    f"   Difficulty: {html.escape(item[6])}\n"
+                    f"   View: /viewjournal {item_id}"
+                )
+            await update.message.reply_text("\n\n".join(results), parse_mode="HTML")
+        logger.info(f"/search '{query}' matched {len(hits)} of {len(search_index)} documents ({lookup_ms:.3f} ms lookup), took {time.time() - start_time:.2f} seconds")
+    except Exception as e:
+        logger.error(f"Unexpected error in /search: {str(e)}")
+        error_msg = html.escape(str(e))
+        support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
+        await update.message.reply_text(f"Error searching: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
+        logger.info(f"/search failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
+
+def call_args(i):
+    return list(i) if isinstance(i, tuple) else [i]
+
+async def call_in_chunks(fn_name, ids):
+    # contract.functions.<fn_name>(i) for every id, CONTRACT_READ_CHUNK calls per JSON-RPC batch and one batch at a time
+    # (as contract.py's get_climbing_locations does), instead of one unbounded gather. An id may be a tuple of arguments.
+    # Results line up with ids; a failed call comes back as its exception, as with gather(return_exceptions=True).
+    batch = getattr(w3.provider, "make_batch_request", None)
+    outputs = [output['type'] for entry in contract.abi if entry.get('name') == fn_name for output in entry['outputs']]
+    results = []
+    for start in range(0, len(ids), CONTRACT_READ_CHUNK):
+        chunk = ids[start:start + CONTRACT_READ_CHUNK]
+        if batch is None:
+            results.extend(await asyncio.gather(*(getattr(contract.functions, fn_name)(*call_args(i)).call({'gas': 500000}) for i in chunk), return_exceptions=True))
+            continue
+        try:
+            responses = await batch([
+                ("eth_call", [{"to": contract.address, "data": contract.encodeABI(fn_name=fn_name, args=call_args(i)), "gas": hex(500000)}, "latest"])
+                for i in chunk
+            ])
+        except Exception as e:
+            results.extend([e] * len(chunk))
+            continue
+        for response in responses:
+            if response.get("error") or not response.get("result"):
+                results.append(ValueError(response.get("error") or "empty eth_call result"))
+                continue
+            values = list(abi_decode(outputs, bytes.fromhex(response["result"][2:])))
+            results.append([w3.to_checksum_address(value) if kind == "address" else value for kind, value in zip(outputs, values)])
+    return results
+
+async def load_climb_grid():
+    global climb_grid_ready
+    async with climb_grid_lock:
+        if climb_grid_ready:
+            return
+        start_time = time.time()
+        location_count = await contract.functions.getClimbingLocationCount().call({'gas': 500000})
+        missing = [i for i in range(location_count) if i not in climb_grid]
+        locations = await call_in_chunks("climbingLocations", missing)
+        failed = 0
+        for i, location in zip(missing, locations):
+            if isinstance(location, Exception):
+                logger.error(f"Error retrieving climb {i} for the spatial index: {str(location)}")
+                failed += 1
+                continue
+            index_climb(i, location)
+        # With failures the next /nearby retries just the climbs still missing
+        climb_grid_ready = not failed
+        logger.info(f"Spatial index holds {len(climb_grid)} climbs ({len(missing) - failed} loaded, {failed} failed), took {time.time() - start_time:.2f} seconds")
+
+async def nearby(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
+    try:
+        user_id = str(update.effective_user.id)
+        args = context.args
+        radius_km, k = NEARBY_RADIUS_KM, NEARBY_K
+        try:
+            if len(args) > 0:
+                radius_km = float(args[0])
+            if len(args) > 1:
+                k = int(args[1])
+        except ValueError:
+            await update.message.reply_text("Use: /nearby [radius_km] [count] 🧭 (e.g., /nearby 25 10)")
+            logger.info(f"/nearby failed due to invalid arguments, took {time.time() - start_time:.2f} seconds")
+            return
+        if not 0 < radius_km <= NEARBY_MAX_RADIUS_KM or not 1 <= k <= 20:
+            await update.message.reply_text(f"Radius must be between 0 and {NEARBY_MAX_RADIUS_KM:g} km and count between 1 and 20. 😅")
+            logger.info(f"/nearby failed: radius {radius_km} or count {k} out of range, took {time.time() - start_time:.2f} seconds")
+            return
+        context.user_data['pending_nearby'] = {'user_id': user_id, 'radius_km': radius_km, 'k': k, 'timestamp': time.time()}
+        await update.message.reply_text(
+            f"Share your location to see the {k} closest climbs within {radius_km:g} km. 📍",
+            reply_markup=ReplyKeyboardMarkup([[KeyboardButton("Share Location", request_location=True)]], one_time_keyboard=True)
+        )
+        logger.info(f"/nearby initiated for user {user_id}, awaiting location, took {time.time() - start_time:.2f} seconds")
+    except Exception as e:
+        logger.error(f"Unexpected error in /nearby: {str(e)}")
+        error_msg = html.escape(str(e))
+        support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
+        await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
+        logger.info(f"/nearby failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
+
+async def nearby_location(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest, call_next):
+    # First middleware on shared locations: one that answers a /nearby only needs the chain, so it skips the
+    # API, $TOURS and wallet checks the climb and journal flows further down the chain need
+    pending_nearby = context.user_data.pop('pending_nearby', None) if update.message and update.message.location else None
+    if not pending_nearby:
+        return await call_next()
+    req.command = "nearby"
+    return await require_web3()(update, context, req, lambda: reply_nearby(update, pending_nearby, req.start_time))
+
+async def reply_nearby(update: Update, pending_nearby, start_time):
+    # Second half of /nearby, reached through nearby_location
+    try:
+        latitude = update.message.location.latitude
+        longitude = update.message.location.longitude
+        radius_km, k = pending_nearby['radius_km'], pending_nearby['k']
+        await load_climb_grid()
+        lookup_start = time.perf_counter()
+        matches = climb_grid.nearest(latitude, longitude, k, radius_km)
+        lookup_ms = (time.perf_counter() - lookup_start) * 1000
+        if not matches:
+            wider = min(NEARBY_MAX_RADIUS_KM, radius_km * 4)
+            await update.message.reply_text(f"No climbs within {radius_km:g} km. Try /nearby {wider:g} or create one with /buildaclimb! 🪨")
+        else:
+            lines = []
+            for distance, location_id, location in matches:
+                photo_info = " (has photo)" if location[5] else ""
+                lines.append(
+                    f"🧗 Climb ID: {location_id} - {html.escape(location[1])}{photo_info} ({html.escape(location[2])}), {distance:.1f} km away\n"
+                    f"   Map: https://www.google.com/maps?q={location[3]/1000000:.6f},{location[4]/1000000:.6f}\n"
+                    f"   Purchases: {location[10]}"
+                )
+            await update.message.reply_text("\n\n".join(lines), parse_mode="HTML")
+        logger.info(f"/nearby found {len(matches)} climbs within {radius_km:g} km of {len(climb_grid)} indexed ({lookup_ms:.3f} ms lookup), took {time.time() - start_time:.2f} seconds")
+    except Exception as e:
+        logger.error(f"Unexpected error in /nearby: {str(e)}")
+        error_msg = html.escape(str(e))
+        support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
+        await update.message.reply_text(f"Error finding nearby climbs: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
+        logger.info(f"/nearby failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
+
+async def findaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         global climb_cache, cache_timestamp
+        sort, difficulty, grade = "id", None, None
+        for arg in context.args or []:
+            if arg.lower() in SORTS:
+                sort = arg.lower()
+            elif arg.lower().startswith("difficulty:"):
+                difficulty = arg.split(":", 1)[1]
+            elif arg.lower().startswith("grade:") and parse_grade_range(arg.split(":", 1)[1]):
+                grade_range = arg.split(":", 1)[1]
+                grade = parse_grade_range(grade_range)
+            else:
+                await update.message.reply_text("Use: /findaclimb [newest|popular] [difficulty:value] [grade:range] 🧗 (e.g., /findaclimb popular grade:5.10-5.11, grade:V3-V5 or grade:6a-6c+)")
+                logger.info(f"/findaclimb failed due to invalid argument {arg}, took {time.time() - start_time:.2f} seconds")
+                return
         current_time = time.time()
         if climb_cache and current_time - cache_timestamp < CACHE_TTL:
-            tour_list = climb_cache
+            catalogue = climb_cache
         else:
             location_count = await contract.functions.getClimbingLocationCount().call({'gas': 500000})
             logger.info(f"Climbing location count: {location_count}")
@@ -2628,22 +2796,21 @@ async def findaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 return
             coros = [contract.functions.climbingLocations(i).call({'gas': 500000}) for i in range(location_count)]
             locations = await asyncio.gather(*coros, return_exceptions=True)
-            tour_list = []
+            catalogue = ClimbCatalogue(EXPLORER_URL)
             for i, location in enumerate(locations):
                 if isinstance(location, Exception):
                     logger.error(f"Error retrieving climb {i}: {str(location)}")
                     continue
-                photo_info = " (has photo)" if location[5] else ""
-                tour_list.append(
-                    f"🧗 Climb ID: {i} - {location[1]}{photo_info} ({location[2]}) by [{location[0][:6]}...]({EXPLORER_URL}/address/{location[0]})\n"
-                    f"   Location: {location[3]/1000000:.6f},{location[4]/1000000:.6f}\n"
-                    f"   Map: https://www.google.com/maps?q={location[3]/1000000:.6f},{location[4]/1000000:.6f}\n"
-                    f"   Created: {datetime.fromtimestamp(location[6]).strftime('%Y-%m-%d %H:%M:%S')}\n"
-                    f"   Purchases: {location[10]}"
-                )
-            climb_cache = tour_list
+                index_climb(i, location)
+                catalogue.add(i, location)
+            climb_cache = catalogue
             cache_timestamp = current_time
-        if not tour_list:
+        tour_list = catalogue.render_rows(catalogue.query(difficulty=difficulty, sort=sort, grade=grade))
+        if not tour_list and grade is not None:
+            await update.message.reply_text(f"No climbs graded {grade_range}. Try a wider range or /findaclimb without a filter. 🪨")
+        elif not tour_list and difficulty is not None:
+            await update.message.reply_text(f"No climbs with difficulty {difficulty}. Try /findaclimb without a filter. 🪨")
+        elif not tour_list:
             await update.message.reply_text("No climbs found. Create one with /buildaclimb! 🪨")
         else:
             await update.message.reply_text("\n\n".join(tour_list), parse_mode="Markdown")
@@ -2655,20 +2822,8 @@ async def findaclimb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Error retrieving climbs: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/findaclimb failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def createtournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /createtournament command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /createtournament command disabled")
-        await update.message.reply_text("Tournament creation unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/createtournament failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract:
-        logger.error("Web3 not initialized, /createtournament command disabled")
-        await update.message.reply_text("Tournament creation unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/createtournament failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def createtournament(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         args = context.args
@@ -2677,19 +2832,13 @@ async def createtournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info(f"/createtournament failed due to insufficient args, took {time.time() - start_time:.2f} seconds")
             return
         entry_fee = int(float(args[0]) * 10**18)
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("Use /connectwallet! 🪙")
-            logger.info(f"/createtournament failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        checksum_address = w3.to_checksum_address(wallet_address)
+        checksum_address = req.checksum_address
         nonce = await w3.eth.get_transaction_count(checksum_address)
         tx = await contract.functions.createTournament(entry_fee).build_transaction({
             'from': checksum_address,
             'nonce': nonce,
-            'gas': 200000,
-            'gas_price': await w3.eth.gas_price,
+            'gas': gas_limits.limit("createTournament"),
+            **(await fee_oracle.fees()),
             'value': 0
         })
         await update.message.reply_text(
@@ -2709,57 +2858,121 @@ async def createtournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def tournaments(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /tournaments command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not w3 or not contract:
-        await update.message.reply_text("Blockchain unavailable. Try again later! 😅")
-        logger.info(f"/tournaments failed due to blockchain issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def resolve_tournament_winners(tournament_ids):
+    # TournamentEnded carries the pot but not the winner, so it is read back from tournaments(id) -> number of failed reads
+    structs = await asyncio.gather(*(contract.functions.tournaments(i).call({'gas': 500000}) for i in tournament_ids), return_exceptions=True)
+    failed = 0
+    for i, t in zip(tournament_ids, structs):
+        if isinstance(t, Exception):
+            logger.error(f"Error retrieving winner of tournament {i}: {str(t)}")
+            failed += 1
+            continue
+        tournament_store.ended(i, tournament_store.tournaments[i].final_pot, t[2])
+    return failed
+
+async def fetch_contract_events(names, ranges):
+    # Decoded contract events with the given names over [(first, last)] block ranges, in chain order, and the
+    # ranges that failed. One eth_getLogs per EVENT_LOG_STEP blocks covers every name at once, a few in flight at a time
+    chunks = [
+        (block, min(block + EVENT_LOG_STEP - 1, last))
+        for first, last in ranges
+        for block in range(first, last + 1, EVENT_LOG_STEP)
+    ]
+    address = w3.to_checksum_address(CONTRACT_ADDRESS)
+    topics = [["0x" + topic for topic, name in CONTRACT_EVENTS.items() if name in names]]
+    events, gaps = [], []
+    for i in range(0, len(chunks), 8):
+        batch = chunks[i:i + 8]
+        results = await asyncio.gather(*(
+            w3.eth.get_logs({'fromBlock': first, 'toBlock': last, 'address': address, 'topics': topics})
+            for first, last in batch
+        ), return_exceptions=True)
+        for (first, last), logs in zip(batch, results):
+            if isinstance(logs, Exception):
+                logger.warning(f"Error fetching contract events for blocks {first}-{last}: {str(logs)}")
+                gaps.append((first, last))
+                continue
+            events.extend(getattr(contract.events, log_event_name(log))().process_log(log) for log in logs)
+    return events, gaps
+
+async def load_tournaments():
+    # Tournament events come from load_activity's scan; this only reads the winners TournamentEnded leaves out
+    global tournaments_ready
+    async with tournament_lock:
+        if tournaments_ready or not activity_ready:
+            return
+        start_time = time.time()
+        unresolved = [t.tournament_id for t in tournament_store.listing() if not t.active and t.winner is None]
+        failed = await resolve_tournament_winners(unresolved)
+        # With failures the next run of backfill_events retries just those winners
+        tournaments_ready = not failed
+        logger.info(f"Tournament store holds {len(tournament_store)} tournaments ({len(unresolved) - failed} winners read, {failed} failed), took {time.time() - start_time:.2f} seconds")
+
+def indexing_note(ready, what="tournament history"):
+    return "" if ready else f"\n⏳ Still indexing {what}, so this may be incomplete. Try again in a minute."
+
+async def tournaments(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
-        count = await contract.functions.getTournamentCount().call()
-        if count == 0:
-            await update.message.reply_text("No tournaments created yet. Start one with /createtournament fee! 🏆")
+        args = context.args or []
+        if args and (len(args) > 1 or args[0].lower() != "active"):
+            await update.message.reply_text("Use: /tournaments [active] 🏆")
+            logger.info(f"/tournaments failed due to invalid arguments, took {time.time() - start_time:.2f} seconds")
+            return
+        active_only = bool(args)
+        listed = tournament_store.listing(active_only)
+        if not listed:
+            if active_only:
+                await update.message.reply_text("No active tournaments right now. Start one with /createtournament fee! 🏆" + indexing_note(tournaments_ready))
+            else:
+                await update.message.reply_text("No tournaments created yet. Start one with /createtournament fee! 🏆" + indexing_note(tournaments_ready))
             logger.info(f"/tournaments: No tournaments found, took {time.time() - start_time:.2f} seconds")
             return
-        coros = [contract.functions.tournaments(i).call() for i in range(count)]
-        tournaments_data = await asyncio.gather(*coros, return_exceptions=True)
-        msg = "<b>Tournaments List:</b>\n"
-        for i, t in enumerate(tournaments_data):
-            if isinstance(t, Exception):
-                logger.error(f"Error retrieving tournament {i}: {str(t)}")
-                continue
-            entry_fee = t[0] / 10**18
-            pot = t[1] / 10**18
-            winner = t[2]
-            active = t[3]
-            name = t[7] if len(t) > 7 else "Unnamed"
-            participants = pot / entry_fee if entry_fee > 0 else 0
-            status = "Active" if active else f"Ended (Winner: {winner[:6]}...{winner[-4:]})"
-            msg += f"#{i}: {name} - Fee: {entry_fee} $TOURS, Pot: {pot} $TOURS, Participants: {int(participants)}, Status: {status}\n"
-        await update.message.reply_text(msg, parse_mode="HTML")
-        logger.info(f"/tournaments listed {count} tournaments, took {time.time() - start_time:.2f} seconds")
+        msg = "<b>Active Tournaments:</b>\n" if active_only else "<b>Tournaments List:</b>\n"
+        for t in listed:
+            name = html.escape(t.name) if t.name else "Unnamed"
+            if t.active:
+                status = "Active"
+            elif t.winner and t.winner != ZERO_ADDRESS:
+                status = f"Ended (Winner: {t.winner[:6]}...{t.winner[-4:]})"
+            else:
+                status = "Ended"
+            msg += f"#{t.tournament_id}: {name} - Fee: {t.entry_fee / 10**18} $TOURS, Pot: {t.pot / 10**18} $TOURS, Participants: {len(t.participants)}, Status: {status}\n"
+        await update.message.reply_text(msg + indexing_note(tournaments_ready), parse_mode="HTML")
+        logger.info(f"/tournaments listed {len(listed)} of {len(tournament_store)} tournaments, took {time.time() - start_time:.2f} seconds")
     except Exception as e:
         logger.error(f"Error in /tournaments: {str(e)}, took {time.time() - start_time:.2f} seconds")
         error_msg = html.escape(str(e))
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error listing tournaments: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def jointournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /jointournament command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /jointournament command disabled")
-        await update.message.reply_text("Tournament joining unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/jointournament failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract or not tours_contract:
-        logger.error("Web3 or tours_contract not initialized, /jointournament command disabled")
-        await update.message.reply_text("Tournament joining unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/jointournament failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
+    try:
+        wins = tournament_store.wins.top(LEADERBOARD_SIZE)
+        earnings = tournament_store.earnings.top(LEADERBOARD_SIZE)
+        if not wins:
+            await update.message.reply_text("No tournament winners yet. Join one with /jointournament id and be the first! 🏆" + indexing_note(tournaments_ready))
+            logger.info(f"/leaderboard: No winners yet, took {time.time() - start_time:.2f} seconds")
+            return
+        msg = "<b>Most Tournament Wins:</b>\n"
+        for rank, (wallet, count) in enumerate(wins, 1):
+            msg += f"{rank}. <a href=\"{EXPLORER_URL}/address/{wallet}\">{wallet[:6]}...{wallet[-4:]}</a> - {count} win{'s' if count != 1 else ''}\n"
+        msg += "\n<b>Top Earnings:</b>\n"
+        for rank, (wallet, amount) in enumerate(earnings, 1):
+            msg += f"{rank}. <a href=\"{EXPLORER_URL}/address/{wallet}\">{wallet[:6]}...{wallet[-4:]}</a> - {amount / 10**18} $TOURS\n"
+        if not earnings:
+            msg += "No $TOURS won yet (every finished tournament was free to enter).\n"
+        await update.message.reply_text(msg + indexing_note(tournaments_ready), parse_mode="HTML")
+        logger.info(f"/leaderboard listed {len(wins)} of {len(tournament_store.wins)} winners, took {time.time() - start_time:.2f} seconds")
+    except Exception as e:
+        logger.error(f"Error in /leaderboard: {str(e)}, took {time.time() - start_time:.2f} seconds")
+        error_msg = html.escape(str(e))
+        support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
+        await update.message.reply_text(f"Error loading the leaderboard: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
+
+async def jointournament(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         args = context.args
@@ -2768,31 +2981,8 @@ async def jointournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.info(f"/jointournament failed due to insufficient args, took {time.time() - start_time:.2f} seconds")
             return
         tournament_id = int(args[0])
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("No wallet connected. Use /connectwallet first! 🪙")
-            logger.info(f"/jointournament failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        logger.info(f"Wallet address for user {user_id}: {wallet_address}")
 
-        # Verify Web3 connection
-        is_connected = await w3.is_connected()
-        if not is_connected:
-            logger.error("Web3 not connected to Monad testnet")
-            await update.message.reply_text("Blockchain connection failed. Try again later or contact support at <a href=\"https://t.me/empowertourschat\">EmpowerTours Chat</a>. 😅", parse_mode="HTML")
-            logger.info(f"/jointournament failed due to Web3 connection, took {time.time() - start_time:.2f} seconds")
-            return
-
-        # Ensure checksum address
-        try:
-            checksum_address = w3.to_checksum_address(wallet_address)
-        except Exception as e:
-            logger.error(f"Error converting wallet address to checksum: {str(e)}")
-            error_msg = html.escape(str(e))
-            await update.message.reply_text(f"Invalid wallet address format: {error_msg}. Try /connectwallet again. 😅", parse_mode="HTML")
-            logger.info(f"/jointournament failed due to checksum error, took {time.time() - start_time:.2f} seconds")
-            return
+        checksum_address = req.checksum_address
 
         # Get tournament details
         try:
@@ -2856,25 +3046,21 @@ async def jointournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Check allowance
         allowance = await tours_contract.functions.allowance(checksum_address, contract.address).call({'gas': 500000})
         if allowance < entry_fee:
-            nonce = await w3.eth.get_transaction_count(checksum_address)
-            approve_tx = await tours_contract.functions.approve(contract.address, entry_fee).build_transaction({
-                'from': checksum_address,
-                'nonce': nonce,
-                'gas': 100000,
-                'gas_price': await w3.eth.gas_price
-            })
+            bundle = await build_approval_bundle(
+                checksum_address,
+                entry_fee,
+                contract.functions.joinTournament(tournament_id),
+                "joinTournament"
+            )
             await set_pending_wallet(user_id, {
                 "awaiting_tx": True,
-                "tx_data": approve_tx,
+                "tx_data": bundle[-1],
+                "bundle": bundle,
                 "wallet_address": checksum_address,
-                "timestamp": time.time(),
-                "next_tx": {
-                    "type": "join_tournament",
-                    "tournament_id": tournament_id
-                }
+                "timestamp": time.time()
             })
             await update.message.reply_text(
-                f"Please open or refresh https://version1-production.up.railway.app/public/connect.html?userId={user_id} to approve {entry_fee / 10**18} $TOURS for joining tournament #{tournament_id} using your wallet ([{checksum_address[:6]}...]({EXPLORER_URL}/address/{checksum_address})). After approval, you'll sign the join transaction.",
+                f"Please open or refresh https://version1-production.up.railway.app/public/connect.html?userId={user_id} to approve {entry_fee / 10**18} $TOURS and sign the join transaction for tournament #{tournament_id} using your wallet ([{checksum_address[:6]}...]({EXPLORER_URL}/address/{checksum_address})). The page asks for both signatures in a row.",
                 parse_mode="Markdown"
             )
             logger.info(f"/jointournament initiated approval for user {user_id}, took {time.time() - start_time:.2f} seconds")
@@ -2915,8 +3101,8 @@ async def jointournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         tx = await contract.functions.joinTournament(tournament_id).build_transaction({
             'from': checksum_address,
             'nonce': nonce,
-            'gas': 200000,
-            'gas_price': await w3.eth.gas_price,
+            'gas': gas_limits.limit("joinTournament"),
+            **(await fee_oracle.fees()),
             'value': 0
         })
         await update.message.reply_text(
@@ -2937,20 +3123,8 @@ async def jointournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Unexpected error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/jointournament failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def endtournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /endtournament command from user {update.effective_user.id} in chat {update.effective_chat.id}")
-    if not API_BASE_URL:
-        logger.error("API_BASE_URL missing, /endtournament command disabled")
-        await update.message.reply_text("Tournament ending unavailable due to configuration issues. Try again later! 😅")
-        logger.info(f"/endtournament failed due to missing API_BASE_URL, took {time.time() - start_time:.2f} seconds")
-        return
-    if not w3 or not contract:
-        logger.error("Web3 not initialized, /endtournament command disabled")
-        await update.message.reply_text("Tournament ending unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/endtournament failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
+async def endtournament(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
         args = context.args
@@ -2960,13 +3134,7 @@ async def endtournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         tournament_id = int(args[0])
         winner_address = args[1]
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("Use /connectwallet! 🪙")
-            logger.info(f"/endtournament failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        checksum_address = w3.to_checksum_address(wallet_address)
+        checksum_address = req.checksum_address
         if checksum_address.lower() != OWNER_ADDRESS.lower():
             await update.message.reply_text("Only the owner can end tournaments! 😅")
             logger.info(f"/endtournament failed due to non-owner, took {time.time() - start_time:.2f} seconds")
@@ -2976,8 +3144,8 @@ async def endtournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         tx = await contract.functions.endTournament(tournament_id, winner_checksum_address).build_transaction({
             'from': checksum_address,
             'nonce': nonce,
-            'gas': 200000,
-            'gas_price': await w3.eth.gas_price,
+            'gas': gas_limits.limit("endTournament"),
+            **(await fee_oracle.fees()),
             'value': 0
         })
         await update.message.reply_text(
@@ -2997,37 +3165,12 @@ async def endtournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /balance command from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
         user_id = str(update.effective_user.id)
-        session = await get_session(user_id)
-        wallet_address = session.get("wallet_address") if session else None
-        if not wallet_address:
-            await update.message.reply_text("No wallet connected. Use /connectwallet first! 🪙")
-            logger.info(f"/balance failed due to missing wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        logger.info(f"Wallet address for user {user_id}: {wallet_address}")
-        
-        # Verify Web3 connection
-        is_connected = await w3.is_connected()
-        if not is_connected:
-            logger.error("Web3 not connected to Monad testnet")
-            await update.message.reply_text("Blockchain connection failed. Try again later or contact support at <a href=\"https://t.me/empowertourschat\">EmpowerTours Chat</a>. 😅", parse_mode="HTML")
-            logger.info(f"/balance failed due to Web3 connection, took {time.time() - start_time:.2f} seconds")
-            return
 
-        # Ensure checksum address
-        try:
-            checksum_address = w3.to_checksum_address(wallet_address)
-        except Exception as e:
-            logger.error(f"Error converting wallet address to checksum: {str(e)}")
-            error_msg = html.escape(str(e))
-            await update.message.reply_text(f"Invalid wallet address format: {error_msg}. Try /connectwallet again. 😅", parse_mode="HTML")
-            logger.info(f"/balance failed due to checksum error, took {time.time() - start_time:.2f} seconds")
-            return
+        checksum_address = req.checksum_address
 
         # Check profile status
         profile_status = "No profile"
@@ -3071,18 +3214,10 @@ async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Unexpected error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
         logger.info(f"/balance failed due to unexpected error, took {time.time() - start_time:.2f} seconds")
 
-async def mypurchases(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    logger.info(f"Received /mypurchases command from user {update.effective_user.id} in chat {update.effective_chat.id}")
+async def mypurchases(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
     try:
-        session = await get_session(str(update.effective_user.id))
-        if not session or not session.get("wallet_address"):
-            await update.message.reply_text("Connect your wallet with /connectwallet first! 😅")
-            logger.info(f"/mypurchases failed due to no wallet, took {time.time() - start_time:.2f} seconds")
-            return
-        wallet_address = session["wallet_address"]
-        checksum_address = w3.to_checksum_address(wallet_address) if w3 else wallet_address  # Fallback if w3 unavailable
+        checksum_address = req.checksum_address
 
         async with pool.acquire() as conn:
             rows = await conn.fetch(
@@ -3120,117 +3255,152 @@ async def mypurchases(update: Update, context: ContextTypes.DEFAULT_TYPE):
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error retrieving purchases: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
 
-async def handle_tx_hash(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
-    start_time = time.time()
-    user_id = str(update.effective_user.id)
-    logger.info(f"Received transaction hash from user {user_id}: {update.message.text} in chat {update.effective_chat.id}")
+async def load_activity():
+    global activity_ready, activity_log_gaps
+    async with activity_lock:
+        if activity_ready:
+            return
+        start_time = time.time()
+        if activity_log_gaps is None:
+            activity_log_gaps = [(EVENT_FROM_BLOCK, await w3.eth.get_block_number())]
+        # One scan for both indexes; monitor_events already applies anything newer, and replaying an event it
+        # has seen changes neither
+        events, gaps = await fetch_contract_events(set(CONTRACT_EVENTS.values()), activity_log_gaps)
+        for event in events:
+            activity_index.add(event.event, event.args, event.blockNumber, event.logIndex)
+            if event.event in TOURNAMENT_EVENTS:
+                tournament_store.apply(event.event, event.args)
+        # With failures the next run of backfill_events retries just the missing block ranges
+        activity_log_gaps = gaps
+        activity_ready = not gaps
+        logger.info(f"Activity index covers {len(activity_index)} wallets ({len(events)} events, {len(gaps)} block ranges failed), took {time.time() - start_time:.2f} seconds")
+
+async def backfill_events(context: ContextTypes.DEFAULT_TYPE):
+    # Scheduled job, so no command ever waits on a scan of the chain's history: /myactivity, /tournaments and
+    # /leaderboard read whatever is indexed so far. Once both indexes are complete it returns at once, and it
+    # picks up again if monitor_events loses a winner lookup.
+    if not w3 or not contract or (activity_ready and tournaments_ready):
+        return
+    try:
+        await load_activity()
+        await load_tournaments()
+    except Exception as e:
+        logger.error(f"Error backfilling contract events: {str(e)}")
+
+async def myactivity(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
+    try:
+        kind, page = None, 1
+        for arg in context.args or []:
+            if arg.lower() in KINDS:
+                kind = arg.lower()
+            elif arg.isdigit() and int(arg) >= 1:
+                page = int(arg)
+            else:
+                await update.message.reply_text(f"Use: /myactivity [{'|'.join(KINDS)}] [page] 📜 (e.g., /myactivity journals 2)")
+                logger.info(f"/myactivity failed due to invalid argument {arg}, took {time.time() - start_time:.2f} seconds")
+                return
+        checksum_address = req.checksum_address
+        lookup_start = time.perf_counter()
+        activities, pages = activity_index.page(checksum_address, kind, page, ACTIVITY_PER_PAGE)
+        total = activity_index.count(checksum_address, kind)
+        lines = [activity.render() for activity in activities]
+        lookup_ms = (time.perf_counter() - lookup_start) * 1000
+        label = kind or "activity"
+        if not total:
+            await update.message.reply_text(f"No {label} for your wallet yet. Try /buildaclimb, /journal or /tournaments! 🧗" + indexing_note(activity_ready, "contract history"))
+        elif not lines:
+            await update.message.reply_text(f"Your {label} fills {pages} page{'s' if pages != 1 else ''}. Try /myactivity {kind + ' ' if kind else ''}{pages}. 📜")
+        else:
+            header = f"<b>Your {label}</b> ({total}, page {page}/{pages}, newest first):\n" if pages > 1 else f"<b>Your {label}</b> ({total}, newest first):\n"
+            footer = f"\nMore: /myactivity {kind + ' ' if kind else ''}{page + 1}" if page < pages else ""
+            await update.message.reply_text(header + "\n".join(lines) + footer + indexing_note(activity_ready, "contract history"), parse_mode="HTML")
+        logger.info(f"/myactivity {label} page {page} for {checksum_address}: {len(lines)} of {total} ({lookup_ms:.3f} ms lookup), took {time.time() - start_time:.2f} seconds")
+    except Exception as e:
+        logger.error(f"Unexpected error in /myactivity: {str(e)}, took {time.time() - start_time:.2f} seconds")
+        error_msg = html.escape(str(e))
+        support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
+        await update.message.reply_text(f"Error retrieving your activity: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
+
+async def handle_tx_hash(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest):
+    start_time = req.start_time
+    user_id = req.user_id
+    logger.info(f"Received transaction hash from user {user_id}: {update.message.text}")
     pending = await get_pending_wallet(user_id)
     if not pending or not pending.get("awaiting_tx"):
         logger.warning(f"No pending transaction for user {user_id}")
         await update.message.reply_text("No pending transaction found. Use /createprofile, /buyTours, or another command again! 😅")
         logger.info(f"/handle_tx_hash no pending transaction, took {time.time() - start_time:.2f} seconds")
         return
-    if not w3:
-        logger.error("Web3 not initialized, transaction handling disabled")
-        await update.message.reply_text("Transaction handling unavailable due to blockchain issues. Try again later! 😅")
-        logger.info(f"/handle_tx_hash failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
-        return
     tx_hash = update.message.text.strip()
     if not tx_hash.startswith("0x") or len(tx_hash) != 66:
         await update.message.reply_text("Invalid transaction hash. Send a valid hash (e.g., 0x123...).")
         logger.info(f"/handle_tx_hash failed due to invalid hash, took {time.time() - start_time:.2f} seconds")
         return
+    if tx_hash.lower() in confirming_tx_hashes:
+        # Resending the hash while we wait must not confirm (and announce, and record) the same transaction twice
+        await update.message.reply_text("Already waiting for that transaction to confirm. I'll message you when it does! ⏳")
+        logger.info(f"/handle_tx_hash {tx_hash} already being confirmed for user {user_id}, took {time.time() - start_time:.2f} seconds")
+        return
+    confirming_tx_hashes.add(tx_hash.lower())  # claimed before the first await, so a resend racing this one is caught too
+    # Waiting for the receipt can take several blocks; don't hold up other updates meanwhile
+    try:
+        await update.message.reply_text(f"Transaction received! Waiting for confirmation... ⏳ [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash})", parse_mode="Markdown")
+    except Exception:
+        confirming_tx_hashes.discard(tx_hash.lower())
+        raise
+    context.application.create_task(confirm_tx_hash(update, context, req, pending, tx_hash), update=update)
+    logger.info(f"/handle_tx_hash registered {tx_hash} for user {user_id}, took {time.time() - start_time:.2f} seconds")
+
+async def confirm_tx_hash(update: Update, context: ContextTypes.DEFAULT_TYPE, req: CommandRequest, pending, tx_hash):
+    start_time = req.start_time
+    user_id = req.user_id
     try:
-        receipt = await w3.eth.get_transaction_receipt(tx_hash)
-        if receipt and receipt.status:
+        receipt = await receipt_tracker.wait(tx_hash, RECEIPT_WAIT_TIMEOUT)
+        if receipt.status:
+            if is_bundle_approval(pending, receipt):
+                gas_limits.observe("approve", receipt.gasUsed)
+                await update.message.reply_text("Approval confirmed! Sign the second transaction on the wallet page and send its hash here too. 🪙")
+                logger.info(f"/handle_tx_hash confirmed bundle approval for user {user_id}, took {time.time() - start_time:.2f} seconds")
+                return
             action = "Action completed"
-            if "createProfile" in pending["tx_data"]["data"]:
+            call = calldata_codec.decode(pending["tx_data"].get("data"))
+            function = call.name if call else None
+            gas_limits.observe(function, receipt.gasUsed)
+            if function == "createProfile":
                 action = "Profile created with 1 $TOURS funded to your wallet"
-            elif "buyTours" in pending["tx_data"]["data"]:
-                amount = int.from_bytes(bytes.fromhex(pending["tx_data"]["data"][10:]), byteorder='big') / 10**18
-                action = f"Successfully purchased {amount} $TOURS"
-            elif "transfer" in pending["tx_data"]["data"]:
+            elif function == "buyTours":
+                action = f"Successfully purchased {call.args['amount'] / 10**18} $TOURS"
+            elif function == "transfer":
                 action = "Successfully sent $TOURS to the recipient"
-            elif "createClimbingLocation" in pending["tx_data"]["data"]:
+            elif function == "createClimbingLocation":
                 action = f"Climb '{pending.get('name', 'Unknown')}' ({pending.get('difficulty', 'Unknown')}) created"
+            elif function == "addJournalEntryWithDetails":
+                action = "Journal entry added"
             await update.message.reply_text(f"Transaction confirmed! [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}) 🪙 {action}.", parse_mode="Markdown")
+            await link_media_entry(pending, receipt)
             if CHAT_HANDLE and TELEGRAM_TOKEN:
                 message = f"New activity by {escape_html(update.effective_user.username or update.effective_user.first_name)} on EmpowerTours! 🧗 <a href=\"{EXPLORER_URL}/tx/{tx_hash}\">Tx: {escape_html(tx_hash)}</a>"
                 await send_notification(CHAT_HANDLE, message)
-            if pending.get("next_tx"):
-                next_tx_data = pending["next_tx"]
-                if next_tx_data["type"] == "create_climbing_location":
-                    nonce = await w3.eth.get_transaction_count(pending["wallet_address"])
-                    tx = await contract.functions.createClimbingLocation(
-                        next_tx_data["name"],
-                        next_tx_data["difficulty"],
-                        next_tx_data["latitude"],
-                        next_tx_data["longitude"],
-                        next_tx_data["photo_hash"]
-                    ).build_transaction({
-                        'chainId': 10143,
-                        'from': pending["wallet_address"],
-                        'nonce': nonce,
-                        'gas': 500000,
-                        'gas_price': await w3.eth.gas_price
-                    })
-                    await set_pending_wallet(user_id, {
-                        "awaiting_tx": True,
-                        "tx_data": tx,
-                        "wallet_address": pending["wallet_address"],
-                        "timestamp": time.time(),
-                        "name": next_tx_data["name"],
-                        "difficulty": next_tx_data["difficulty"],
-                        "latitude": next_tx_data["latitude"],
-                        "longitude": next_tx_data["longitude"],
-                        "photo_hash": next_tx_data["photo_hash"]
-                    })
-                    await update.message.reply_text(
-                        f"Approval confirmed! Now open https://version1-production.up.railway.app/public/connect.html?userId={user_id} to sign the transaction for climb '{next_tx_data['name']}' ({next_tx_data['difficulty']}) using 10 $TOURS."
-                    )
-                    logger.info(f"/handle_tx_hash processed approval, next transaction built for user {user_id}, took {time.time() - start_time:.2f} seconds")
-                    return
-                elif next_tx_data["type"] == "add_journal_entry":
-                    nonce = await w3.eth.get_transaction_count(pending["wallet_address"])
-                    tx = await contract.functions.addJournalEntryWithDetails(
-                        next_tx_data["content_hash"],
-                        next_tx_data["location"],
-                        next_tx_data["difficulty"],
-                        next_tx_data["is_shared"],
-                        next_tx_data["cast_hash"]
-                    ).build_transaction({
-                        'chainId': 10143,
-                        'from': pending["wallet_address"],
-                        'nonce': nonce,
-                        'gas': 500000,
-                        'gas_price': await w3.eth.gas_price
-                    })
-                    await set_pending_wallet(user_id, {
-                        "awaiting_tx": True,
-                        "tx_data": tx,
-                        "wallet_address": pending["wallet_address"],
-                        "timestamp": time.time()
-                    })
-                    await update.message.reply_text(
-                        f"Approval confirmed! Now open https://version1-production.up.railway.app/public/connect.html?userId={user_id} to sign the transaction for journal entry using 5 $TOURS."
-                    )
-                    logger.info(f"/handle_tx_hash processed approval, next transaction built for journal, took {time.time() - start_time:.2f} seconds")
-                    return
             await delete_pending_wallet(user_id)
             logger.info(f"/handle_tx_hash confirmed for user {user_id}, took {time.time() - start_time:.2f} seconds")
         else:
-            await update.message.reply_text("Transaction failed or pending. Check and try again! 😅")
-            logger.info(f"/handle_tx_hash failed or pending, took {time.time() - start_time:.2f} seconds")
+            await update.message.reply_text("Transaction failed on-chain. Check and try again! 😅")
+            logger.info(f"/handle_tx_hash failed (reverted), took {time.time() - start_time:.2f} seconds")
+    except asyncio.TimeoutError:
+        await update.message.reply_text(f"Transaction still pending after {RECEIPT_WAIT_TIMEOUT} seconds. Send the hash again once it is mined. ⏳")
+        logger.info(f"/handle_tx_hash still pending, took {time.time() - start_time:.2f} seconds")
     except Exception as e:
         logger.error(f"Error in handle_tx_hash: {str(e)}, took {time.time() - start_time:.2f} seconds")
         error_msg = html.escape(str(e))
         support_link = '<a href="https://t.me/empowertourschat">EmpowerTours Chat</a>'
         await update.message.reply_text(f"Error: {error_msg}. Try again or contact support at {support_link}. 😅", parse_mode="HTML")
+    finally:
+        confirming_tx_hashes.discard(tx_hash.lower())
 
 async def monitor_events(context: ContextTypes.DEFAULT_TYPE):
     start_time = time.time()
-    global last_processed_block
+    global last_processed_block, tournaments_ready
     if not w3 or not contract:
         logger.error("Web3 or contract not initialized, cannot monitor events")
         logger.info(f"monitor_events failed due to Web3 issues, took {time.time() - start_time:.2f} seconds")
@@ -3254,73 +3424,73 @@ async def monitor_events(context: ContextTypes.DEFAULT_TYPE):
             'address': w3.to_checksum_address(CONTRACT_ADDRESS)
         })
 
-        # Event map with corrected signatures, hashes, and lambdas (hashes computed from ABI signatures)
+        # Announcement per event name; names come from the ABI-derived topic table
         event_map = {
-            "b092b68cd4087066d88561f213472db328f688a8993b20e9eab36fee4d6679fd": (  # LocationPurchased(uint256,address,uint256)
+            "LocationPurchased": (  # LocationPurchased(uint256,address,uint256)
                 contract.events.LocationPurchased,
                 lambda e: f"Climb #{e.args.locationId} purchased by <a href=\"{EXPLORER_URL}/address/{e.args.buyer}\">{e.args.buyer[:6]}...</a> on EmpowerTours! 🪙"
             ),
-            "ad043c04181883ece2f6dc02cf2978a3b453c3d2323bb4bfb95865f910e6c3ce": (  # LocationPurchasedEnhanced(uint256,address,uint256,uint256)
+            "LocationPurchasedEnhanced": (  # LocationPurchasedEnhanced(uint256,address,uint256,uint256)
                 contract.events.LocationPurchasedEnhanced,
                 lambda e: f"Enhanced climb #{e.args.locationId} purchased by <a href=\"{EXPLORER_URL}/address/{e.args.buyer}\">{e.args.buyer[:6]}...</a> on EmpowerTours! 🪙"
             ),
-            "aa3a75c48d1cad3bf60136ab33bc8fd62f31c2b25812d8604da0b7e7fc6d7271": (  # ProfileCreated(address,uint256)
+            "ProfileCreated": (  # ProfileCreated(address,uint256)
                 contract.events.ProfileCreated,
                 lambda e: f"New climber joined EmpowerTours! 🧗 Address: <a href=\"{EXPLORER_URL}/address/{e.args.user}\">{e.args.user[:6]}...</a>"
             ),
-            "dbf3456d5f59d51cf0e4442bf1c140db5b4b3bd090be958900af45a8310f3deb": (  # ProfileCreatedEnhanced(address,uint256,string,uint256)
+            "ProfileCreatedEnhanced": (  # ProfileCreatedEnhanced(address,uint256,string,uint256)
                 contract.events.ProfileCreatedEnhanced,
                 lambda e: f"New climber with Farcaster profile joined EmpowerTours! 🧗 Address: <a href=\"{EXPLORER_URL}/address/{e.args.user}\">{e.args.user[:6]}...</a>"
             ),
-            "1f6c34ae7cdb1fe8d152ff37aa480fa0c07f0e0345571e5854cf2b1d4baa75b2": (  # JournalEntryAdded(uint256,address,string,uint256)
+            "JournalEntryAdded": (  # JournalEntryAdded(uint256,address,string,uint256)
                 contract.events.JournalEntryAdded,
                 lambda e: f"New journal entry #{e.args.entryId} by <a href=\"{EXPLORER_URL}/address/{e.args.author}\">{e.args.author[:6]}...</a> on EmpowerTours! 📝"
             ),
-            "8949aebb3586111f1bb264e765b7b0ef7414304cd8c9f061c1c5c56fdcb81862": (  # JournalEntryAddedEnhanced(uint256,address,uint256,string,string,string,bool,uint256)
+            "JournalEntryAddedEnhanced": (  # JournalEntryAddedEnhanced(uint256,address,uint256,string,string,string,bool,uint256)
                 contract.events.JournalEntryAddedEnhanced,
                 lambda e: f"New enhanced journal entry #{e.args.entryId} by <a href=\"{EXPLORER_URL}/address/{e.args.author}\">{e.args.author[:6]}...</a> on EmpowerTours! 📝"
             ),
-            "e22806c8e7df3b9bb5e604a064687dd40d114ccb9b5155678fce0139abf40a2e": (  # CommentAdded(uint256,address,string,uint256)
+            "CommentAdded": (  # CommentAdded(uint256,address,string,uint256)
                 contract.events.CommentAdded,
                 lambda e: f"New comment on journal #{e.args.entryId} by <a href=\"{EXPLORER_URL}/address/{e.args.commenter}\">{e.args.commenter[:6]}...</a> on EmpowerTours! 🗣️"
             ),
-            "0144b9a4c17706f753bf8a43586b92072b9db35f1e038d5c632b9453e38517c7": (  # CommentAddedEnhanced(uint256,address,uint256,string,string,uint256)
+            "CommentAddedEnhanced": (  # CommentAddedEnhanced(uint256,address,uint256,string,string,uint256)
                 contract.events.CommentAddedEnhanced,
                 lambda e: f"New enhanced comment on journal #{e.args.entryId} by <a href=\"{EXPLORER_URL}/address/{e.args.commenter}\">{e.args.commenter[:6]}...</a> on EmpowerTours! 🗣️"
             ),
-            "85a125ab0a37494cb20f1e60f7c4b7ba8f6152e82afbe2fd3250ff83ae3363dc": (  # ClimbingLocationCreated(uint256,address,string,uint256)
+            "ClimbingLocationCreated": (  # ClimbingLocationCreated(uint256,address,string,uint256)
                 contract.events.ClimbingLocationCreated,
                 lambda e: f"New climb '{e.args.name}' created by <a href=\"{EXPLORER_URL}/address/{e.args.creator}\">{e.args.creator[:6]}...</a> on EmpowerTours! 🪨"
             ),
-            "dd0c2d9cafda4b18e58db06355a912e9ab579dee92649495ae4dc3f0365a269a": (  # ClimbingLocationCreatedEnhanced(uint256,address,uint256,string,string,int256,int256,bool,uint256)
+            "ClimbingLocationCreatedEnhanced": (  # ClimbingLocationCreatedEnhanced(uint256,address,uint256,string,string,int256,int256,bool,uint256)
                 contract.events.ClimbingLocationCreatedEnhanced,
                 lambda e: f"New enhanced climb '{e.args.name}' created by <a href=\"{EXPLORER_URL}/address/{e.args.creator}\">{e.args.creator[:6]}...</a> on EmpowerTours! 🪨"
             ),
-            "d72d415fee16f78aefb0faa7ae3f5221a8d557570c7db32ed71033c7b1717a41": (  # TournamentCreated(uint256,uint256,uint256)
+            "TournamentCreated": (  # TournamentCreated(uint256,uint256,uint256)
                 contract.events.TournamentCreated,
                 lambda e: f"New tournament #{e.args.tournamentId} created on EmpowerTours! 🏆"
             ),
-            "682cad4379e12a2831600094eb5f795719dea3285c32df028adb89bd2b84a571": (  # TournamentCreatedEmbedded(uint256,address,uint256,string,uint256,uint256)
+            "TournamentCreatedEmbedded": (  # TournamentCreatedEmbedded(uint256,address,uint256,string,uint256,uint256)
                 contract.events.TournamentCreatedEmbedded,
                 lambda e: f"New embedded tournament #{e.args.tournamentId} created by <a href=\"{EXPLORER_URL}/address/{e.args.creator}\">{e.args.creator[:6]}...</a> on EmpowerTours! 🏆"
             ),
-            "9b71079da01b6505f63bcd5edd4a7a9dbc55173971019151c9654ae29def6bac": (  # TournamentJoined(uint256,address)
+            "TournamentJoined": (  # TournamentJoined(uint256,address)
                 contract.events.TournamentJoined,
                 lambda e: f"Climber <a href=\"{EXPLORER_URL}/address/{e.args.participant}\">{e.args.participant[:6]}...</a> joined tournament #{e.args.tournamentId} on EmpowerTours! 🏆"
             ),
-            "2cccfd0c70d5149159c82c9c2d66f2a9874ec2356c5c0788087ec7313916e02e": (  # TournamentJoinedEnhanced(uint256,address,uint256)
+            "TournamentJoinedEnhanced": (  # TournamentJoinedEnhanced(uint256,address,uint256)
                 contract.events.TournamentJoinedEnhanced,
                 lambda e: f"Climber <a href=\"{EXPLORER_URL}/address/{e.args.participant}\">{e.args.participant[:6]}...</a> joined enhanced tournament #{e.args.tournamentId} on EmpowerTours! 🏆"
             ),
-            "dd7ad4d17119eef4327e49ef4368c3d112ab5b71ee7918afcadc779b78eed9d9": (  # TournamentEnded(uint256,uint256,uint256)
+            "TournamentEnded": (  # TournamentEnded(uint256,uint256,uint256)
                 contract.events.TournamentEnded,
                 lambda e: f"Tournament #{e.args.tournamentId} ended! Prize pot: {e.args.pot / 10**18} $TOURS 🏆"
             ),
-            "f0f0525a5ef10132058aa9a3feb1a1f6d503037788ea59f454076e216da1a741": (  # TournamentEndedEnhanced(uint256,address,uint256,uint256)
+            "TournamentEndedEnhanced": (  # TournamentEndedEnhanced(uint256,address,uint256,uint256)
                 contract.events.TournamentEndedEnhanced,
                 lambda e: f"Enhanced tournament #{e.args.tournamentId} ended! Winner: <a href=\"{EXPLORER_URL}/address/{e.args.winner}\">{e.args.winner[:6]}...</a> Prize: {e.args.pot / 10**18} $TOURS 🏆"
             ),
-            "b9f217daf6aa350a9b78812562d0d1afba9439b7b595919c7d9dfc40d2230f35": (  # ToursPurchased(address,uint256,uint256)
+            "ToursPurchased": (  # ToursPurchased(address,uint256,uint256)
                 contract.events.ToursPurchased,
                 lambda e: f"User <a href=\"{EXPLORER_URL}/address/{e.args.buyer}\">{e.args.buyer[:6]}...</a> bought {e.args.toursAmount / 10**18} $TOURS on EmpowerTours! 🪙"
             ),
@@ -3328,10 +3498,53 @@ async def monitor_events(context: ContextTypes.DEFAULT_TYPE):
 
         for log in logs:
             try:
-                topic0 = log['topics'][0].hex()
-                if topic0 in event_map:
-                    event_class, message_fn = event_map[topic0]
-                    event = event_class().process_log(log)
+                name = log_event_name(log)
+                if name is None:
+                    continue
+                event = getattr(contract.events, name)().process_log(log)
+                activity_index.add(name, event.args, log['blockNumber'], log['logIndex'])
+                # Store and index before announcing, so a failed notification or PM can't leave these behind
+                if name == "LocationPurchased":
+                    buyer = event.args.buyer
+                    checksum_buyer = w3.to_checksum_address(buyer)
+                    if checksum_buyer in reverse_sessions:
+                        user_id = reverse_sessions[checksum_buyer]
+                        async with pool.acquire() as conn:
+                            await conn.execute(
+                                "INSERT INTO purchases (user_id, wallet_address, location_id, timestamp) VALUES ($1, $2, $3, $4)",
+                                user_id, checksum_buyer, event.args.locationId, event.args.timestamp
+                            )
+                elif name == "LocationPurchasedEnhanced":
+                    buyer = event.args.buyer
+                    checksum_buyer = w3.to_checksum_address(buyer)
+                    if checksum_buyer in reverse_sessions:
+                        user_id = reverse_sessions[checksum_buyer]
+                        async with pool.acquire() as conn:
+                            await conn.execute(
+                                "INSERT INTO purchases (user_id, wallet_address, location_id, timestamp) VALUES ($1, $2, $3, $4)",
+                                user_id, checksum_buyer, event.args.locationId, event.args.timestamp
+                            )
+                elif name in ("ClimbingLocationCreated", "ClimbingLocationCreatedEnhanced"):
+                    # Until /nearby, /findaclimb or /search has loaded every climb there is nothing to keep current
+                    if climb_grid_ready or climb_cache or search_index_ready:
+                        location_id = event.args.locationId
+                        location = await contract.functions.climbingLocations(location_id).call({'gas': 500000})
+                        index_climb(location_id, location)
+                        if climb_cache:
+                            climb_cache.add(location_id, location)
+                elif name in ("JournalEntryAdded", "JournalEntryAddedEnhanced"):
+                    if search_index_ready:
+                        entry_id = event.args.entryId
+                        index_journal(entry_id, await contract.functions.getJournalEntry(entry_id).call({'gas': 500000}))
+                elif name in ("CommentAdded", "CommentAddedEnhanced"):
+                    comment_index.add(event.args.entryId, event.args.commenter, event.args.contentHash, event.args.timestamp)
+                elif name in TOURNAMENT_EVENTS:
+                    # Applied even before the backfill has run: events are idempotent, so its replay changes nothing
+                    ended_id = tournament_store.apply(event.event, event.args)
+                    if ended_id is not None and await resolve_tournament_winners([ended_id]):
+                        tournaments_ready = False
+                if name in event_map:
+                    _, message_fn = event_map[name]
                     message = message_fn(event)
                     # Auto-announce to group
                     await send_notification(CHAT_HANDLE, message)
@@ -3342,28 +3555,10 @@ async def monitor_events(context: ContextTypes.DEFAULT_TYPE):
                         if checksum_user_address in reverse_sessions:
                             user_id = reverse_sessions[checksum_user_address]
                             user_message = f"Your action succeeded! {message.replace('<a href=', '[Tx: ').replace('</a>', ']')} 🪙 Check details on {EXPLORER_URL}/tx/{log['transactionHash'].hex()}"
-                            await application.bot.send_message(user_id, user_message, parse_mode="Markdown")
-                    # Store purchase in DB if LocationPurchased
-                    if topic0 == "b092b68cd4087066d88561f213472db328f688a8993b20e9eab36fee4d6679fd":  # LocationPurchased(uint256,address,uint256)
-                        buyer = event.args.buyer
-                        checksum_buyer = w3.to_checksum_address(buyer)
-                        if checksum_buyer in reverse_sessions:
-                            user_id = reverse_sessions[checksum_buyer]
-                            async with pool.acquire() as conn:
-                                await conn.execute(
-                                    "INSERT INTO purchases (user_id, wallet_address, location_id, timestamp) VALUES ($1, $2, $3, $4)",
-                                    user_id, checksum_buyer, event.args.locationId, event.args.timestamp
-                                )
-                    elif topic0 == "ad043c04181883ece2f6dc02cf2978a3b453c3d2323bb4bfb95865f910e6c3ce":  # LocationPurchasedEnhanced
-                        buyer = event.args.buyer
-                        checksum_buyer = w3.to_checksum_address(buyer)
-                        if checksum_buyer in reverse_sessions:
-                            user_id = reverse_sessions[checksum_buyer]
-                            async with pool.acquire() as conn:
-                                await conn.execute(
-                                    "INSERT INTO purchases (user_id, wallet_address, location_id, timestamp) VALUES ($1, $2, $3, $4)",
-                                    user_id, checksum_buyer, event.args.locationId, event.args.timestamp
-                                )
+                            try:
+                                await application.bot.send_message(user_id, user_message, parse_mode="Markdown")
+                            except Exception as e:
+                                logger.error(f"Error sending event PM to user {user_id}: {str(e)}")
             except Exception as e:
                 logger.error(f"Error processing log: {str(e)}")
 
@@ -3372,6 +3567,51 @@ async def monitor_events(context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logger.error(f"Error in monitor_events: {str(e)}, took {time.time() - start_time:.2f} seconds")
 
+async def build_approval_bundle(wallet_address, amount, action, function):
+    # approve at nonce n and the paid action at n + 1, built together: the wallet page signs both
+    # back to back instead of waiting for the approval receipt and a second build-and-poll cycle.
+    # The action can't be simulated yet (it would revert on allowance), so it gets the learned gas limit.
+    nonce, fees = await asyncio.gather(w3.eth.get_transaction_count(wallet_address), fee_oracle.fees())
+    params = {'chainId': 10143, 'from': wallet_address, **fees}
+    approve_tx = await tours_contract.functions.approve(contract.address, amount).build_transaction({
+        **params,
+        'nonce': nonce,
+        'gas': gas_limits.limit("approve")
+    })
+    action_tx = await action.build_transaction({
+        **params,
+        'nonce': nonce + 1,
+        'gas': gas_limits.limit(function)
+    })
+    return [approve_tx, action_tx]
+
+def is_bundle_approval(pending, receipt):
+    # Receipt of the approve leg of a bundle; the pending entry stays until the action leg confirms
+    return bool(pending.get("bundle")) and str(receipt.get("to") or "").lower() == tours_contract.address.lower()
+
+async def link_media_entry(pending, receipt):
+    # The created id comes straight from the receipt's logs: no extra RPC read, and no race with
+    # other users creating entries in the same block. Approval receipts carry no such event.
+    entry_type = pending.get("entry_type")
+    photo_hash = pending.get("photo_hash")
+    if not entry_type or not photo_hash:
+        return None
+    entry_id = created_entity_id(contract, receipt, entry_type)
+    if entry_id is None:
+        return None
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "UPDATE media_files SET entry_id = $1 WHERE hash = $2",
+            entry_id, photo_hash
+        )
+    logger.info(f"Linked media {photo_hash} to {entry_type} #{entry_id}")
+    return entry_id
+
+async def probe_rpc_health(context: ContextTypes.DEFAULT_TYPE):
+    if not w3:
+        return
+    await rpc_health.probe(w3)
+
 async def log_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     start_time = time.time()
     device_info = (
@@ -3400,23 +3640,18 @@ async def set_session(user_id, wallet_address):
         )
 
 async def get_pending_wallet(user_id):
-    return pending_wallets.get(user_id)
+    return pending_store.get(user_id)
 
 async def set_pending_wallet(user_id, data):
-    global pending_wallets
-    pending_wallets[user_id] = data
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "INSERT INTO pending_wallets (user_id, data, timestamp) VALUES ($1, $2, $3) ON CONFLICT (user_id) DO UPDATE SET data = $2, timestamp = $3",
-            user_id, json.dumps(data), data['timestamp']
-        )
+    if data.get("awaiting_tx") and not data.get("tx_served"):
+        tx_notifier.notify(user_id)  # wake /tx_stream before the Postgres write, the page doesn't need it
+    await pending_store.put(pool, user_id, data)
+
+async def mark_pending_served(user_id):
+    await pending_store.mark_served(pool, user_id)
 
 async def delete_pending_wallet(user_id):
-    global pending_wallets
-    if user_id in pending_wallets:
-        del pending_wallets[user_id]
-    async with pool.acquire() as conn:
-        await conn.execute("DELETE FROM pending_wallets WHERE user_id = $1", user_id)
+    await pending_store.delete(pool, user_id)
 
 async def get_journal_data(user_id):
     return journal_data.get(user_id)
@@ -3457,10 +3692,10 @@ async def delete_journal_data(user_id):
 
 async def startup_event():
     start_time = time.time()
-    global application, webhook_failed, pool, sessions, reverse_sessions, pending_wallets, journal_data
+    global application, webhook_failed, pool, sessions, reverse_sessions, journal_data
     try:
         # Initialize Postgres pool
-        pool = await asyncpg.create_pool(DATABASE_URL)
+        pool = await asyncpg.create_pool(DATABASE_URL, init=init_pg_connection)
         async with pool.acquire() as conn:
             # Create tables
             await conn.execute("""
@@ -3470,13 +3705,6 @@ async def startup_event():
             )
             """)
             await conn.execute("""
-            CREATE TABLE IF NOT EXISTS pending_wallets (
-                user_id TEXT PRIMARY KEY,
-                data JSONB,
-                timestamp FLOAT
-            )
-            """)
-            await conn.execute("""
             CREATE TABLE IF NOT EXISTS journal_data (
                 user_id TEXT PRIMARY KEY,
                 data JSONB,
@@ -3510,13 +3738,8 @@ async def startup_event():
                 if row['wallet_address']:
                     reverse_sessions[row['wallet_address']] = row['user_id']
 
-            rows = await conn.fetch("SELECT * FROM pending_wallets")
-            pending_wallets = {}
+            pending_count = await pending_store.load(conn)
             current_time = time.time()
-            for row in rows:
-                if current_time - row['timestamp'] < 3600:
-                    pending_wallets[row['user_id']] = json.loads(row['data'])
-                    pending_wallets[row['user_id']]['timestamp'] = row['timestamp']
 
             rows = await conn.fetch("SELECT * FROM journal_data")
             journal_data = {}
@@ -3525,7 +3748,7 @@ async def startup_event():
                     journal_data[row['user_id']] = json.loads(row['data'])
                     journal_data[row['user_id']]['timestamp'] = row['timestamp']
 
-            logger.info(f"Loaded from DB: {len(sessions)} sessions, {len(pending_wallets)} pending_wallets, {len(journal_data)} journal_data")
+            logger.info(f"Loaded from DB: {len(sessions)} sessions, {pending_count} pending_txs, {len(journal_data)} journal_data")
 
         # One-time historical backfill for purchases
         if w3 and contract:
@@ -3589,39 +3812,53 @@ async def startup_event():
         await initialize_web3()
 
         # Initialize Telegram Application
-        application = Application.builder().token(TELEGRAM_TOKEN).build()
+        application = Application.builder().token(TELEGRAM_TOKEN).request(TimedHTTPXRequest()).build()
         logger.info("Application initialized")
 
         # Register command handlers
-        application.add_handler(CommandHandler("start", start))
-        application.add_handler(CommandHandler("tutorial", tutorial))
-        application.add_handler(CommandHandler("connectwallet", connect_wallet))
-        application.add_handler(CommandHandler("createprofile", create_profile))
-        application.add_handler(CommandHandler("help", help))
-        application.add_handler(CommandHandler("journal", journal_entry))
-        application.add_handler(CommandHandler("comment", add_comment))
-        application.add_handler(CommandHandler("buildaclimb", buildaclimb))
-        application.add_handler(CommandHandler("purchaseclimb", purchase_climb))
-        application.add_handler(CommandHandler("findaclimb", findaclimb))
-        application.add_handler(CommandHandler("journals", journals))
-        application.add_handler(CommandHandler("viewjournal", viewjournal))
-        application.add_handler(CommandHandler("viewclimb", viewclimb))
-        application.add_handler(CommandHandler("mypurchases", mypurchases))
-        application.add_handler(CommandHandler("createtournament", createtournament))
-        application.add_handler(CommandHandler("tournaments", tournaments))
-        application.add_handler(CommandHandler("jointournament", jointournament))
-        application.add_handler(CommandHandler("endtournament", endtournament))
-        application.add_handler(CommandHandler("balance", balance))
-        application.add_handler(CommandHandler("buyTours", buy_tours))
-        application.add_handler(CommandHandler("sendTours", send_tours))
-        application.add_handler(CommandHandler("ping", ping))
-        application.add_handler(CommandHandler("debug", debug_command))
-        application.add_handler(CommandHandler("forcewebhook", forcewebhook))
-        application.add_handler(CommandHandler("clearcache", clearcache))
-        application.add_handler(MessageHandler(filters.Regex(r'^0x[a-fA-F0-9]{64}$'), handle_tx_hash))
-        application.add_handler(MessageHandler(filters.PHOTO, handle_photo))
-        application.add_handler(MessageHandler(filters.LOCATION, handle_location))
-        application.add_handler(MessageHandler(filters.COMMAND, debug_command))
+        # Middleware chains: every command is rate limited, timed and shows "typing" while it runs
+        base = [rate_limit, time_command, typing_indicator()]
+        chain = [require_web3()]
+        api_chain = [require_api, require_web3()]
+        wallet_chain = [require_api, require_web3(), resolve_wallet()]
+        tours_wallet_chain = [require_api, require_web3(tours=True), resolve_wallet()]
+        command_handlers = [
+            ("start", start, []),
+            ("tutorial", tutorial, []),
+            ("connectwallet", connect_wallet, [require_api]),
+            ("createprofile", create_profile, tours_wallet_chain),
+            ("help", help, []),
+            ("journal", journal_entry, api_chain),
+            ("comment", add_comment, wallet_chain),
+            ("buildaclimb", buildaclimb, tours_wallet_chain),
+            ("purchaseclimb", purchase_climb, tours_wallet_chain),
+            ("findaclimb", findaclimb, chain),
+            ("nearby", nearby, chain),
+            ("journals", journals, chain),
+            ("search", search, chain),
+            ("viewjournal", viewjournal, chain),
+            ("viewclimb", viewclimb, chain),
+            ("mypurchases", mypurchases, [require_web3(), resolve_wallet()]),
+            ("myactivity", myactivity, [require_web3(), resolve_wallet()]),
+            ("createtournament", createtournament, wallet_chain),
+            ("tournaments", tournaments, chain),
+            ("leaderboard", leaderboard, chain),
+            ("jointournament", jointournament, tours_wallet_chain),
+            ("endtournament", endtournament, wallet_chain),
+            ("balance", balance, [require_web3(tours=True), resolve_wallet()]),
+            ("buyTours", buy_tours, tours_wallet_chain),
+            ("sendTours", send_tours, tours_wallet_chain),
+            ("ping", ping, []),
+            ("debug", debug_command, []),
+            ("forcewebhook", forcewebhook, []),
+            ("clearcache", clearcache, []),
+        ]
+        for command, callback, middlewares in command_handlers:
+            application.add_handler(CommandHandler(command, pipeline(command, callback, base + middlewares)))
+        application.add_handler(MessageHandler(filters.Regex(r'^0x[a-fA-F0-9]{64}$'), pipeline("tx_hash", handle_tx_hash, [typing_indicator(), require_web3()])))
+        application.add_handler(MessageHandler(filters.PHOTO, pipeline("photo", handle_photo, [typing_indicator(ChatAction.UPLOAD_PHOTO), require_api, require_web3()])))
+        application.add_handler(MessageHandler(filters.LOCATION, pipeline("location", handle_location, [typing_indicator(ChatAction.FIND_LOCATION), nearby_location, require_api, require_web3(tours=True), resolve_wallet(required=False)])))
+        application.add_handler(MessageHandler(filters.COMMAND, pipeline("debug", debug_command, [typing_indicator()])))
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, log_message))
         logger.info("Command handlers registered successfully")
 
@@ -3629,6 +3866,10 @@ async def startup_event():
         if application.job_queue:
             logger.info("JobQueue available, scheduling monitor_events")
             application.job_queue.run_repeating(monitor_events, interval=30, first=10)
+            application.job_queue.run_repeating(probe_rpc_health, interval=RPC_PROBE_INTERVAL, first=5)
+            application.job_queue.run_repeating(backfill_events, interval=60, first=15)
+            if EVENT_FROM_BLOCK == 0:
+                logger.warning("EVENT_FROM_BLOCK is not set: event backfills scan from block 0; set it to the contract's deploy block")
         else:
             logger.warning("JobQueue not available, monitor_events not scheduled")
 
@@ -3669,6 +3910,10 @@ async def shutdown_event():
     if pool:
         await pool.close()
         logger.info("Postgres pool closed")
+    if fee_oracle:
+        await fee_oracle.stop()
+    if w3:
+        await w3.provider.disconnect()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -3702,27 +3947,62 @@ async def log_static_access(path: str, request: Request):
     logger.info(f"/public/{path} served, took {time.time() - start_time:.2f} seconds")
     return response
 
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/get_transaction")
-async def get_transaction(userId: str):
+async def get_transaction(userId: str, peek: bool = False):
     start_time = time.time()
     logger.info(f"Received /get_transaction request for user {userId}")
     try:
-        pending = await get_pending_wallet(userId)
-        if pending and pending.get("awaiting_tx"):
-            if pending.get("tx_served", False):
-                # Already served once—prevent repeat
-                logger.info(f"Transaction already served for user {userId}, ignoring repeat poll")
-                return {"transaction": None}
-            pending["tx_served"] = True  # Mark as served
-            await set_pending_wallet(userId, pending)
-            logger.info(f"Transaction served (once) for user {userId}: {pending['tx_data']}, took {time.time() - start_time:.2f} seconds")
-            return {"transaction": pending["tx_data"]}
+        payload = await take_pending_transaction(userId, peek=peek)
+        if payload:
+            logger.info(f"Transaction served (once) for user {userId}: {len(payload['transactions'])} to sign, took {time.time() - start_time:.2f} seconds")
+            return payload
         logger.info(f"No transaction found for user {userId}, took {time.time() - start_time:.2f} seconds")
-        return {"transaction": None}
+        return {"transaction": None, "transactions": []}
     except Exception as e:
         logger.error(f"Error in /get_transaction for user {userId}: {str(e)}, took {time.time() - start_time:.2f} seconds")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def take_pending_transaction(user_id, peek=False):
+    # Serve a stored transaction once; peek (miniapp.html) only reports it without consuming it
+    pending = await get_pending_wallet(user_id)
+    if not pending or not pending.get("awaiting_tx") or pending.get("tx_served", False):
+        return None
+    transactions = pending.get("bundle") or [pending["tx_data"]]
+    if not peek:
+        await mark_pending_served(user_id)  # flips the cached row first, so a second tab sees it immediately
+    # "transactions" is signed in order with sequential nonces; "transaction" is the final action
+    return {"transaction": pending["tx_data"], "transactions": transactions}
+
+@app.get("/tx_stream")
+async def tx_stream(userId: str, request: Request, peek: bool = False):
+    # Server-Sent Events: a "transaction" event the moment set_pending_wallet stores one, and a
+    # comment line every TX_STREAM_KEEPALIVE seconds otherwise. Idle streams cost no DB or RPC work.
+    logger.info(f"Opened /tx_stream for user {userId} (peek={peek})")
+
+    async def events():
+        tx_notifier.acquire(userId)
+        last_payload = None  # peek never consumes, so don't repeat the same transaction after every keepalive
+        try:
+            while not await request.is_disconnected():
+                event = tx_notifier.listen(userId)
+                payload = await take_pending_transaction(userId, peek=peek)
+                if payload and payload != last_payload:
+                    last_payload = payload
+                    logger.info(f"Transaction pushed to user {userId} over /tx_stream: {len(payload['transactions'])} to sign")
+                    yield sse("transaction", payload)
+                if not await tx_notifier.wait(event, TX_STREAM_KEEPALIVE):
+                    yield ": keepalive\n\n"
+        finally:
+            tx_notifier.release(userId)
+            logger.info(f"Closed /tx_stream for user {userId}")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/submit_wallet")
 async def submit_wallet(request: Request):
     start_time = time.time()
@@ -3742,7 +4022,7 @@ async def submit_wallet(request: Request):
             logger.info(f"/submit_wallet failed due to invalid address or Web3, took {time.time() - start_time:.2f} seconds")
             return {"status": "error"}
         
-        # Process wallet even if not in pending_wallets to handle edge cases
+        # Process wallet even if not in pending_txs to handle edge cases
         pending = await get_pending_wallet(user_id)
         if not pending or not pending.get("awaiting_wallet"):
             logger.warning(f"No pending wallet connection for user {user_id}, proceeding anyway")
@@ -3789,42 +4069,45 @@ async def submit_tx(request: Request):
             logger.error("Web3 not initialized, transaction handling disabled")
             raise HTTPException(status_code=500, detail="Blockchain unavailable")
         try:
-            receipt = await w3.eth.get_transaction_receipt(tx_hash)
-            if receipt and receipt.status:
+            try:
+                receipt = await receipt_tracker.wait(tx_hash, RECEIPT_WAIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                await application.bot.send_message(
+                    user_id,
+                    f"Transaction still pending after {RECEIPT_WAIT_TIMEOUT} seconds: [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}). Send the hash here once it is mined. ⏳",
+                    parse_mode="Markdown"
+                )
+                logger.info(f"/submit_tx still pending for user {user_id}, took {time.time() - start_time:.2f} seconds")
+                return {"status": "pending"}
+            if receipt.status:
                 pending = await get_pending_wallet(user_id)
+                if pending and is_bundle_approval(pending, receipt):
+                    # The action leg was signed right after this one and is confirmed by its own /submit_tx
+                    gas_limits.observe("approve", receipt.gasUsed)
+                    logger.info(f"/submit_tx confirmed bundle approval for user {user_id}, took {time.time() - start_time:.2f} seconds")
+                    return {"status": "success"}
                 if pending:
-                    input_data = pending.get("tx_data", {}).get("data", "")
+                    call = calldata_codec.decode(pending.get("tx_data", {}).get("data"))
+                    function = call.name if call else None
+                    gas_limits.observe(function, receipt.gasUsed)
                     success_message = f"Transaction confirmed! [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}) 🪙 Action completed successfully."
-                    if input_data.startswith('0x00547664'):  # createProfile
+                    if function == "createProfile":
                         success_message = f"Transaction confirmed! [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}) 🪙 Profile created with 1 $TOURS funded to your wallet."
-                    elif input_data.startswith('0x9954e40d'):  # buyTours
-                        amount = int.from_bytes(bytes.fromhex(input_data[10:]), byteorder='big') / 10**18
-                        success_message = f"Transaction confirmed! [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}) 🪙 Successfully purchased {amount} $TOURS."
-                    elif input_data.startswith('0xa9059cbb'):  # transfer (sendTours)
+                    elif function == "buyTours":
+                        success_message = f"Transaction confirmed! [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}) 🪙 Successfully purchased {call.args['amount'] / 10**18} $TOURS."
+                    elif function == "transfer":
                         success_message = f"Transaction confirmed! [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}) 🪙 Successfully sent $TOURS to the recipient."
-                    elif input_data.startswith('0xfe985ae0'):  # createClimbingLocation
+                    elif function == "createClimbingLocation":
                         success_message = f"Transaction confirmed! [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}) 🪙 Climb '{pending.get('name', 'Unknown')}' ({pending.get('difficulty', 'Unknown')}) created!"
-                    elif input_data.startswith('0x6b8b0b0a'):  # addJournalEntryWithDetails, check the selector
+                    elif function == "addJournalEntryWithDetails":
                         success_message = f"Transaction confirmed! [Tx: {tx_hash}]({EXPLORER_URL}/tx/{tx_hash}) 🪙 Journal entry added!"
                     if CHAT_HANDLE and TELEGRAM_TOKEN:
                         message = f"New activity by user {user_id} on EmpowerTours! 🧗 <a href=\"{EXPLORER_URL}/tx/{tx_hash}\">Tx: {escape_html(tx_hash)}</a>"
                         await send_notification(CHAT_HANDLE, message)
                     await application.bot.send_message(user_id, success_message, parse_mode="Markdown")
-                    entry_type = pending.get('entry_type')
-                    photo_hash = pending.get('photo_hash')
-                    if entry_type and photo_hash:
-                        if entry_type == 'journal':
-                            entry_id = await contract.functions.getJournalEntryCount().call() - 1
-                        elif entry_type == 'climb':
-                            entry_id = await contract.functions.getClimbingLocationCount().call() - 1
-                        async with pool.acquire() as conn:
-                            await conn.execute(
-                                "UPDATE media_files SET entry_id = $1 WHERE hash = $2",
-                                entry_id, photo_hash
-                            )
-                    # Add for purchaseClimbingLocation
-                    if input_data.startswith('0xd2494431'):  # purchaseClimbingLocation selector
-                        location_id = int.from_bytes(bytes.fromhex(input_data[10:]), 'big')
+                    await link_media_entry(pending, receipt)
+                    if function == "purchaseClimbingLocation":
+                        location_id = call.args['locationId']
                         block = await w3.eth.get_block(receipt.blockNumber)
                         timestamp = block.timestamp
                         async with pool.acquire() as conn:
@@ -3832,109 +4115,6 @@ async def submit_tx(request: Request):
                                 "INSERT INTO purchases (user_id, wallet_address, location_id, timestamp) VALUES ($1, $2, $3, $4)",
                                 user_id, receipt['from'], location_id, timestamp
                             )
-                    if pending.get("next_tx"):
-                        next_tx_data = pending["next_tx"]
-                        if next_tx_data["type"] == "create_climbing_location":
-                            nonce = await w3.eth.get_transaction_count(pending["wallet_address"])
-                            tx = await contract.functions.createClimbingLocation(
-                                next_tx_data["name"],
-                                next_tx_data["difficulty"],
-                                next_tx_data["latitude"],
-                                next_tx_data["longitude"],
-                                next_tx_data["photo_hash"]
-                            ).build_transaction({
-                                'chainId': 10143,
-                                'from': pending["wallet_address"],
-                                'nonce': nonce,
-                                'gas': 500000,
-                                'gas_price': await w3.eth.gas_price
-                            })
-                            await set_pending_wallet(user_id, {
-                                "awaiting_tx": True,
-                                "tx_data": tx,
-                                "wallet_address": pending["wallet_address"],
-                                "timestamp": time.time(),
-                                "name": next_tx_data["name"],
-                                "difficulty": next_tx_data["difficulty"],
-                                "latitude": next_tx_data["latitude"],
-                                "longitude": next_tx_data["longitude"],
-                                "photo_hash": next_tx_data["photo_hash"]
-                            })
-                            await application.bot.send_message(
-                                user_id,
-                                f"Approval confirmed! Now open https://version1-production.up.railway.app/public/connect.html?userId={user_id} to sign the transaction for climb '{next_tx_data['name']}' ({next_tx_data['difficulty']}) using 10 $TOURS."
-                            )
-                            logger.info(f"/submit_tx processed approval, next transaction built for user {user_id}, took {time.time() - start_time:.2f} seconds")
-                            return {"status": "success"}
-                        elif next_tx_data["type"] == "add_journal_entry":
-                            nonce = await w3.eth.get_transaction_count(pending["wallet_address"])
-                            tx = await contract.functions.addJournalEntryWithDetails(
-                                next_tx_data["content_hash"],
-                                next_tx_data["location"],
-                                next_tx_data["difficulty"],
-                                next_tx_data["is_shared"],
-                                next_tx_data["cast_hash"]
-                            ).build_transaction({
-                                'chainId': 10143,
-                                'from': pending["wallet_address"],
-                                'nonce': nonce,
-                                'gas': 500000,
-                                'gas_price': await w3.eth.gas_price
-                            })
-                            await set_pending_wallet(user_id, {
-                                "awaiting_tx": True,
-                                "tx_data": tx,
-                                "wallet_address": pending["wallet_address"],
-                                "timestamp": time.time()
-                            })
-                            await application.bot.send_message(
-                                user_id,
-                                f"Approval confirmed! Now open https://version1-production.up.railway.app/public/connect.html?userId={user_id} to sign the transaction for journal entry using 5 $TOURS."
-                            )
-                            logger.info(f"/submit_tx processed approval, next transaction built for journal, took {time.time() - start_time:.2f} seconds")
-                            return {"status": "success"}
-                        elif next_tx_data["type"] == "purchase_climbing_location":
-                            nonce = await w3.eth.get_transaction_count(pending["wallet_address"])
-                            tx = await contract.functions.purchaseClimbingLocation(next_tx_data["location_id"]).build_transaction({
-                                'from': pending["wallet_address"],
-                                'nonce': nonce,
-                                'gas': 200000,
-                                'gas_price': await w3.eth.gas_price,
-                                'value': 0
-                            })
-                            await set_pending_wallet(user_id, {
-                                "awaiting_tx": True,
-                                "tx_data": tx,
-                                "wallet_address": pending["wallet_address"],
-                                "timestamp": time.time()
-                            })
-                            await application.bot.send_message(
-                                user_id,
-                                f"Approval confirmed! Now open https://version1-production.up.railway.app/public/connect.html?userId={user_id} to sign the transaction for purchasing climb #{next_tx_data['location_id']} using 10 $TOURS."
-                            )
-                            logger.info(f"/submit_tx processed approval, next transaction built for purchase_climb, took {time.time() - start_time:.2f} seconds")
-                            return {"status": "success"}
-                        elif next_tx_data["type"] == "join_tournament":
-                            nonce = await w3.eth.get_transaction_count(pending["wallet_address"])
-                            tx = await contract.functions.joinTournament(next_tx_data["tournament_id"]).build_transaction({
-                                'from': pending["wallet_address"],
-                                'nonce': nonce,
-                                'gas': 200000,
-                                'gas_price': await w3.eth.gas_price,
-                                'value': 0
-                            })
-                            await set_pending_wallet(user_id, {
-                                "awaiting_tx": True,
-                                "tx_data": tx,
-                                "wallet_address": pending["wallet_address"],
-                                "timestamp": time.time()
-                            })
-                            await application.bot.send_message(
-                                user_id,
-                                f"Approval confirmed! Now open https://version1-production.up.railway.app/public/connect.html?userId={user_id} to sign the transaction for joining tournament #{next_tx_data['tournament_id']} using the entry fee in $TOURS."
-                            )
-                            logger.info(f"/submit_tx processed approval, next transaction built for jointournament, took {time.time() - start_time:.2f} seconds")
-                            return {"status": "success"}
                     await delete_pending_wallet(user_id)
                 logger.info(f"/submit_tx confirmed for user {user_id}, took {time.time() - start_time:.2f} seconds")
                 return {"status": "success"}
@@ -3942,39 +4122,16 @@ async def submit_tx(request: Request):
                 # Check for specific revert reasons
                 try:
                     tx = await w3.eth.get_transaction(tx_hash)
-                    input_data = tx['input']
-                    if input_data.startswith('0x00547664'):  # createProfile
-                        await contract.functions.createProfile().call({
-                            'from': tx['from'],
-                            'value': tx['value'],
-                            'gas': tx['gas']
-                        })
-                    elif input_data.startswith('0x9954e40d'):  # buyTours
-                        amount = int.from_bytes(input_data[4:], byteorder='big')
-                        await contract.functions.buyTours(amount).call({
-                            'from': tx['from'],
-                            'value': tx['value'],
-                            'gas': tx['gas']
-                        })
-                    elif input_data.startswith('0xa9059cbb'):  # transfer (sendTours)
-                        recipient = '0x' + input_data[34:74]
-                        amount = int.from_bytes(input_data[74:], byteorder='big') / 10**18
-                        await tours_contract.functions.transfer(recipient, amount * 10**18).call({
-                            'from': tx['from'],
-                            'gas': tx['gas']
-                        })
-                    elif input_data.startswith('0xfe985ae0'):  # createClimbingLocation
-                        name = w3.to_text(bytes.fromhex(input_data[74:138])).rstrip('\x00')
-                        difficulty = w3.to_text(bytes.fromhex(input_data[202:234])).rstrip('\x00')
-                        latitude = int.from_bytes(bytes.fromhex(input_data[138:170]), byteorder='big', signed=True)
-                        longitude = int.from_bytes(bytes.fromhex(input_data[170:202]), byteorder='big', signed=True)
-                        photo_hash = w3.to_text(bytes.fromhex(input_data[266:])).rstrip('\x00')
-                        await contract.functions.createClimbingLocation(name, difficulty, latitude, longitude, photo_hash).call({
-                            'from': tx['from'],
-                            'gas': tx['gas']
-                        })
-                    else:
+                    call = calldata_codec.decode(tx['input'])
+                    if call is None:
                         raise Exception("Unknown function call")
+                    # Replay the exact call as eth_call to surface the revert reason
+                    target = contract if call.target == "contract" else tours_contract
+                    await target.functions[call.name](*call.values).call({
+                        'from': tx['from'],
+                        'value': tx['value'],
+                        'gas': tx['gas']
+                    })
                 except Exception as e:
                     revert_reason = html.escape(str(e))
                     logger.error(f"Transaction {tx_hash} reverted: {revert_reason}")
@@ -4014,8 +4171,10 @@ async def submit_tx(request: Request):
                             f"Transaction failed: {revert_reason}. Check parameters or contact support at {support_link}. 😅",
                             parse_mode="HTML"
                         )
-                logger.info(f"/submit_tx failed or pending for user {user_id}, took {time.time() - start_time:.2f} seconds")
-                raise HTTPException(status_code=400, detail="Transaction failed or pending")
+                logger.info(f"/submit_tx failed for user {user_id}, took {time.time() - start_time:.2f} seconds")
+                raise HTTPException(status_code=400, detail="Transaction failed")
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error verifying transaction for user {user_id}: {str(e)}, took {time.time() - start_time:.2f} seconds")
             error_msg = html.escape(str(e))
@@ -4026,6 +4185,8 @@ async def submit_tx(request: Request):
                 parse_mode="HTML"
             )
             raise HTTPException(status_code=500, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in /submit_tx: {str(e)}, took {time.time() - start_time:.2f} seconds")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,84 @@
+import re
+import time
+import logging
+from prometheus_client import Histogram, Counter, generate_latest, CONTENT_TYPE_LATEST
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+# Commands and Telegram calls are slow compared to a single RPC or SQL round trip, so stretch the top end
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COMMAND_LATENCY = Histogram("bot_command_latency_seconds", "Telegram command handler latency", ["command"], buckets=LATENCY_BUCKETS)
+COMMAND_ERRORS = Counter("bot_command_errors_total", "Telegram command handlers that raised", ["command"])
+RPC_LATENCY = Histogram("rpc_request_latency_seconds", "JSON-RPC request latency", ["method"], buckets=LATENCY_BUCKETS)
+RPC_ERRORS = Counter("rpc_request_errors_total", "JSON-RPC requests that failed or returned an error", ["method"])
+SQL_LATENCY = Histogram("sql_statement_latency_seconds", "Postgres statement latency", ["statement"], buckets=LATENCY_BUCKETS)
+SQL_ERRORS = Counter("sql_statement_errors_total", "Postgres statements that raised", ["statement"])
+TELEGRAM_LATENCY = Histogram("telegram_api_latency_seconds", "Outbound Telegram Bot API call latency", ["method"], buckets=LATENCY_BUCKETS)
+
+# https://api.telegram.org/bot<token>/<method>; downloads go to /file/bot<token>/<path> instead
+BOT_API_METHOD_RE = re.compile(r"/bot[^/]+/([A-Za-z]+)$")
+
+SQL_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+NOT\s+EXISTS)?)\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+
+def sql_label(query):
+    # Keep label cardinality bounded: "SELECT users", "INSERT pending_wallets", ...
+    query = (query or "").strip()
+    verb = query.split(None, 1)[0].upper() if query else "UNKNOWN"
+    match = SQL_TABLE_RE.search(query)
+    return f"{verb} {match.group(1)}" if match else verb
+
+def bot_api_label(url):
+    # The Bot API method name ("sendMessage"), never a file path, so label cardinality stays bounded
+    if "/file/bot" in url:
+        return "file"
+    match = BOT_API_METHOD_RE.search(url.split("?", 1)[0])
+    return match.group(1) if match else "other"
+
+async def time_command(update, context, req, call_next):
+    # Pipeline middleware (see middleware.pipeline)
+    start = time.perf_counter()
+    try:
+        return await call_next()
+    except Exception:
+        COMMAND_ERRORS.labels(req.command).inc()
+        raise
+    finally:
+        COMMAND_LATENCY.labels(req.command).observe(time.perf_counter() - start)
+
+async def rpc_metrics_middleware(make_request, w3):
+    async def middleware(method, params):
+        start = time.perf_counter()
+        try:
+            response = await make_request(method, params)
+        except Exception:
+            RPC_ERRORS.labels(method).inc()
+            raise
+        finally:
+            RPC_LATENCY.labels(method).observe(time.perf_counter() - start)
+        if isinstance(response, dict) and response.get("error"):
+            RPC_ERRORS.labels(method).inc()
+        return response
+    return middleware
+
+def record_query(record):
+    # asyncpg query logger callback (asyncpg.connection.LoggedQuery)
+    label = sql_label(record.query)
+    SQL_LATENCY.labels(label).observe(record.elapsed)
+    if record.exception is not None:
+        SQL_ERRORS.labels(label).inc()
+
+async def init_pg_connection(conn):
+    conn.add_query_logger(record_query)
+
+class TimedHTTPXRequest(HTTPXRequest):
+    async def do_request(self, url, method, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        finally:
+            TELEGRAM_LATENCY.labels(bot_api_label(url)).observe(time.perf_counter() - start)
+
+def render_latest():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,59 @@
+import asyncio
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+from telegram.constants import ChatAction
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CommandRequest:
+    command: str
+    user_id: str
+    chat_id: int
+    start_time: float = field(default_factory=time.time)
+    session: Optional[dict] = None
+    wallet_address: Optional[str] = None
+    checksum_address: Optional[str] = None
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+# A middleware is `async def mw(update, context, req, call_next)`; it either awaits call_next()
+# to continue down the chain or returns early to short-circuit the handler.
+def pipeline(command, handler, middlewares=()):
+    middlewares = tuple(middlewares)
+
+    async def run(update, context):
+        req = CommandRequest(
+            command=command,
+            user_id=str(update.effective_user.id) if update.effective_user else "",
+            chat_id=update.effective_chat.id if update.effective_chat else 0,
+        )
+        logger.info(f"Received /{command} from user {req.user_id} in chat {req.chat_id}")
+
+        async def call(index):
+            if index == len(middlewares):
+                return await handler(update, context, req)
+            return await middlewares[index](update, context, req, lambda: call(index + 1))
+
+        return await call(0)
+
+    return run
+
+def _log_chat_action_failure(task):
+    if not task.cancelled() and task.exception():
+        logger.warning(f"send_chat_action failed: {task.exception()}")
+
+def typing_indicator(action=ChatAction.TYPING):
+    # Fire the chat action alongside the handler instead of paying a Telegram round trip up front
+    async def middleware(update, context, req, call_next):
+        task = asyncio.create_task(context.bot.send_chat_action(chat_id=req.chat_id, action=action))
+        task.add_done_callback(_log_chat_action_failure)
+        try:
+            return await call_next()
+        finally:
+            if not task.done():
+                task.cancel()
+    return middleware
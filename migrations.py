@@ -0,0 +1,142 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Schema of empowertours.db, shared by api.py and contract.py. The applied version is kept in
+# PRAGMA user_version; each migration runs once, in its own transaction, in order.
+PENDING_TXS_COLUMNS = "user_id, tx_type, tx_data, name, difficulty, latitude, longitude, photo_hash, location_id, tournament_id"
+
+MIGRATIONS = [
+    (1, "base tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS sessions (
+            user_id TEXT PRIMARY KEY,
+            session_id TEXT,
+            wallet_address TEXT,
+            connected_at INTEGER  -- Timestamp for expiry
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS pending_txs (
+            user_id TEXT,
+            tx_type TEXT,
+            tx_data TEXT,
+            name TEXT,
+            difficulty TEXT,
+            latitude INTEGER,
+            longitude INTEGER,
+            photo_hash TEXT,
+            location_id INTEGER,
+            tournament_id INTEGER,
+            UNIQUE(user_id, tx_type)  -- Prevent duplicates
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS pending_actions (
+            user_id TEXT PRIMARY KEY,
+            action_type TEXT,  -- 'journal' or 'climb'
+            content_hash TEXT,
+            name TEXT,
+            difficulty TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS climbs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            creator_user_id TEXT,
+            title TEXT,
+            description TEXT,
+            picture_url TEXT,  -- Encrypted
+            location TEXT,     -- Encrypted (JSON: {'lat': float, 'lon': float})
+            price_tours INTEGER,
+            created_at INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS purchases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            climb_id INTEGER,
+            buyer_user_id TEXT,
+            purchased_at INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS journals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            climb_id INTEGER,
+            user_id TEXT,
+            entry_text TEXT,
+            date INTEGER
+        )
+        ''',
+    ]),
+    # Databases created by contract.py got "tx_type TEXT UNIQUE": one pending transaction of each type
+    # across *all* users. Rebuilt with the per-user constraint; ROWID order (newest last) is kept.
+    (2, "pending_txs unique per user", [
+        '''
+        CREATE TABLE pending_txs_v2 (
+            user_id TEXT,
+            tx_type TEXT,
+            tx_data TEXT,
+            name TEXT,
+            difficulty TEXT,
+            latitude INTEGER,
+            longitude INTEGER,
+            photo_hash TEXT,
+            location_id INTEGER,
+            tournament_id INTEGER,
+            UNIQUE(user_id, tx_type)
+        )
+        ''',
+        f"INSERT OR IGNORE INTO pending_txs_v2 ({PENDING_TXS_COLUMNS}) SELECT {PENDING_TXS_COLUMNS} FROM pending_txs ORDER BY ROWID",
+        "DROP TABLE pending_txs",
+        "ALTER TABLE pending_txs_v2 RENAME TO pending_txs",
+    ]),
+    # sessions needs none: user_id is its PRIMARY KEY, so expiry checks are already a unique-index lookup
+    (3, "lookup indexes", [
+        # /add_journal and /get_climb: SELECT 1 ... WHERE climb_id = ? AND buyer_user_id = ? reads the index only
+        "CREATE INDEX IF NOT EXISTS idx_purchases_climb_buyer ON purchases (climb_id, buyer_user_id)",
+        # WHERE user_id = ? ORDER BY ROWID DESC LIMIT 1: index entries are in ROWID order within a user_id
+        "CREATE INDEX IF NOT EXISTS idx_pending_txs_user ON pending_txs (user_id)",
+    ]),
+    # Modification counter per table, bumped by triggers so every writer (api.py, scripts, sqlite3 shell)
+    # counts; /find_climbs derives its ETag from it and MAX(id)
+    (4, "climbs modification counter", [
+        "CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)",
+        "INSERT OR IGNORE INTO table_versions (name, version) VALUES ('climbs', 0)",
+        "CREATE TRIGGER IF NOT EXISTS climbs_version_insert AFTER INSERT ON climbs BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'climbs'; END",
+        "CREATE TRIGGER IF NOT EXISTS climbs_version_update AFTER UPDATE ON climbs BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'climbs'; END",
+        "CREATE TRIGGER IF NOT EXISTS climbs_version_delete AFTER DELETE ON climbs BEGIN UPDATE table_versions SET version = version + 1 WHERE name = 'climbs'; END",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, target=None):
+    # conn is a plain sqlite3 connection; target stops early (the benchmark uses it for the "before" schema)
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        if version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another process may have migrated while we waited for it
+            if schema_version(conn) >= version:
+                conn.execute("ROLLBACK")
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+        logger.info(f"Applied migration {version} ({name})")
+    if applied:
+        conn.execute("PRAGMA optimize")
+    return schema_version(conn)
@@ -0,0 +1,158 @@
+import json
+import time
+import logging
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# Built-transaction keys and the typed columns they are stored in
+TX_COLUMNS = (
+    ("to", "tx_to"),
+    ("from", "tx_from"),
+    ("data", "tx_input"),
+    ("value", "tx_value"),
+    ("gas", "tx_gas"),
+    ("nonce", "tx_nonce"),
+    ("chainId", "tx_chain_id"),
+    ("maxFeePerGas", "max_fee_per_gas"),
+    ("maxPriorityFeePerGas", "max_priority_fee_per_gas"),
+)
+# Flow fields the confirmation paths read back (climb details, media linking)
+FLOW_COLUMNS = ("name", "difficulty", "latitude", "longitude", "entry_type", "photo_hash")
+NUMERIC_KEYS = {"value", "maxFeePerGas", "maxPriorityFeePerGas"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_txs (
+    user_id TEXT PRIMARY KEY,
+    step TEXT NOT NULL,
+    wallet_address TEXT,
+    tx_to TEXT,
+    tx_from TEXT,
+    tx_input TEXT,
+    tx_value NUMERIC(78, 0),
+    tx_gas BIGINT,
+    tx_nonce BIGINT,
+    tx_chain_id INTEGER,
+    max_fee_per_gas NUMERIC(78, 0),
+    max_priority_fee_per_gas NUMERIC(78, 0),
+    tx_extra JSONB,
+    bundle JSONB,
+    served BOOLEAN NOT NULL DEFAULT FALSE,
+    name TEXT,
+    difficulty TEXT,
+    latitude BIGINT,
+    longitude BIGINT,
+    entry_type TEXT,
+    photo_hash TEXT,
+    timestamp DOUBLE PRECISION NOT NULL
+)
+"""
+
+COLUMNS = (
+    ["user_id", "step", "wallet_address"]
+    + [column for _, column in TX_COLUMNS]
+    + ["tx_extra", "bundle", "served"]
+    + list(FLOW_COLUMNS)
+    + ["timestamp"]
+)
+UPSERT = (
+    f"INSERT INTO pending_txs ({', '.join(COLUMNS)}) VALUES ({', '.join(f'${i}' for i in range(1, len(COLUMNS) + 1))}) "
+    f"ON CONFLICT (user_id) DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in COLUMNS[1:])}"
+)
+
+def step_of(data):
+    if data.get("awaiting_tx"):
+        return "awaiting_tx"
+    if data.get("awaiting_wallet"):
+        return "awaiting_wallet"
+    return "idle"
+
+def to_row(user_id, data):
+    tx = data.get("tx_data") or {}
+    known = {key for key, _ in TX_COLUMNS}
+    extra = {key: value for key, value in tx.items() if key not in known}
+    bundle = data.get("bundle")
+    return (
+        [user_id, step_of(data), data.get("wallet_address")]
+        + [Decimal(tx[key]) if key in NUMERIC_KEYS and tx.get(key) is not None else tx.get(key) for key, _ in TX_COLUMNS]
+        + [
+            json.dumps(extra, default=str) if extra else None,
+            # Only the leading legs (approve); the last leg is tx_data itself
+            json.dumps(bundle[:-1], default=str) if bundle else None,
+            bool(data.get("tx_served")),
+        ]
+        + [data.get(field) for field in FLOW_COLUMNS]
+        + [data["timestamp"]]
+    )
+
+def from_row(row):
+    data = {"timestamp": row["timestamp"]}
+    if row["step"] in ("awaiting_tx", "awaiting_wallet"):
+        data[row["step"]] = True
+    if row["wallet_address"] is not None:
+        data["wallet_address"] = row["wallet_address"]
+    if row["step"] == "awaiting_tx":
+        tx = {}
+        for key, column in TX_COLUMNS:
+            value = row[column]
+            if value is not None:
+                tx[key] = int(value) if key in NUMERIC_KEYS else value
+        if row["tx_extra"]:
+            tx.update(json.loads(row["tx_extra"]))
+        data["tx_data"] = tx
+        if row["bundle"]:
+            data["bundle"] = json.loads(row["bundle"]) + [tx]
+        if row["served"]:
+            data["tx_served"] = True
+    for field in FLOW_COLUMNS:
+        if row[field] is not None:
+            data[field] = row[field]
+    return data
+
+class PendingStore:
+    # Hot rows live in memory in the dict shape the handlers use; Postgres gets one typed upsert when a
+    # flow step stores a new transaction and single-column UPDATEs for small state changes
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self.rows = {}
+
+    def get(self, user_id):
+        return self.rows.get(user_id)
+
+    async def put(self, pool, user_id, data):
+        self.rows[user_id] = data
+        async with pool.acquire() as conn:
+            await conn.execute(UPSERT, *to_row(user_id, data))
+
+    async def mark_served(self, pool, user_id):
+        data = self.rows.get(user_id)
+        if data is not None:
+            data["tx_served"] = True
+        async with pool.acquire() as conn:
+            await conn.execute("UPDATE pending_txs SET served = TRUE WHERE user_id = $1", user_id)
+
+    async def delete(self, pool, user_id):
+        self.rows.pop(user_id, None)
+        async with pool.acquire() as conn:
+            await conn.execute("DELETE FROM pending_txs WHERE user_id = $1", user_id)
+
+    async def load(self, conn):
+        await conn.execute(SCHEMA)
+        cutoff = time.time() - self.max_age
+        await conn.execute("DELETE FROM pending_txs WHERE timestamp < $1", cutoff)
+        await self.import_legacy(conn, cutoff)
+        self.rows = {row["user_id"]: from_row(row) for row in await conn.fetch("SELECT * FROM pending_txs")}
+        return len(self.rows)
+
+    async def import_legacy(self, conn, cutoff):
+        # One-time move from the old JSONB pending_wallets table
+        if not await conn.fetchval("SELECT to_regclass('pending_wallets') IS NOT NULL"):
+            return
+        moved = 0
+        for row in await conn.fetch("SELECT user_id, data, timestamp FROM pending_wallets WHERE timestamp >= $1", cutoff):
+            data = json.loads(row["data"])
+            data["timestamp"] = row["timestamp"]
+            await conn.execute(UPSERT, *to_row(row["user_id"], data))
+            moved += 1
+        await conn.execute("DROP TABLE pending_wallets")
+        logger.info(f"Moved {moved} rows from pending_wallets to pending_txs")
@@ -0,0 +1,41 @@
+import json
+import asyncio
+from collections import Counter
+
+class TxNotifier:
+    # One asyncio.Event per user with an open stream. notify() sets it and drops it, so the next
+    # listener gets a fresh Event: no clear() races between several tabs of the same user.
+    def __init__(self):
+        self.events = {}
+        self.listeners = Counter()
+
+    def listen(self, user_id):
+        # Take the Event *before* reading state, so a store that lands in between still wakes us
+        event = self.events.get(user_id)
+        if event is None:
+            event = self.events[user_id] = asyncio.Event()
+        return event
+
+    def notify(self, user_id):
+        event = self.events.pop(user_id, None)
+        if event:
+            event.set()
+
+    def acquire(self, user_id):
+        self.listeners[user_id] += 1
+
+    def release(self, user_id):
+        self.listeners[user_id] -= 1
+        if self.listeners[user_id] <= 0:
+            del self.listeners[user_id]
+            self.events.pop(user_id, None)
+
+    async def wait(self, event, timeout):
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,96 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    __slots__ = ("capacity", "refill_rate", "tokens", "updated_at")
+
+    def __init__(self, capacity, refill_rate, now=None):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic() if now is None else now
+
+    def refill(self, now):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.updated_at = now
+
+    def wait_time(self, cost):
+        # Seconds until `cost` tokens are available (0 if they already are)
+        if self.tokens >= cost:
+            return 0.0
+        if self.refill_rate <= 0:
+            return float("inf")
+        return (cost - self.tokens) / self.refill_rate
+
+# Token buckets keyed by (user, command) plus one global bucket shared by all users
+class CommandRateLimiter:
+    def __init__(self, costs=None, default_cost=1, user_capacity=10, user_refill=0.2,
+                 global_capacity=200, global_refill=20, max_buckets=10000):
+        self.costs = dict(costs or {})
+        self.default_cost = default_cost
+        self.user_capacity = user_capacity
+        self.user_refill = user_refill
+        self.max_buckets = max_buckets
+        self.global_bucket = TokenBucket(global_capacity, global_refill)
+        self.buckets = {}
+        self.notified_until = {}
+
+    def cost(self, command):
+        return self.costs.get(command, self.default_cost)
+
+    def check(self, user_id, command, now=None):
+        # Returns 0 when the command may run (tokens consumed), otherwise seconds to wait
+        now = time.monotonic() if now is None else now
+        cost = self.cost(command)
+        key = (user_id, command)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self.prune(now)
+            # Never let a single command cost more than a full bucket, or it could never run
+            bucket = TokenBucket(max(self.user_capacity, cost), self.user_refill, now)
+            self.buckets[key] = bucket
+        bucket.refill(now)
+        self.global_bucket.refill(now)
+        retry_after = max(bucket.wait_time(cost), self.global_bucket.wait_time(cost))
+        if retry_after > 0:
+            return retry_after
+        bucket.tokens -= cost
+        self.global_bucket.tokens -= cost
+        self.notified_until.pop(key, None)
+        return 0.0
+
+    def should_notify(self, user_id, command, retry_after, now=None):
+        # Only answer the first throttled call per window so a spammer can't turn replies into load
+        now = time.monotonic() if now is None else now
+        key = (user_id, command)
+        if self.notified_until.get(key, 0) > now:
+            return False
+        self.notified_until[key] = now + retry_after
+        return True
+
+    def prune(self, now):
+        # Drop buckets that have refilled completely; they hold no state worth keeping
+        for key, bucket in list(self.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self.buckets[key]
+                self.notified_until.pop(key, None)
+        logger.info(f"Pruned rate limit buckets, {len(self.buckets)} remaining")
+
+def parse_costs(spec):
+    # "findaclimb=5,journals=5" -> {"findaclimb": 5, "journals": 5}
+    costs = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        command, value = item.split("=", 1)
+        try:
+            costs[command.strip().lstrip("/")] = float(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid command cost: {item}")
+    return costs
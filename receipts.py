@@ -0,0 +1,102 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from web3.datastructures import AttributeDict
+# Private web3 API: the same formatter w3.eth.get_transaction_receipt applies, needed because batched receipts bypass it.
+# It only keeps working because requirements.txt pins web3<7.0.0; check it still exists before raising that pin.
+from web3._utils.method_formatters import receipt_formatter
+
+logger = logging.getLogger(__name__)
+
+class ReceiptTracker:
+    # Every submitted hash is registered once; all outstanding hashes are fetched together in one
+    # batched eth_getTransactionReceipt request per new block, and waiters get the receipt via a future.
+    def __init__(self, w3, poll_interval=1.0, max_age=900, batch_size=100, recent_size=500):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.recent_size = recent_size
+        self.pending = {}  # tx_hash: (future, registered_at)
+        self.recent = OrderedDict()  # tx_hash: receipt, for hashes that are submitted twice
+        self.last_block = None
+        self.fresh = False
+        self.task = None
+
+    def track(self, tx_hash):
+        tx_hash = tx_hash.lower()
+        loop = asyncio.get_running_loop()
+        if tx_hash in self.recent:
+            future = loop.create_future()
+            future.set_result(self.recent[tx_hash])
+            return future
+        entry = self.pending.get(tx_hash)
+        if entry:
+            return entry[0]
+        future = loop.create_future()
+        self.pending[tx_hash] = (future, time.monotonic())
+        self.fresh = True  # don't make a new hash wait for the next block if it is already mined
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.run())
+        return future
+
+    async def wait(self, tx_hash, timeout=120):
+        # shield: a caller timing out must not cancel the shared future other waiters rely on
+        return await asyncio.wait_for(asyncio.shield(self.track(tx_hash)), timeout)
+
+    async def run(self):
+        while self.pending:
+            try:
+                block = await self.w3.eth.block_number
+                if block != self.last_block or self.fresh:
+                    self.last_block = block
+                    self.fresh = False
+                    await self.poll()
+            except Exception as e:
+                logger.warning(f"Receipt polling failed: {str(e)}")
+            self.expire()
+            if self.pending:
+                await asyncio.sleep(self.poll_interval)
+
+    async def poll(self):
+        hashes = list(self.pending)
+        for i in range(0, len(hashes), self.batch_size):
+            chunk = hashes[i:i + self.batch_size]
+            receipts = await self.fetch(chunk)
+            for tx_hash, receipt in zip(chunk, receipts):
+                if receipt is None:
+                    continue
+                self.remember(tx_hash, receipt)
+                future, registered_at = self.pending.pop(tx_hash)
+                if not future.done():
+                    future.set_result(receipt)
+                logger.info(f"Receipt for {tx_hash} found in block {receipt.blockNumber}, waited {time.monotonic() - registered_at:.2f} seconds")
+
+    async def fetch(self, hashes):
+        batch = getattr(self.w3.provider, "make_batch_request", None)
+        if batch:
+            responses = await batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes])
+            return [self.format(response.get("result")) for response in responses]
+        # Provider without batching: still one round of concurrent requests per block
+        results = await asyncio.gather(*(self.w3.eth.get_transaction_receipt(tx_hash) for tx_hash in hashes), return_exceptions=True)
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    def format(self, raw):
+        if not raw:
+            return None
+        return AttributeDict.recursive(receipt_formatter(raw))
+
+    def remember(self, tx_hash, receipt):
+        self.recent[tx_hash] = receipt
+        while len(self.recent) > self.recent_size:
+            self.recent.popitem(last=False)
+
+    def expire(self):
+        now = time.monotonic()
+        for tx_hash, (future, registered_at) in list(self.pending.items()):
+            if now - registered_at > self.max_age:
+                del self.pending[tx_hash]
+                if not future.done():
+                    future.set_exception(asyncio.TimeoutError(f"No receipt for {tx_hash} after {self.max_age} seconds"))
+                    future.exception()  # mark retrieved; waiters may already have given up
@@ -0,0 +1,289 @@
+import time
+import json
+import asyncio
+import logging
+from collections import deque
+import aiohttp
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC error codes that mean the node itself is struggling, as opposed to a revert or bad params
+PROVIDER_ERROR_CODES = {-32603, -32005, -32002, -32001}
+
+class RpcHealth:
+    # Passive health tracking from real traffic plus a periodic probe, so handlers can read
+    # a cached flag instead of spending a round trip on is_connected()
+    def __init__(self, window=50, min_samples=5, error_threshold=0.5, max_consecutive_failures=3):
+        self.outcomes = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.error_threshold = error_threshold
+        self.max_consecutive_failures = max_consecutive_failures
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.last_success = 0.0
+        self.last_error = None
+
+    def record(self, ok, error=None):
+        self.outcomes.append(ok)
+        if ok:
+            self.consecutive_failures = 0
+            self.last_success = time.time()
+            if not self.healthy:
+                # A single success after an outage is enough; forget the errors that caused it
+                self.outcomes.clear()
+                self.outcomes.append(True)
+                self.healthy = True
+                logger.info("RPC provider recovered")
+            return
+        self.consecutive_failures += 1
+        self.last_error = str(error) if error else "unknown error"
+        if self.healthy and self._degraded():
+            self.healthy = False
+            logger.error(f"RPC provider marked unhealthy: error rate {self.error_rate():.0%}, last error: {self.last_error}")
+
+    def _degraded(self):
+        if self.consecutive_failures >= self.max_consecutive_failures:
+            return True
+        return len(self.outcomes) >= self.min_samples and self.error_rate() >= self.error_threshold
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def status(self):
+        return {
+            "healthy": self.healthy,
+            "error_rate": round(self.error_rate(), 3),
+            "samples": len(self.outcomes),
+            "consecutive_failures": self.consecutive_failures,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+        }
+
+    async def middleware(self, make_request, w3):
+        async def middleware(method, params):
+            try:
+                response = await make_request(method, params)
+            except Exception as e:
+                self.record(False, e)
+                raise
+            error = response.get("error") if isinstance(response, dict) else None
+            if error and isinstance(error, dict) and error.get("code") in PROVIDER_ERROR_CODES:
+                self.record(False, error.get("message"))
+            else:
+                self.record(True)
+            return response
+        return middleware
+
+    async def probe(self, w3):
+        # eth_blockNumber is the cheapest call every node answers; the middleware records the outcome
+        probe_all = getattr(w3.provider, "probe_all", None)
+        if probe_all:
+            await probe_all()
+        try:
+            await w3.eth.block_number
+        except Exception as e:
+            logger.warning(f"RPC health probe failed: {str(e)}")
+
+# Writes and nonce reads must all hit the same node, or a lagging replica hands out a stale nonce
+STICKY_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction", "eth_getTransactionCount"}
+# Safe to send twice; the slower answer is simply dropped
+IDEMPOTENT_METHODS = {
+    "eth_call", "eth_estimateGas", "eth_getBalance", "eth_getCode", "eth_getStorageAt",
+    "eth_blockNumber", "eth_chainId", "net_version", "web3_clientVersion",
+    "eth_gasPrice", "eth_maxPriorityFeePerGas", "eth_feeHistory",
+    "eth_getBlockByNumber", "eth_getBlockByHash", "eth_getLogs",
+    "eth_getTransactionByHash", "eth_getTransactionReceipt",
+}
+
+class RpcEndpoint:
+    def __init__(self, url, alpha=0.2, window=200):
+        self.url = url
+        self.alpha = alpha
+        self.ewma = None
+        self.latencies = deque(maxlen=window)
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def observe(self, latency):
+        self.ewma = latency if self.ewma is None else self.alpha * latency + (1 - self.alpha) * self.ewma
+        self.latencies.append(latency)
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def lost(self, latency):
+        # A hedge leg cancelled before it answered: its real latency is at least this, so it still counts
+        # against the ranking, but says nothing about whether the node is up
+        self.ewma = latency if self.ewma is None else self.alpha * latency + (1 - self.alpha) * self.ewma
+        self.latencies.append(latency)
+
+    def fail(self, now):
+        # Exponential cooldown keeps a dead node out of rotation without forgetting it
+        self.failures += 1
+        self.cooldown_until = now + min(60, 2 ** self.failures)
+
+    def available(self, now):
+        return now >= self.cooldown_until
+
+    def score(self):
+        # Untried endpoints score 0 so every node gets sampled at least once
+        return self.ewma if self.ewma is not None else 0.0
+
+    def p95(self):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def status(self):
+        return {
+            "url": self.url,
+            "ewma_ms": round(self.ewma * 1000, 1) if self.ewma is not None else None,
+            "p95_ms": round(self.p95() * 1000, 1) if self.latencies else None,
+            "failures": self.failures,
+            "available": self.available(time.monotonic()),
+        }
+
+class MultiEndpointProvider(AsyncJSONBaseProvider):
+    def __init__(self, urls, request_timeout=10, hedge_min_delay=0.05, hedge_max_delay=2.0):
+        super().__init__()
+        if not urls:
+            raise ValueError("MultiEndpointProvider needs at least one RPC URL")
+        self.endpoints = [RpcEndpoint(url) for url in urls]
+        self.sticky = None  # picked on first use, then kept until it fails
+        self.request_timeout = request_timeout
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.session = None
+
+    def __str__(self):
+        return f"MultiEndpointProvider({', '.join(e.url for e in self.endpoints)})"
+
+    async def get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+        return self.session
+
+    async def disconnect(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    def ranked(self):
+        now = time.monotonic()
+        return sorted(self.endpoints, key=lambda e: (not e.available(now), e.score()))
+
+    async def post(self, endpoint, payload, hedge_delay=None):
+        session = await self.get_session()
+        start = time.monotonic()
+        try:
+            async with session.post(endpoint.url, data=payload, headers={"Content-Type": "application/json"}) as response:
+                response.raise_for_status()
+                raw = await response.read()
+        except asyncio.CancelledError:
+            # The losing leg of a hedge: not a failure, but slower than the winner, so record at least the
+            # hedge delay rather than nothing (a primary that always loses would otherwise keep its rank)
+            if hedge_delay is not None:
+                endpoint.lost(max(time.monotonic() - start, hedge_delay))
+            raise
+        except Exception:
+            endpoint.fail(time.monotonic())
+            raise
+        endpoint.observe(time.monotonic() - start)
+        return raw
+
+    async def make_request(self, method, params):
+        payload = self.encode_rpc_request(method, params)
+        if method in STICKY_METHODS:
+            raw = await self.send_sticky(payload)
+        elif method in IDEMPOTENT_METHODS and len(self.endpoints) > 1:
+            raw = await self.send_hedged(payload)
+        else:
+            raw = await self.send_failover(self.ranked(), payload)
+        return self.decode_rpc_response(raw)
+
+    async def send_failover(self, endpoints, payload, errors=None):
+        errors = list(errors or [])
+        for endpoint in endpoints:
+            try:
+                return await self.post(endpoint, payload)
+            except Exception as e:
+                logger.warning(f"RPC endpoint {endpoint.url} failed: {str(e)}")
+                errors.append(e)
+        if errors:
+            raise errors[-1]
+        raise ConnectionError("No RPC endpoints available")
+
+    async def send_sticky(self, payload):
+        if self.sticky is None:
+            self.sticky = self.ranked()[0]
+        try:
+            return await self.post(self.sticky, payload)
+        except Exception as e:
+            previous = self.sticky
+            others = [endpoint for endpoint in self.ranked() if endpoint is not previous]
+            if not others:
+                raise
+            logger.warning(f"Sticky RPC endpoint {previous.url} failed ({str(e)}), failing over")
+            for endpoint in others:
+                try:
+                    raw = await self.post(endpoint, payload)
+                except Exception:
+                    continue
+                self.sticky = endpoint
+                logger.info(f"Sticky RPC endpoint moved from {previous.url} to {endpoint.url}")
+                return raw
+            raise
+
+    async def send_hedged(self, payload):
+        ranked = self.ranked()
+        primary, backup = ranked[0], ranked[1]
+        delay = primary.p95() or self.hedge_min_delay
+        delay = min(self.hedge_max_delay, max(self.hedge_min_delay, delay))
+        first = asyncio.create_task(self.post(primary, payload, delay))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        errors = []
+        if done:
+            if first.exception() is None:
+                return first.result()
+            errors.append(first.exception())
+            pending = set()
+        else:
+            pending = {first}
+        # Primary is slower than its own p95 (or already failed): race a duplicate on the next-best endpoint
+        pending.add(asyncio.create_task(self.post(backup, payload, delay)))
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+        return await self.send_failover(ranked[2:], payload, errors)
+
+    async def make_batch_request(self, calls):
+        # calls is a list of (method, params); responses come back in the same order
+        encoded = [self.encode_rpc_request(method, params) for method, params in calls]
+        ids = [json.loads(item)["id"] for item in encoded]
+        payload = b"[" + b",".join(encoded) + b"]"
+        if len(self.endpoints) > 1 and all(method in IDEMPOTENT_METHODS for method, _ in calls):
+            raw = await self.send_hedged(payload)
+        else:
+            raw = await self.send_failover(self.ranked(), payload)
+        responses = self.decode_rpc_response(raw)
+        if not isinstance(responses, list):
+            raise ValueError(f"RPC endpoint rejected batch request: {responses}")
+        by_id = {response.get("id"): response for response in responses}
+        return [by_id.get(request_id, {"error": {"code": -32603, "message": "missing batch response"}}) for request_id in ids]
+
+    async def probe_all(self):
+        # Touch every endpoint so a recovered (or newly slow) node is noticed without user traffic
+        payload = self.encode_rpc_request("eth_blockNumber", [])
+        await asyncio.gather(*(self.post(endpoint, payload) for endpoint in self.endpoints), return_exceptions=True)
+
+    def status(self):
+        return {"sticky": self.sticky.url if self.sticky else None, "endpoints": [endpoint.status() for endpoint in self.endpoints]}
@@ -0,0 +1,91 @@
+import re
+import math
+import heapq
+
+# Words, keeping dotted grades ("5.10a") and decimals in one token
+TOKEN = re.compile(r"\w+(?:\.\w+)*")
+
+def tokenize(text):
+    return TOKEN.findall(str(text or "").casefold())
+
+class SearchIndex:
+    # Inverted index with BM25 ranking. Each document is a few named fields whose term counts are weighted
+    # (a hit in a climb name outranks one in a long journal text); postings map term -> {key: weighted tf}.
+    # A query only reads the postings of its own terms, so its cost follows how common the terms are,
+    # not how many documents are indexed. Documents are replaced in place when added again.
+    def __init__(self, weights=None, k1=1.2, b=0.75):
+        self.weights = weights or {}
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> {key: weighted term frequency}
+        self.docs = {}      # key -> (length, terms, payload)
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, key):
+        return key in self.docs
+
+    def add(self, key, fields, payload=None):
+        # fields: {field name: text}; payload is returned with each hit (whatever the caller renders from)
+        self.remove(key)
+        counts = {}
+        length = 0
+        for field, text in fields.items():
+            weight = self.weights.get(field, 1.0)
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0.0) + weight
+                length += 1
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[key] = tf
+        self.docs[key] = (length, tuple(counts), payload)
+        self.total_length += length
+
+    def remove(self, key):
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        length, terms, _ = doc
+        for term in terms:
+            posting = self.postings[term]
+            del posting[key]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= length
+
+    def search(self, query, k=10):
+        # -> [(score, key, payload)] best first. Terms combine with OR; documents matching more of them,
+        # or rarer ones, score higher.
+        # MaxScore pruning: terms are taken highest upper bound first, and once k candidates exist a term whose
+        # bound plus the bounds of the terms after it cannot reach the k-th score only rescores those candidates
+        # instead of walking its whole posting list, so common words ("the", a grade) cost little next to a crag name
+        terms = set(tokenize(query))
+        if not terms or not self.docs or k <= 0:
+            return []
+        n = len(self.docs)
+        a = self.k1 * (1 - self.b)
+        c = self.k1 * self.b / (self.total_length / n or 1.0)
+        weighted = []
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            # tf / (tf + norm) stays below 1, so no document gains more than idf * (k1 + 1) from this term
+            weighted.append((idf * (self.k1 + 1), idf, posting))
+        weighted.sort(key=lambda item: item[0], reverse=True)
+        remaining = sum(bound for bound, _, _ in weighted)
+        docs = self.docs
+        scores = {}
+        for bound, idf, posting in weighted:
+            remaining -= bound
+            if len(scores) >= k and heapq.nlargest(k, scores.values())[-1] > bound + remaining:
+                keys = [key for key in scores if key in posting] if len(scores) < len(posting) else [key for key in posting if key in scores]
+            else:
+                keys = posting
+            for key in keys:
+                tf = posting[key]
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + a + c * docs[key][0])
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(score, key, docs[key][2]) for key, score in best]
@@ -0,0 +1,125 @@
+from bisect import bisect_left, insort
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+class Leaderboard:
+    # A score per wallet plus the same scores kept in rank order, so the top k is a slice; an update moves
+    # one entry (bisect out, insort back in) instead of re-sorting every wallet
+    def __init__(self):
+        self.scores = {}
+        self.ranking = []  # (-score, wallet), best first; ties go to the lower address
+
+    def __len__(self):
+        return len(self.scores)
+
+    def add(self, wallet, delta):
+        old = self.scores.get(wallet, 0)
+        if old:
+            del self.ranking[bisect_left(self.ranking, (-old, wallet))]
+        new = old + delta
+        if new:
+            self.scores[wallet] = new
+            insort(self.ranking, (-new, wallet))
+        else:
+            self.scores.pop(wallet, None)
+
+    def top(self, k):
+        return [(wallet, -score) for score, wallet in self.ranking[:k]]
+
+class Tournament:
+    __slots__ = ("tournament_id", "entry_fee", "start_time", "name", "creator", "participants", "active", "winner", "final_pot")
+
+    def __init__(self, tournament_id):
+        self.tournament_id = tournament_id
+        self.entry_fee = 0
+        self.start_time = 0
+        self.name = None
+        self.creator = None
+        self.participants = set()
+        self.active = True
+        self.winner = None
+        self.final_pot = None
+
+    @property
+    def pot(self):
+        # Every entry pays the fee into the pot until the end event reports the final amount
+        return self.final_pot if self.final_pot is not None else self.entry_fee * len(self.participants)
+
+class TournamentStore:
+    # Tournament state materialized from TournamentCreated*/Joined*/Ended* events: real participant sets,
+    # an id-ordered list of active tournaments, and win/earnings leaderboards updated as tournaments end.
+    # Every event is applied idempotently and in any order (a join replayed by a backfill after the end event,
+    # a creation seen after a join), so a history backfill and the live event monitor can overlap freely.
+    def __init__(self):
+        self.tournaments = {}  # tournament id -> Tournament
+        self.ids = []          # sorted ids of every tournament
+        self.active = []       # sorted ids of tournaments that have not ended
+        self.wins = Leaderboard()
+        self.earnings = Leaderboard()
+        self.credited = {}     # tournament id -> (winner, pot) already counted on the leaderboards
+
+    def __len__(self):
+        return len(self.tournaments)
+
+    def get(self, tournament_id):
+        tournament = self.tournaments.get(tournament_id)
+        if tournament is None:
+            tournament = self.tournaments[tournament_id] = Tournament(tournament_id)
+            insort(self.ids, tournament_id)
+            insort(self.active, tournament_id)
+        return tournament
+
+    def created(self, tournament_id, entry_fee, start_time, name=None, creator=None):
+        tournament = self.get(tournament_id)
+        tournament.entry_fee = entry_fee
+        tournament.start_time = start_time
+        tournament.name = name or tournament.name
+        tournament.creator = creator or tournament.creator
+
+    def joined(self, tournament_id, participant):
+        self.get(tournament_id).participants.add(participant)
+
+    def ended(self, tournament_id, pot, winner=None):
+        tournament = self.get(tournament_id)
+        if tournament.active:
+            tournament.active = False
+            del self.active[bisect_left(self.active, tournament_id)]
+        tournament.final_pot = pot
+        if winner is None:
+            return
+        tournament.winner = winner
+        credit = (winner, pot) if winner != ZERO_ADDRESS else None
+        previous = self.credited.get(tournament_id)
+        if previous == credit:
+            return
+        if previous:
+            self.wins.add(previous[0], -1)
+            self.earnings.add(previous[0], -previous[1])
+        if credit:
+            self.wins.add(winner, 1)
+            self.earnings.add(winner, pot)
+            self.credited[tournament_id] = credit
+        else:
+            self.credited.pop(tournament_id, None)
+
+    def apply(self, name, args):
+        # A decoded tournament event by name -> id of a TournamentEnded, which carries no winner: the caller
+        # reads it from tournaments(id) and calls ended() again with it. None otherwise.
+        tournament_id = args["tournamentId"]
+        if name == "TournamentCreated":
+            self.created(tournament_id, args["entryFee"], args["startTime"])
+        elif name == "TournamentCreatedEmbedded":
+            self.created(tournament_id, args["entryFee"], args["startTime"], args["tournamentName"], args["creator"])
+        elif name in ("TournamentJoined", "TournamentJoinedEnhanced"):
+            self.joined(tournament_id, args["participant"])
+        elif name == "TournamentEndedEnhanced":
+            self.ended(tournament_id, args["pot"], args["winner"])
+        elif name == "TournamentEnded":
+            self.ended(tournament_id, args["pot"])
+            if self.tournaments[tournament_id].winner is None:
+                return tournament_id
+        return None
+
+    def listing(self, active_only=False):
+        ids = self.active if active_only else self.ids
+        return [self.tournaments[tournament_id] for tournament_id in ids]